@@ -0,0 +1,154 @@
+"""
+attributeWatcher.py
+
+Pooled attribute change notifications.  Rather than one scriptJob per watched
+attribute, there is one MNodeMessage attribute-changed callback per node,
+shared by everything watching attributes on that node:
+
+    def changed(*args, **kwargs):
+        print kwargs['attribute'], 'changed'
+
+    POOL.subscribe('pCube1', 'tx', changed)
+    POOL.subscribe('pCube1', 'ty', changed)   # same callback as tx
+    ...
+    POOL.unsubscribe('pCube1', 'tx', changed)
+
+Handlers follow the usual mGui.events.Event rules (weak references, *args,
+**kwargs signature).  They are not called from inside the API callback --
+it's not safe to read or edit the scene from there -- but from an
+executeDeferred afterwards; repeated changes to an attribute before then are
+delivered once.  A node's callback is removed when nothing is watching any of
+its attributes.
+
+Only values which are set (setAttr, the channel box, etc) are reported, not
+values which change through connections during evaluation.
+"""
+
+import maya.cmds as cmds
+import maya.utils
+import maya.api.OpenMaya as om
+
+from mGui.events import CoalescingMayaEvent
+
+
+def _depend_node(node):
+    sel = om.MSelectionList()
+    sel.add(node)
+    return sel.getDependNode(0)
+
+
+class NodeListener(object):
+    """
+    Owns the attribute changed callback for one node, and an event for each
+    watched attribute (keyed by long attribute name)
+    """
+
+    def __init__(self, pool, key, mobject):
+        self.pool = pool
+        self.key = key
+        self.handle = om.MObjectHandle(mobject)
+        self.events = {}
+        self._callback_id = om.MNodeMessage.addAttributeChangedCallback(mobject, self._changed)
+
+    def event(self, attribute):
+        if attribute not in self.events:
+            self.events[attribute] = CoalescingMayaEvent(attribute=attribute)
+        return self.events[attribute]
+
+    def __len__(self):
+        """
+        the number of live subscriptions on this node
+        """
+        return sum(len(e) for e in self.events.values())
+
+    def _changed(self, msg, plug, *_):
+        if not msg & om.MNodeMessage.kAttributeSet:
+            return
+
+        names = [om.MFnAttribute(plug.attribute()).name]
+        # setting a compound changes its children and vice versa
+        if plug.isChild:
+            names.append(om.MFnAttribute(plug.parent().attribute()).name)
+        if plug.isCompound:
+            names.extend(om.MFnAttribute(plug.child(i).attribute()).name for i in range(plug.numChildren()))
+
+        for name in names:
+            evt = self.events.get(name)
+            if evt is not None:
+                evt()
+
+        if not len(self):
+            # handlers can expire without unsubscribing; don't remove the callback from inside itself
+            maya.utils.executeDeferred(self.pool._release, self)
+
+    def remove(self):
+        if self._callback_id is not None:
+            om.MMessage.removeCallback(self._callback_id)
+            self._callback_id = None
+
+
+class AttributeListenerPool(object):
+    """
+    Hands out attribute change subscriptions, sharing one NodeListener per node
+    """
+
+    def __init__(self):
+        # MObjectHandle hash codes are not unique, so each one maps to a list
+        # of listeners which are told apart by comparing handles
+        self.listeners = {}
+
+    def _find(self, handle):
+        for listener in self.listeners.get(handle.hashCode(), ()):
+            if listener.handle == handle:
+                return listener
+
+    def subscribe(self, node, attribute, handler):
+        """
+        Call <handler> when <node>.<attribute> is set.
+        """
+        mobject = _depend_node(node)
+        handle = om.MObjectHandle(mobject)
+        listener = self._find(handle)
+        if listener is None:
+            key = handle.hashCode()
+            listener = NodeListener(self, key, mobject)
+            self.listeners.setdefault(key, []).append(listener)
+        evt = listener.event(self._long_name(node, attribute))
+        evt += handler
+
+    def unsubscribe(self, node, attribute, handler):
+        """
+        Stop calling <handler> for changes to <node>.<attribute>. Ignores
+        subscriptions which don't exist
+        """
+        try:
+            listener = self._find(om.MObjectHandle(_depend_node(node)))
+        except RuntimeError:
+            return
+        if listener is None:
+            return
+        evt = listener.events.get(self._long_name(node, attribute))
+        if evt is not None:
+            evt -= handler
+        self._release(listener)
+
+    def _release(self, listener):
+        if len(listener):
+            return
+        listener.remove()
+        bucket = self.listeners.get(listener.key, [])
+        if listener in bucket:
+            bucket.remove(listener)
+        if not bucket:
+            self.listeners.pop(listener.key, None)
+
+    @staticmethod
+    def _long_name(node, attribute):
+        try:
+            return cmds.attributeQuery(attribute, node=node, longName=True) or attribute
+        except RuntimeError:
+            return attribute
+
+
+POOL = AttributeListenerPool()
+'''The shared pool used by data bindings'''
@@ -4,11 +4,19 @@ Created on Feb 16, 2014
 @author: Stephen Theodore
 """
 import sys
+import threading
 
 import maya.cmds as cmds
+import maya.utils
+import operator
 import weakref
-from collections import Mapping
+from collections import Mapping, deque
+from functools import partial, wraps
+from timeit import default_timer
+from mGui.debugging import Logger
+from mGui.events import ThrottledEvent, worker_pool
 from mGui.properties import LateBoundProperty
+import mGui.attributeWatcher as attributeWatcher
 
 # these are primarily intended for debugging.
 # Generally you want to break on access failure, since the Binding
@@ -18,6 +26,7 @@ from mGui.properties import LateBoundProperty
 
 BREAK_ON_ACCESS_FAILURE = False  # break when an accessor fails (eg, a deleted object)
 BREAK_ON_BIND_FAILURE = True  # break when a binding fails (instead of silently deleting bad binding)
+LIVE_UPDATES = False  # default for the 'live' binding option (see Binding)
 
 
 class BindingError(ValueError):
@@ -39,20 +48,87 @@ class Accessor(object):
     cannot be weak referenced so these are stored as ordinary objects.
 
     Truth-testing an accessor returns true if the Accessors <Target> exists.
+
+    identity() returns a hashable key for the object and field being accessed,
+    so that different accessors for the same value can be matched up
+
+    Accessors for values which can announce their own changes (such as maya
+    attributes) implement subscribe() and unsubscribe(), so bindings can
+    update when the value changes instead of waiting to be updated.
+
+    Accessors (and bindings) use __slots__, since large tools create tens of
+    thousands of them; subclasses should declare __slots__ for any fields they
+    add.
+
+    change_token() returns a cheap value which changes whenever the accessed
+    value does (a version number), or None if there isn't one. A target
+    provides tokens with a change_token(field_name) method; a property
+    provides them with a change_token(instance) method (see
+    observable.computed).
     """
 
+    __slots__ = ('target', 'field_name', '_target_id', '_getter', '_setter')
+
     def __init__(self, datum, field_name):
         try:
             self.target = weakref.proxy(datum)
         except TypeError:
             self.target = datum
         self.field_name = field_name
+        self._target_id = id(datum)
+        self._compile()
+
+    def _compile(self):
+        """
+        Prepare the callables used by _get and _set, so they don't have to look
+        up the target and field on every access
+        """
+        self._getter = operator.attrgetter(self.field_name) if self.field_name else None
+        self._setter = partial(setattr, self.target, self.field_name)
+
+    def identity(self):
+        return self._target_id, self.field_name
 
     def _set(self, *args, **kwargs):
-        setattr(self.target, self.field_name, args[0])
+        self._setter(args[0])
 
     def _get(self, *args, **kwargs):
-        return getattr(self.target, self.field_name)
+        return self._getter(self.target)
+
+    def subscribe(self, handler):
+        """
+        Call <handler> when the value changes. Returns False if this accessor
+        can't report changes
+        """
+        return False
+
+    def unsubscribe(self, handler):
+        """
+        Stop calling <handler> when the value changes
+        """
+        pass
+
+    def change_token(self):
+        """
+        Returns a token which changes whenever the value changes, or None if
+        the target can't provide one
+        """
+        if not self.field_name:
+            return None
+        source = getattr(self.target, 'change_token', None)
+        if callable(source):
+            return source(self.field_name)
+        prop = getattr(self.target.__class__, self.field_name, None)
+        if hasattr(prop, 'change_token'):
+            return prop.change_token(self.target)
+        return None
+
+    def batch_plug(self):
+        """
+        Returns a (node, attribute) pair if this accessor reads a maya
+        attribute which a ReadBatch can prefetch, or None
+        """
+        return None
 
     def push(self, *args, **kwargs):
         """
@@ -63,7 +139,10 @@ class Accessor(object):
         are silently ignored
         """
         try:
-            self._set(*args, **kwargs)
+            if _DIAGNOSTICS is not None:
+                _DIAGNOSTICS.timed_push(self._set, args, kwargs)
+            else:
+                self._set(*args, **kwargs)
             return True
         except:
             if BREAK_ON_ACCESS_FAILURE:
@@ -78,6 +157,8 @@ class Accessor(object):
         If BREAK_ON_ACCESS_FAILURE is true, pass any exceptions; otherwise, return 0
         """
         try:
+            if _DIAGNOSTICS is not None:
+                return _DIAGNOSTICS.timed_pull(self._get, args, kwargs)
             return self._get(*args, **kwargs)
         except:
             if BREAK_ON_ACCESS_FAILURE:
@@ -113,15 +194,26 @@ class DictAccessor(Accessor):
     Accessor for a dictionary entry
     """
 
+    __slots__ = ()
+
     def __init__(self, datum, field_name):
         self.target = datum
         self.field_name = field_name
+        self._target_id = id(datum)
+        self._compile()
+
+    def _compile(self):
+        self._getter = partial(operator.getitem, self.target, self.field_name)
+        self._setter = partial(operator.setitem, self.target, self.field_name)
 
     def _set(self, *args, **kwargs):
-        self.target[self.field_name] = args[0]
+        self._setter(args[0])
 
     def _get(self, *args, **kwargs):
-        return self.target[self.field_name]
+        return self._getter()
+
+    def change_token(self):
+        return None
 
     @classmethod
     def can_access(cls, datum, field_name):
@@ -133,12 +225,41 @@ class PyNodeAccessor(Accessor):
     Accessor fpr  an attribute on a PyNode
     """
 
+    __slots__ = ()
+
     def _set(self, *args, **kwargs):
         getattr(self.target, self.field_name).set(args[0])
+        ReadBatch.changed(self)
 
     def _get(self, *args, **kwargs):
+        batched = ReadBatch.lookup(self)
+        if batched is not ReadBatch.MISSING:
+            return batched
         return self.target.attr(self.field_name).get()
 
+    def batch_plug(self):
+        return self.target.name(), self.field_name
+
+    def change_token(self):
+        return None
+
+    def identity(self):
+        # use the maya name, so this matches CmdsAccessors for the same attribute
+        try:
+            return "%s.%s" % (self.target.name(), self.field_name)
+        except ReferenceError:
+            return super(PyNodeAccessor, self).identity()
+
+    def subscribe(self, handler):
+        attributeWatcher.POOL.subscribe(self.target.name(), self.field_name, handler)
+        return True
+
+    def unsubscribe(self, handler):
+        try:
+            attributeWatcher.POOL.unsubscribe(self.target.name(), self.field_name, handler)
+        except ReferenceError:
+            pass
+
     @classmethod
     def can_access(cls, datum, field_name):
         return hasattr(datum, '__melcmd__') and hasattr(datum, field_name)
@@ -151,6 +272,8 @@ class PyAttributeAccessor(Accessor):
     Note this creates a _strong_ reference to the attribute, so it may leak
     """
 
+    __slots__ = ('attrib',)
+
     def __init__(self, datum, field_name):
         pyAttr = datum
         self.target = pyAttr.node()
@@ -159,10 +282,30 @@ class PyAttributeAccessor(Accessor):
 
     def _set(self, *args, **kwargs):
         self.attrib.set(args[0])
+        ReadBatch.changed(self)
 
     def _get(self, *args, **kwargs):
+        batched = ReadBatch.lookup(self)
+        if batched is not ReadBatch.MISSING:
+            return batched
         return self.attrib.get()
 
+    def batch_plug(self):
+        return self.target.name(), self.field_name
+
+    def change_token(self):
+        return None
+
+    def identity(self):
+        return self.attrib.name()
+
+    def subscribe(self, handler):
+        attributeWatcher.POOL.subscribe(self.target.name(), self.field_name, handler)
+        return True
+
+    def unsubscribe(self, handler):
+        attributeWatcher.POOL.unsubscribe(self.target.name(), self.field_name, handler)
+
     @classmethod
     def can_access(cls, datum, field_name):
         return 'Attribute' in datum.__class__.__name__
@@ -175,16 +318,43 @@ class CmdsAccessor(Accessor):
     Unlike the other accessors the target is just a string, not a weakref
     """
 
+    __slots__ = ('_attrib',)
+
     def __init__(self, datum, field_name):
         self.target = str(datum)
         self.field_name = str(field_name)
         self._attrib = "%s.%s" % (self.target, self.field_name)
+        self._compile()
+
+    def _compile(self):
+        self._getter = partial(cmds.getAttr, self._attrib)
+        self._setter = partial(cmds.setAttr, self._attrib)
 
     def _set(self, *args, **kwargs):
-        cmds.setAttr(self._attrib, args[0])
+        self._setter(args[0])
+        ReadBatch.changed(self)
 
     def _get(self, *args, **kwargs):
-        return cmds.getAttr(self._attrib)
+        batch = ReadBatch.ACTIVE
+        if batch is None:
+            return self._getter()
+        return batch.get(self.target, self.field_name, self._getter)
+
+    def batch_plug(self):
+        return self.target, self.field_name
+
+    def change_token(self):
+        return None
+
+    def identity(self):
+        return self._attrib
+
+    def subscribe(self, handler):
+        attributeWatcher.POOL.subscribe(self.target, self.field_name, handler)
+        return True
+
+    def unsubscribe(self, handler):
+        attributeWatcher.POOL.unsubscribe(self.target, self.field_name, handler)
 
     @classmethod
     def can_access(self, datum, field_name):
@@ -201,6 +371,8 @@ class MethodAccessor(Accessor):
     Accessor for a method
     """
 
+    __slots__ = ()
+
     def _set(self, *args, **kwargs):
         getattr(self.target, self.field_name)(*args, **kwargs)
 
@@ -212,6 +384,146 @@ class MethodAccessor(Accessor):
         return field_name and hasattr(datum, field_name) and callable(getattr(datum, field_name))
 
 
+class ReadBatch(object):
+    """
+    Prefetches the maya attributes read by a group of accessors, so a
+    BindingContext update makes as few maya calls as possible:
+
+    * attributes which are children of the same compound (eg 'tx', 'ty' and
+      'tz') are read with a single getAttr on the parent
+    * a CmdsAccessor attribute read by several bindings is only read once
+
+    While a batch is active (use it as a context manager) accessors read their
+    values from it. Writing any attribute discards everything in the batch,
+    since the write can drive other nodes through connections or
+    expressions; bindings further down the update read live values again.
+
+    Nodes with only one requested attribute are left alone, since there is
+    nothing to merge. <node_types> is a dictionary of node name -> node type
+    which can be shared between batches (BindingContext keeps one), so the
+    types are only looked up once.
+    """
+
+    ACTIVE = None
+    MISSING = object()
+
+    # (node type, attribute) -> (compound parent, child index), or None if not
+    # a compound child. Only static attributes are cached, so this is bounded by
+    # the node types in use and isn't affected by renaming or deleting nodes
+    _STRUCTURE = {}
+
+    def __init__(self, accessors, node_types=None):
+        self._compound_values = {}
+        self._values = {}
+        self._types = {} if node_types is None else node_types
+        self._previous = None
+        requested = {}
+        for accessor in accessors:
+            try:
+                plug = accessor.batch_plug() if accessor else None
+            except (ReferenceError, RuntimeError, ValueError):
+                continue
+            if plug is not None:
+                requested.setdefault(plug[0], set()).add(plug[1])
+        for node, attributes in requested.items():
+            if len(attributes) > 1:
+                self._prefetch(node, attributes)
+
+    def __enter__(self):
+        self._previous = ReadBatch.ACTIVE
+        ReadBatch.ACTIVE = self
+        return self
+
+    def __exit__(self, *_):
+        ReadBatch.ACTIVE = self._previous
+
+    def get(self, node, attribute, fallback):
+        """
+        Returns the value of <node>.<attribute>, calling <fallback> (and
+        remembering the result) if it has not been fetched
+        """
+        batched = self._compound_values.get(node)
+        if batched is not None and attribute in batched:
+            return batched[attribute]
+        values = self._values.setdefault(node, {})
+        if attribute not in values:
+            values[attribute] = fallback()
+        return values[attribute]
+
+    @classmethod
+    def lookup(cls, accessor):
+        """
+        Returns the prefetched value for <accessor> from the active batch, or
+        MISSING. Only values read through compound parents are returned,
+        since those are plain numbers for both cmds and pymel.
+        """
+        batch = cls.ACTIVE
+        if batch is None:
+            return cls.MISSING
+        node, attribute = accessor.batch_plug()
+        return batch._compound_values.get(node, {}).get(attribute, cls.MISSING)
+
+    @classmethod
+    def changed(cls, accessor):
+        """
+        Discard the active batch's values when <accessor> writes to maya
+        """
+        batch = cls.ACTIVE
+        if batch is not None:
+            batch._compound_values.clear()
+            batch._values.clear()
+
+    def _prefetch(self, node, attributes):
+        node_type = self._types.get(node)
+        if node_type is None:
+            try:
+                node_type = self._types[node] = cmds.nodeType(node)
+            except RuntimeError:
+                return
+
+        by_parent = {}
+        for attribute in attributes:
+            structure = self._structure(node_type, attribute)
+            if structure is not None:
+                by_parent.setdefault(structure[0], []).append((attribute, structure[1]))
+
+        for parent, children in by_parent.items():
+            if len(children) < 2:
+                continue
+            try:
+                result = cmds.getAttr("%s.%s" % (node, parent))
+            except (RuntimeError, ValueError):
+                # the node may have been deleted or replaced; look it up again next time
+                self._types.pop(node, None)
+                continue
+            # numeric compounds come back as [(x, y, z)]
+            if not (isinstance(result, list) and len(result) == 1 and isinstance(result[0], tuple)):
+                continue
+            values = self._compound_values.setdefault(node, {})
+            for attribute, index in children:
+                if index < len(result[0]):
+                    values[attribute] = result[0][index]
+
+    def _structure(self, node_type, attribute):
+        if '[' in attribute or '.' in attribute:
+            return None
+        key = (node_type, attribute)
+        if key not in self._STRUCTURE:
+            structure = None
+            try:
+                # dynamic attributes aren't found by type, so they are never batched
+                parent = cmds.attributeQuery(attribute, type=node_type, listParent=True)
+                if parent:
+                    siblings = cmds.attributeQuery(parent[0], type=node_type, listChildren=True) or []
+                    long_name = cmds.attributeQuery(attribute, type=node_type, longName=True)
+                    if long_name in siblings:
+                        structure = parent[0], siblings.index(long_name)
+            except (RuntimeError, TypeError):
+                pass
+            self._STRUCTURE[key] = structure
+        return self._STRUCTURE[key]
+
+
 class AccessorFactory(object):
     """
     The Accessor factory loops through the default Accessor classes and returns
@@ -229,6 +541,11 @@ class AccessorFactory(object):
     The order in which the tests run is determined by the order in which they
     are added in the constructor. Custom classes will be tested before the
     default classes
+
+    Results are cached by the type of the object and the field name (for maya
+    object strings, by the node type and attribute name) so the tests are not
+    repeated for every binding. The cache is cleared if the <tests> list
+    changes.
     """
 
     def __init__(self, *acccessor_classes):
@@ -236,6 +553,8 @@ class AccessorFactory(object):
         self.tests = [cls for cls in acccessor_classes] + [PyAttributeAccessor, PyNodeAccessor, Accessor,
                                                            MethodAccessor,
                                                            DictAccessor, CmdsAccessor]
+        self._cache = {}
+        self._cached_tests = tuple(self.tests)
 
     def accessor_class(self, *args):
         """
@@ -245,11 +564,49 @@ class AccessorFactory(object):
         datum = args[0]
         field_name = args[-1]
 
+        if self._cached_tests != tuple(self.tests):
+            self.clear_cache()
+
+        key = self._cache_key(datum, field_name)
+        cached = self._cache.get(key)
+        if cached is not None:
+            # maya keys already include the node type. Other accessors can
+            # depend on instance attributes, so double check those
+            if isinstance(key[0], basestring) or cached.can_access(datum, field_name):
+                return cached
+
         for fclass in self.tests:
             if fclass.can_access(datum, field_name):
+                if self._cacheable(key, datum, field_name, fclass):
+                    self._cache[key] = fclass
                 return fclass
         return None
 
+    def clear_cache(self):
+        self._cache.clear()
+        self._cached_tests = tuple(self.tests)
+
+    @staticmethod
+    def _cache_key(datum, field_name):
+        if isinstance(datum, basestring):
+            try:
+                return cmds.nodeType(datum), field_name
+            except (RuntimeError, TypeError):
+                return None
+        return type(datum), field_name
+
+    @staticmethod
+    def _cacheable(key, datum, field_name, fclass):
+        if key is None:
+            return False
+        if isinstance(key[0], basestring):
+            # dynamic attributes aren't shared by other nodes of the same type
+            try:
+                return field_name not in (cmds.listAttr(datum, userDefined=True) or [])
+            except (RuntimeError, TypeError):
+                return False
+        return True
+
 
 _DEFAULT_FACTORY = AccessorFactory()
 
@@ -279,6 +636,83 @@ def get_accessor(datum, field_name=None, factory_class=None):
     raise BindingError('%s is not a bindable attribute of %s' % (field_name, site))
 
 
+class BindingRegistry(object):
+    """
+    An insertion-ordered set of bindings, with constant time add and remove.
+    Used for the bindings of BindingContexts and BindableObjects, which can
+    hold thousands of bindings.
+
+    Removed bindings leave a hole which iteration skips; the holes are
+    compacted away once they outnumber the live entries. Bindings added while
+    the registry is being iterated are included in the iteration.
+    """
+
+    __slots__ = ('_items', '_index', '_holes')
+
+    def __init__(self, bindings=()):
+        self._items = []
+        self._index = {}
+        self._holes = 0
+        for b in bindings:
+            self.append(b)
+
+    def append(self, binding):
+        """
+        Add <binding>, if it is not already present
+        """
+        if binding not in self._index:
+            self._index[binding] = len(self._items)
+            self._items.append(binding)
+
+    add = append
+
+    def remove(self, binding):
+        """
+        Remove <binding>. Raises ValueError if it is not present
+        """
+        try:
+            idx = self._index.pop(binding)
+        except KeyError:
+            raise ValueError("%s is not registered" % binding)
+        self._items[idx] = None
+        self._holes += 1
+        if self._holes > 16 and self._holes > len(self._index):
+            self._compact()
+
+    def discard(self, binding):
+        """
+        Remove <binding> if it is present
+        """
+        if binding in self._index:
+            self.remove(binding)
+
+    def clear(self):
+        self._items = []
+        self._index = {}
+        self._holes = 0
+
+    def _compact(self):
+        # a new list, so that iterations in progress are not disturbed
+        self._items = [b for b in self._items if b is not None]
+        self._index = dict((b, i) for i, b in enumerate(self._items))
+        self._holes = 0
+
+    def __iter__(self):
+        return (b for b in self._items if b is not None)
+
+    def __len__(self):
+        return len(self._index)
+
+    def __contains__(self, binding):
+        return binding in self._index
+
+    def __copy__(self):
+        return BindingRegistry(self)
+
+    def __repr__(self):
+        return "<BindingRegistry (%i bindings)>" % len(self)
+
+
 class BindingContext(object):
     """
     When bindings are created they will automatically be added to the active
@@ -290,14 +724,26 @@ class BindingContext(object):
     By default all bindings in a context will be invoked when the context exits.
     To avoid this create the context with the auto-update flag set to false
 
+    The context keeps a BindingGraph of its bindings, so updates run in
+    dependency order: a binding which writes a value runs before the bindings
+    which read it.  If you know what changed, propagate() re-runs only the
+    bindings which depend on it:
+
+        ctx.propagate(fred & 'val')
+
+    Maya attributes read during an update are prefetched in a ReadBatch
+    unless BATCH_READS is False.
     """
 
     ACTIVE = None
+    BATCH_READS = True
 
     def __init__(self, auto_update=True):
-        self.bindings = []
+        self.bindings = BindingRegistry()
         self.children = []
+        self.graph = BindingGraph()
         self._cache_context = None
+        self._node_types = {}
         self.auto_update = auto_update
 
     def __enter__(self):
@@ -317,9 +763,7 @@ class BindingContext(object):
         update all bindings in this context.  If recurse is True, update all bindings in child contexts
 
         """
-        delenda = [i for i in self.bindings if not i()]
-        for item in delenda:
-            self.bindings.remove(item)
+        self._run(self.graph.ordered())
         if recurse:
             for item in self.children:
                 item.update(recurse)
@@ -327,6 +771,32 @@ class BindingContext(object):
 
         self.update()
 
+    def propagate(self, changed):
+        """
+        Update only the bindings which depend on <changed>, directly or
+        through other bindings. <changed> can be anything which can appear in
+        a binding expression (eg, a BindProxy or an (object, 'property') tuple)
+        or an Accessor.  Returns the number of bindings updated.
+        """
+        if not isinstance(changed, Accessor):
+            changed = BindingExpression()._flatten(changed, target=False)
+        downstream = self.graph.downstream(changed.identity())
+        self._run(downstream)
+        return len(downstream)
+
+    def _run(self, ordered):
+        if self.BATCH_READS:
+            with ReadBatch((a for b in ordered if b for a in b.sources()), self._node_types):
+                delenda = [i for i in ordered if not i()]
+        else:
+            delenda = [i for i in ordered if not i()]
+        for item in delenda:
+            if _DIAGNOSTICS is not None:
+                _DIAGNOSTICS.note_removed(item)
+            self.bindings.remove(item)
+            self.graph.remove(item)
+            item.invalidate()
+
     @classmethod
     def add(cls, binding):
         """
@@ -334,6 +804,7 @@ class BindingContext(object):
         """
         if cls.ACTIVE is not None:
             cls.ACTIVE.bindings.append(binding)
+            cls.ACTIVE.graph.add(binding)
 
     def invalidate(self):
         for b in self.bindings:
@@ -342,6 +813,399 @@ class BindingContext(object):
             c.invalidate()
 
 
+class BindingGraph(object):
+    """
+    Records which values each binding reads and writes (using
+    Accessor.identity()) so bindings can be run in dependency order, and so
+    that a change only re-runs the bindings downstream of it.
+
+    Bindings which feed each other in a loop - for example two TwoWayBindings
+    that share a value - form a cycle. Cycles are run once per update, in the
+    order the bindings were added, and reported in the 'cycles' field and to
+    the mGui Logger rather than updated until they settle.
+    """
+
+    def __init__(self):
+        self._endpoints = {}
+        self._readers = {}
+        self._serial = 0
+        self._order = None
+        self.cycles = []
+        self._reported = set()
+
+    def add(self, binding):
+        reads, writes = binding.reads(), binding.writes()
+        self._serial += 1
+        self._endpoints[binding] = (reads, writes, self._serial)
+        for identity in reads:
+            self._readers.setdefault(identity, []).append(binding)
+        self._order = None
+
+    def remove(self, binding):
+        endpoints = self._endpoints.pop(binding, None)
+        if endpoints is None:
+            return
+        for identity in endpoints[0]:
+            readers = self._readers[identity]
+            readers.remove(binding)
+            if not readers:
+                del self._readers[identity]
+        self._order = None
+
+    def __len__(self):
+        return len(self._endpoints)
+
+    def __contains__(self, binding):
+        return binding in self._endpoints
+
+    def ordered(self):
+        """
+        Returns all of the bindings in dependency order
+        """
+        if self._order is None:
+            roots = sorted(self._endpoints, key=lambda b: self._endpoints[b][2])
+            self._order = self._sorted(roots)
+        return self._order
+
+    def downstream(self, *identities):
+        """
+        Returns the bindings which read any of <identities>, and everything
+        downstream of them, in dependency order
+        """
+        roots = []
+        for identity in identities:
+            roots.extend(self._readers.get(identity, ()))
+        roots.sort(key=lambda b: self._endpoints[b][2])
+        return self._sorted(roots)
+
+    def _successors(self, binding):
+        for identity in self._endpoints[binding][1]:
+            for reader in self._readers.get(identity, ()):
+                if reader is not binding:
+                    yield reader
+
+    def _sorted(self, roots):
+        """
+        Topologically sort everything reachable from <roots> (Tarjan's
+        algorithm, without recursion so big graphs don't hit the recursion
+        limit). Strongly connected components are cycles.
+        """
+        index = {}
+        low = {}
+        stack = []
+        on_stack = set()
+        components = []
+        counter = 0
+
+        # visiting the roots in reverse means independent bindings come out in their original order
+        for root in reversed(roots):
+            if root in index:
+                continue
+            index[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack.add(root)
+            work = [(root, self._successors(root))]
+            while work:
+                node, successors = work[-1]
+                for child in successors:
+                    if child not in index:
+                        index[child] = low[child] = counter
+                        counter += 1
+                        stack.append(child)
+                        on_stack.add(child)
+                        work.append((child, self._successors(child)))
+                        break
+                    elif child in on_stack:
+                        low[node] = min(low[node], index[child])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        low[parent] = min(low[parent], low[node])
+                    if low[node] == index[node]:
+                        component = []
+                        while True:
+                            item = stack.pop()
+                            on_stack.discard(item)
+                            component.append(item)
+                            if item is node:
+                                break
+                        components.append(component)
+
+        result = []
+        for component in reversed(components):
+            if len(component) > 1:
+                component.sort(key=lambda b: self._endpoints[b][2])
+                self._report(component)
+            result.extend(component)
+        return result
+
+    def _report(self, component):
+        key = frozenset(id(b) for b in component)
+        if key in self._reported:
+            return
+        self._reported.add(key)
+        self.cycles.append(component)
+        Logger.warning("binding cycle: %s" % " -> ".join(str(b) for b in component))
+
+
+# ============================================================================================
+# Diagnostics. When they are off the only cost is a check of _DIAGNOSTICS in
+# Binding.__call__ and Accessor.pull / push
+
+_DIAGNOSTICS = None
+
+
+class BindingStats(object):
+    """
+    Call counts and timing for one binding. 'total' and 'max' time whole
+    calls; pull_time and push_time are the parts of that spent reading and
+    writing values (a push which triggers other bindings includes their time).
+    'reason' describes the most recent failure.
+    """
+    __slots__ = ('name', 'calls', 'failures', 'total', 'max', 'pulls', 'pull_time', 'pushes', 'push_time',
+                 'reason', 'error')
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.failures = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.pulls = 0
+        self.pull_time = 0.0
+        self.pushes = 0
+        self.push_time = 0.0
+        self.reason = None
+        self.error = None
+
+    def __str__(self):
+        result = "%s  calls: %i  total: %.4fs  max: %.4fs  pull: %.4fs (%i)  push: %.4fs (%i)" % (
+            self.name, self.calls, self.total, self.max, self.pull_time, self.pulls, self.push_time, self.pushes)
+        if self.failures:
+            result += "  failures: %i (%s)" % (self.failures, self.reason)
+        return result
+
+
+class BindingDiagnostics(object):
+    """
+    Collects BindingStats for every binding called while diagnostics are on.
+    Use profile_bindings() to turn it on and off:
+
+        diagnostics = profile_bindings(True)
+        # ... use the tool ...
+        profile_bindings(False)
+        for stats in diagnostics.slowest(10):
+            print stats
+
+    Stats are kept for as long as the bindings are alive. The stats of
+    bindings which a BindingContext or BindableObject removed because they
+    failed are kept in 'removed' (the most recent REMOVED_HISTORY of them).
+
+    Reads made on worker threads (see AsyncBinding) are not timed.
+    """
+
+    REMOVED_HISTORY = 100
+
+    def __init__(self):
+        self.stats = weakref.WeakKeyDictionary()
+        self.removed = deque(maxlen=self.REMOVED_HISTORY)
+        self._local = threading.local()
+
+    def stats_for(self, binding):
+        """
+        Returns the BindingStats for <binding>, creating them if needed
+        """
+        stats = self.stats.get(binding)
+        if stats is None:
+            stats = self.stats[binding] = BindingStats(str(binding))
+        return stats
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def call(self, binding, call):
+        """
+        Call <binding> using the function <call>, recording how long it takes
+        and whether it fails
+        """
+        stats = self.stats_for(binding)
+        stats.error = None
+        stack = self._stack()
+        stack.append(stats)
+        result = False
+        start = default_timer()
+        try:
+            result = call(binding)
+            return result
+        finally:
+            elapsed = default_timer() - start
+            stack.pop()
+            stats.calls += 1
+            stats.total += elapsed
+            if elapsed > stats.max:
+                stats.max = elapsed
+            if not result:
+                stats.failures += 1
+                stats.reason = stats.error or "source or target no longer exists"
+
+    def timed_pull(self, get, args, kwargs):
+        stack = getattr(self._local, 'stack', None)
+        if not stack:
+            return get(*args, **kwargs)
+        start = default_timer()
+        try:
+            return get(*args, **kwargs)
+        finally:
+            stats = stack[-1]
+            stats.pulls += 1
+            stats.pull_time += default_timer() - start
+
+    def timed_push(self, set_, args, kwargs):
+        stack = getattr(self._local, 'stack', None)
+        if not stack:
+            return set_(*args, **kwargs)
+        start = default_timer()
+        try:
+            return set_(*args, **kwargs)
+        finally:
+            stats = stack[-1]
+            stats.pushes += 1
+            stats.push_time += default_timer() - start
+
+    def failed(self, binding, error):
+        """
+        Record the exception which made <binding> fail
+        """
+        stats = self.stats_for(binding)
+        stats.error = "%s: %s" % (error.__class__.__name__, error)
+        if stats not in self._stack():
+            # failed outside of a call, eg. an AsyncBinding delivering a result
+            stats.failures += 1
+            stats.reason = stats.error
+
+    def note_removed(self, binding):
+        """
+        Record that <binding> was removed after failing
+        """
+        stats = self.stats.get(binding)
+        if stats is not None:
+            self.removed.append(stats)
+            Logger.warning("removed %s (%s)" % (stats.name, stats.reason))
+
+    def report(self, sort='total', limit=None):
+        """
+        Returns a list of BindingStats sorted (descending) by <sort>, which can
+        be any BindingStats number: 'total', 'max', 'calls', 'pull_time',
+        'push_time', 'failures' and so on.  If <limit> is supplied, only that
+        many are returned.
+        """
+        result = sorted(self.stats.values(), key=lambda s: getattr(s, sort), reverse=True)
+        return result[:limit] if limit else result
+
+    def slowest(self, limit=None):
+        """
+        Returns BindingStats for the bindings which have taken the most time
+        """
+        return self.report('total', limit)
+
+    def busiest(self, limit=None):
+        """
+        Returns BindingStats for the bindings which have been called most often
+        """
+        return self.report('calls', limit)
+
+    def dump(self, sort='total', limit=20):
+        """
+        Writes the report, and the bindings removed after failing, to
+        mGui.debugging.Logger and returns it as a string. It is logged as a
+        warning so it shows with the default log filter.
+        """
+        lines = ["binding profile (by %s)" % sort]
+        lines.extend(str(stats) for stats in self.report(sort, limit))
+        if self.removed:
+            lines.append("removed bindings")
+            for stats in self.removed:
+                lines.append("    %s: %s" % (stats.name, stats.reason))
+        text = "\n".join(lines)
+        Logger.warning(text)
+        return text
+
+    def clear(self):
+        self.stats.clear()
+        self.removed.clear()
+
+
+DIAGNOSTICS = BindingDiagnostics()
+
+
+def profile_bindings(state=True):
+    """
+    Turn binding diagnostics on or off. Returns the BindingDiagnostics, which
+    keeps its stats after diagnostics are turned off
+    """
+    global _DIAGNOSTICS
+    _DIAGNOSTICS = DIAGNOSTICS if state else None
+    return DIAGNOSTICS
+
+
+def _diagnosed(call):
+    """
+    decorator for Binding.__call__ methods, which reports calls to the active
+    BindingDiagnostics
+    """
+
+    @wraps(call)
+    def diagnosed_call(self):
+        if _DIAGNOSTICS is None:
+            return call(self)
+        return _DIAGNOSTICS.call(self, call)
+
+    return diagnosed_call
+
+
+def _note_failure(binding):
+    """
+    report the exception being handled to the active BindingDiagnostics
+    """
+    if _DIAGNOSTICS is not None:
+        _DIAGNOSTICS.failed(binding, sys.exc_info()[1])
+
+
+# ============================================================================================
+
+def _bind_trigger(accessor):
+    """
+    Returns the Event named by the _BIND_TRIGGER of <accessor>'s target.  If
+    the trigger has per-property events (see observable.ObservableObject)
+    returns the event for the accessor's field, so the binding only updates
+    when that property changes.
+    """
+    trigger = getattr(accessor.target, accessor.target._BIND_TRIGGER)
+    if hasattr(trigger, 'for_property'):
+        return trigger.for_property(accessor.field_name)
+    return trigger
+
+
+def _caches_by_default(accessor):
+    """
+    True if <accessor> reads a property flagged with CACHE_BINDINGS (eg, an
+    observable.computed)
+    """
+    field = getattr(accessor, 'field_name', None)
+    if not isinstance(field, basestring):
+        return None
+    try:
+        prop = getattr(accessor.target.__class__, field, None)
+    except ReferenceError:
+        return None
+    return getattr(prop, 'CACHE_BINDINGS', None)
+
+
 def passthru(arg):
     """
     default nullop for un-translated bindings
@@ -349,11 +1213,72 @@ def passthru(arg):
     return arg
 
 
+def hash_key(value):
+    """
+    change key for bindings with large sequence values (see Binding). Keys
+    compare by length and hash first, so most changes are found without an
+    element-by-element comparison; the contents are only compared when the
+    hashes match, since different values can share a hash. Values which can't
+    be hashed get a key which matches nothing, so they are always pushed
+    """
+    try:
+        if isinstance(value, (list, tuple)):
+            contents = tuple(value)
+            return len(contents), hash(contents), contents
+        return hash(value), value
+    except TypeError:
+        return object()
+
+
+def _same(old, new):
+    """
+    True only if <old> and <new> are certainly equal. Values whose comparison
+    raises or does not produce a plain bool (eg numpy arrays) count as changed
+    """
+    if old is new:
+        return True
+    try:
+        result = old == new
+    except Exception:
+        return False
+    return result is True
+
+
+_NOT_CACHED = object()
+
+
 class Binding(object):
     """
     Encapsulates a data binding (get accessor and  a set accessor)
+
+    If the binding is created with the 'cache' keyword it remembers the last
+    value it pushed and won't push again until the value changes:
+
+        Binding(src, tgt, cache=True)   # compare values with ==
+        Binding(src, tgt, cache=hash_key)   # compare values by hash
+
+    'cache' can be any single argument callable which turns a value into a
+    comparison key. The key should not share mutable state with the value -
+    a list which is changed in place will compare equal to itself.  The
+    'pushed' field counts the pushes which succeeded and 'skipped' counts the
+    updates which didn't need to push.
+
+    Bindings created with live=True (or all bindings, if LIVE_UPDATES is
+    True) subscribe to sources which can report their own changes, such as
+    maya attributes, and update themselves when the source changes:
+
+        'pCube1.tx' > bind(live=True) > label.bind.label
+
+    Each watched maya node gets an API callback, so this is off by default.
+    The subscription is released when the binding is invalidated.
+
+    Bindings to a property which caches its own value (see
+    observable.computed) use cache=True unless told otherwise.
     """
 
+    __slots__ = ('getter', 'setter', 'translator', 'change_key', '_last_key', 'pushed', 'skipped', '_updating',
+                 '_subscriptions', '__weakref__')
+
     def __init__(self, source, target, **kwargs):
 
         if not source:
@@ -367,29 +1292,75 @@ class Binding(object):
         self.translator = kwargs.get('translator', passthru)
         assert callable(self.translator), 'Translator must be a single argument callable'
 
+        cache = kwargs.get('cache', _caches_by_default(source))
+        self.change_key = passthru if cache is True else (cache or None)
+        assert self.change_key is None or callable(self.change_key), 'cache must be True or a single argument callable'
+        self._last_key = _NOT_CACHED
+        self.pushed = 0
+        self.skipped = 0
+
         BindingContext.add(self)
         if hasattr(self.getter.target, 'bindings'):
             self.getter.target.bindings.append(self)
             if hasattr(self.getter.target, "_BIND_TRIGGER"):
-                cb = getattr(self.getter.target, self.getter.target._BIND_TRIGGER)
+                cb = _bind_trigger(self.getter)
                 cb += self.proxy_update
 
         if hasattr(self.setter.target, 'bindings'):
             self.setter.target.bindings.append(self)
 
+        self._updating = False
+        self._subscriptions = []
+        if kwargs.get('live', LIVE_UPDATES):
+            self._subscriptions = [a for a in self.sources() if self._subscribe(a)]
+
+    def sources(self):
+        """
+        The accessors this binding reads from
+        """
+        return self.getter,
+
+    def _subscribe(self, accessor):
+        try:
+            return accessor.subscribe(self.proxy_update)
+        except RuntimeError:
+            return False
+
     def invalidate(self):
         """
         Mark the current binding as invalid. Typically it will be deleted on the next update
         """
+        for accessor in self._subscriptions:
+            try:
+                accessor.unsubscribe(self.proxy_update)
+            except RuntimeError:
+                pass
+        self._subscriptions = []
         self.getter = None
         self.setter = None
 
+    def reads(self):
+        """
+        Returns the identities of the values this binding reads (see Accessor.identity)
+        """
+        return self.getter.identity(),
+
+    def writes(self):
+        """
+        Returns the identities of the values this binding writes (see Accessor.identity)
+        """
+        return self.setter.identity(),
+
+    def __str__(self):
+        return "<%s %s -> %s>" % (self.__class__.__name__, self.getter, self.setter)
+
     def __nonzero__(self):
         if self.setter:
             if self.getter:
                 return True
         return False
 
+    @_diagnosed
     def __call__(self):
         """
         The bindings call method gets the value in the Getter and applies it to
@@ -409,11 +1380,10 @@ class Binding(object):
             if self.__nonzero__() == False: return False
 
             try:
-                val = self.getter.pull()
-                self.setter.push(self.translator(val))
-                return True
+                return self._push(self.getter.pull())
 
             except (ReferenceError, BindingError, RuntimeError):
+                _note_failure(self)
                 if BREAK_ON_BIND_FAILURE:
                     raise BindingError("Bind failure: %s" % str(sys.exc_info()[1]))
                 return False
@@ -422,8 +1392,36 @@ class Binding(object):
         # this causes a hang
         # return utils.executeInMainThreadWithResult(safe_binding)
 
+    def _push(self, val):
+        if self.change_key is None:
+            if self.setter.push(self.translator(val)):
+                self.pushed += 1
+            return True
+
+        key = self.change_key(val)
+        if _same(key, self._last_key):
+            self.skipped += 1
+            return True
+        if self.setter.push(self.translator(val)):
+            self._last_key = key
+            self.pushed += 1
+        return True
+
     def proxy_update(self, *args, **kwargs):
-        self.__call__()
+        # pushing a value can trigger change notifications that lead back here
+        if self._updating:
+            return
+        self._updating = True
+        try:
+            self.__call__()
+        finally:
+            self._updating = False
+
+    def reset_cache(self):
+        """
+        Forget the last pushed value, so the next update will push regardless
+        """
+        self._last_key = _NOT_CACHED
 
 
 class TwoWayBinding(Binding):
@@ -432,21 +1430,45 @@ class TwoWayBinding(Binding):
     getter and the setter, and then pushes the value which changed to the value
     which did not. If both values have changed or neither has changed, the
     'getter' value wins.
+
+    If either end provides change tokens (see Accessor.change_token) the
+    binding compares tokens for that end instead of pulling and comparing
+    values, so an end is only pulled when it has to be pushed to the other.
+    When at least one end has tokens and neither end changed, nothing is
+    pushed.
     """
 
+    __slots__ = ('_last_getter_value', '_last_setter_value', '_last_getter_token', '_last_setter_token')
+
     def __init__(self, source, target, *extra, **kwargs):
         super(TwoWayBinding, self).__init__(source, target, *extra, **kwargs)
         if hasattr(self.setter.target, "_BIND_TRIGGER"):
-            cb = getattr(self.setter.target, self.setter.target._BIND_TRIGGER)
+            cb = _bind_trigger(self.setter)
             cb += self.proxy_update
         self._last_getter_value = self.getter.pull()
         self._last_setter_value = self.setter.pull()
+        self._last_getter_token = self.getter.change_token()
+        self._last_setter_token = self.setter.change_token()
+
+    def reads(self):
+        return self.getter.identity(), self.setter.identity()
 
+    writes = reads
+
+    def sources(self):
+        return self.getter, self.setter
+
+    @_diagnosed
     def __call__(self):
         if self.__nonzero__() == False:
             return False
 
         try:
+            getter_token = self.getter.change_token()
+            setter_token = self.setter.change_token()
+            if getter_token is not None or setter_token is not None:
+                return self._update_changed(getter_token, setter_token)
+
             getter_val = self.getter.pull()
             new_getter = getter_val != self._last_getter_value
             setter_val = self.setter.pull()
@@ -473,10 +1495,231 @@ class TwoWayBinding(Binding):
             return True
 
         except (ReferenceError, BindingError, RuntimeError):
+            _note_failure(self)
+            if BREAK_ON_BIND_FAILURE:
+                raise BindingError("Bind failure: %s" % str(sys.exc_info()[1]))
+            return False
+
+    def _update_changed(self, getter_token, setter_token):
+        """
+        Update using change tokens where they are available, and value
+        comparison for an end which has none
+        """
+        getter_val = setter_val = _NOT_CACHED
+        if getter_token is None:
+            getter_val = self.getter.pull()
+            new_getter = not _same(getter_val, self._last_getter_value)
+        else:
+            new_getter = getter_token != self._last_getter_token
+
+        if setter_token is None:
+            setter_val = self.setter.pull()
+            new_setter = not _same(setter_val, self._last_setter_value)
+        else:
+            new_setter = setter_token != self._last_setter_token
+
+        if new_getter:
+            # 'getter' wins if both have changed
+            if getter_val is _NOT_CACHED:
+                getter_val = self.getter.pull()
+            if self.setter.push(self.translator(getter_val)):
+                self.pushed += 1
+            self._last_getter_value = self._last_setter_value = getter_val
+        elif new_setter:
+            if setter_val is _NOT_CACHED:
+                setter_val = self.setter.pull()
+            if self.getter.push(self.translator(setter_val)):
+                self.pushed += 1
+            self._last_getter_value = self._last_setter_value = setter_val
+        else:
+            self.skipped += 1
+            return True
+
+        # pushing changes the token of the end which was pushed to
+        self._last_getter_token = self.getter.change_token()
+        self._last_setter_token = self.setter.change_token()
+        return True
+
+
+class AsyncBinding(Binding):
+    """
+    A binding whose getter runs on the worker thread pool (see
+    events.worker_pool), for sources which are slow to read such as
+    directory scans or database queries. Calling the binding starts a read and
+    returns at once; the result is pushed to the target on the main thread
+    when it arrives.
+
+    Until then the target keeps its previous value, or shows <placeholder> if
+    one is supplied:
+
+        listing = AsyncBinding(folder_accessor, list_accessor, placeholder=('loading...',))
+
+    If the binding is called again before a read finishes, the older read is
+    cancelled (or its result is discarded if it has already started), so the
+    target never goes back to a stale value.  'dropped' counts discarded reads.
+
+    The getter must not use maya.cmds or pymel, so maya attributes can't be
+    the source of an AsyncBinding.
+    """
+
+    __slots__ = ('placeholder', 'dropped', '_request', '_future')
+
+    def __init__(self, source, target, **kwargs):
+        if isinstance(source, (PyNodeAccessor, PyAttributeAccessor, CmdsAccessor)):
+            raise BindingError("maya values can't be read off the main thread")
+        self.placeholder = kwargs.pop('placeholder', _NOT_CACHED)
+        self.dropped = 0
+        self._request = 0
+        self._future = None
+        super(AsyncBinding, self).__init__(source, target, **kwargs)
+
+    @property
+    def pending(self):
+        """
+        True if a read is in progress
+        """
+        return self._future is not None
+
+    @_diagnosed
+    def __call__(self):
+        if self.__nonzero__() == False: return False
+
+        self._request += 1
+        if self._future is not None:
+            self._future.cancel()
+
+        if self.placeholder is not _NOT_CACHED:
+            try:
+                self.setter.push(self.placeholder)
+            except (ReferenceError, BindingError, RuntimeError):
+                _note_failure(self)
+                if BREAK_ON_BIND_FAILURE:
+                    raise BindingError("Bind failure: %s" % str(sys.exc_info()[1]))
+                return False
+            self._last_key = _NOT_CACHED
+
+        self._future = worker_pool().submit(self.getter.pull)
+        self._future.add_done_callback(partial(self._finished, self._request))
+        return True
+
+    def _finished(self, request, future):
+        # runs on the worker thread
+        maya.utils.executeDeferred(partial(self._deliver, request, future))
+
+    def _deliver(self, request, future):
+        if request != self._request or future.cancelled():
+            self.dropped += 1
+            return
+        self._future = None
+        if self.__nonzero__() == False:
+            return
+
+        try:
+            self._push(future.result())
+        except Exception as error:
+            # there's no caller to report to, so the binding is always marked
+            # failed; the binding context will drop it on the next update
+            _note_failure(self)
+            self.invalidate()
+            if isinstance(error, (ReferenceError, BindingError, RuntimeError)):
+                if BREAK_ON_BIND_FAILURE:
+                    raise BindingError("Bind failure: %s" % str(error))
+            elif BREAK_ON_ACCESS_FAILURE:
+                # eg, an IOError from a directory scan
+                raise
+
+    def invalidate(self):
+        if self._future is not None:
+            self._future.cancel()
+            self._future = None
+        super(AsyncBinding, self).invalidate()
+
+
+class FanOutBinding(Binding):
+    """
+    A binding which pushes one source value to many targets - for example a
+    slider driving the same attribute on every selected node.
+
+    All of the targets are written together inside a single undo chunk, with
+    viewport refresh suspended until they are done, so a change is one undo
+    step and one redraw no matter how many targets there are.
+
+    If <hz> is supplied, pushes are throttled to that many per second (see
+    events.ThrottledEvent), which keeps drags responsive; the final value is
+    always pushed.
+
+        fan_out(slider.bind.value, *[(n, 'tx') for n in selected], hz=20)
+
+    With 'cache' (see Binding) the targets are only written when the source
+    value changes.
+    """
+
+    __slots__ = ('setters', 'undo_name', '_throttle')
+
+    def __init__(self, source, targets, **kwargs):
+        targets = list(targets)
+        if not targets:
+            raise BindingError("fan out binding needs at least one target")
+        hz = kwargs.pop('hz', None)
+        self.setters = targets
+        self.undo_name = kwargs.pop('undo_name', 'mGui fan out')
+        self._throttle = None
+        super(FanOutBinding, self).__init__(source, targets[0], **kwargs)
+        for target in targets[1:]:
+            if hasattr(target.target, 'bindings'):
+                target.target.bindings.append(self)
+        if hz:
+            self._throttle = ThrottledEvent(hz=hz)
+            self._throttle += self._push_all
+
+    def writes(self):
+        return tuple(s.identity() for s in self.setters)
+
+    def invalidate(self):
+        super(FanOutBinding, self).invalidate()
+        self.setters = []
+
+    def __nonzero__(self):
+        return bool(self.getter) and any(self.setters)
+
+    @_diagnosed
+    def __call__(self):
+        if not self.__nonzero__():
+            return False
+        try:
+            value = self.getter.pull()
+            if self.change_key is not None:
+                key = self.change_key(value)
+                if _same(key, self._last_key):
+                    self.skipped += 1
+                    return True
+            value = self.translator(value)
+            if self._throttle is not None:
+                self._throttle(value)
+            else:
+                self._push_all(value)
+            if self.change_key is not None:
+                self._last_key = key
+            return True
+
+        except (ReferenceError, BindingError, RuntimeError):
+            _note_failure(self)
             if BREAK_ON_BIND_FAILURE:
                 raise BindingError("Bind failure: %s" % str(sys.exc_info()[1]))
             return False
 
+    def _push_all(self, value, *_, **__):
+        cmds.undoInfo(openChunk=True, chunkName=self.undo_name)
+        cmds.refresh(suspend=True)
+        try:
+            for setter in self.setters:
+                if setter:
+                    setter.push(value)
+        finally:
+            cmds.refresh(suspend=False)
+            cmds.undoInfo(closeChunk=True)
+        self.pushed += 1
+
 
 class BindingExpression(object):
     """
@@ -494,7 +1737,16 @@ class BindingExpression(object):
     The first two are equivalent except for the direction of the binding, the
     third produces as TwoWayBinding. 'Translator' is a single argument callable
     that will be used by the binding to convert the results. If not supplied, the
-    binding will pass the values unchanged.
+    binding will pass the values unchanged. Any keywords are passed along to the
+    binding, so
+
+         object-and-property > BindingExpression(cache=True) > object-and-property
+
+    creates a Binding which only pushes changed values, and
+
+         object-and-property > BindingExpression(background=True) > object-and-property
+
+    creates an AsyncBinding, which reads its source on a worker thread.
 
     The object-and-property items to either side of the BindingExpression can
     be any one of:
@@ -546,11 +1798,12 @@ class BindingExpression(object):
             return self._binding()
         return self
 
-    def __init__(self, translator=passthru):
+    def __init__(self, translator=passthru, **options):
         self.left = None
         self.right = None
         self.isTwoWay = False
         self.translator = translator
+        self.options = options
 
     def __or__(self, other):
         self.right = self._flatten(other, target=False)
@@ -596,9 +1849,15 @@ class BindingExpression(object):
         return get_accessor(other)
 
     def _binding(self):
+        options = dict(self.options)
+        background = options.pop('background', False)
         if self.isTwoWay:
-            return TwoWayBinding(self.left, self.right, translator=self.translator)
-        return Binding(self.left, self.right, translator=self.translator)
+            if background:
+                raise BindingError("two way bindings can't run in the background")
+            return TwoWayBinding(self.left, self.right, translator=self.translator, **options)
+        if background:
+            return AsyncBinding(self.left, self.right, translator=self.translator, **options)
+        return Binding(self.left, self.right, translator=self.translator, **options)
 
 
 bind = BindingExpression
@@ -607,6 +1866,16 @@ This is a cheap alias to make the typing less onerous
 '''
 
 
+def fan_out(source, *targets, **kwargs):
+    """
+    Creates a FanOutBinding from <source> to all of <targets>. The source and
+    targets can be anything that works in a binding expression. Keywords are
+    passed to the FanOutBinding.
+    """
+    flatten = BindingExpression()._flatten
+    return FanOutBinding(flatten(source, target=False), [flatten(t, target=True) for t in targets], **kwargs)
+
+
 # ============================================================================================
 
 class Bindable(object):
@@ -716,7 +1985,7 @@ class BindableObject(Bindable):
 
     _BIND_SRC = None
     _BIND_TGT = None
-    _BINDINGS = []
+    _BINDINGS = BindingRegistry()
 
     bind_source = LateBoundProperty("bind_source", "_BIND_SRC")
     bind_target = LateBoundProperty("bind_target", "_BIND_TGT")
@@ -731,12 +2000,14 @@ class BindableObject(Bindable):
     def update_bindings(self):
         delenda = [i for i in self.bindings if not i()]
         for d in delenda:
+            if _DIAGNOSTICS is not None:
+                _DIAGNOSTICS.note_removed(d)
             self.bindings.remove(d)
 
     def clear_bindings(self):
         for item in self.bindings:
             item.invalidate()
-        self.bindings[:] = []
+        self.bindings.clear()
 
 
 class BindProxy(Bindable):
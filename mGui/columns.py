@@ -0,0 +1,567 @@
+"""
+columns.py
+
+A bindable collection of homogeneous records (asset metadata and the like)
+which stores each field as a NumPy array, so that it can be filtered with a
+vectorized expression instead of calling a python function for every item:
+
+    assets = ColumnCollection('name', 'type', ('size', float), synchronous=True)
+    assets.extend(scan_assets())     # dictionaries, or sequences in field order
+    assets.update_filter("size > 1e6 & type == 'rig'")
+
+    gui_list.bind.collection < bind() < assets
+    label.bind.label < bind() < assets.bind.viewCount
+
+Filters are either strings like the one above or expressions built from
+Columns:
+
+    size, kind = Column('size'), Column('type')
+    assets.update_filter((size > 1e6) & (kind == 'rig'))
+
+In a filter string & (and), | (or) and ~ (not) bind more loosely than
+comparisons and arithmetic, so the string above needs no parentheses. In
+python code they bind more tightly, hence the parentheses in the second
+example.
+
+NumPy is only needed by ColumnCollection; nothing else in mGui imports this
+module.
+"""
+import ast
+import operator
+import tokenize
+from collections import Sequence, deque, namedtuple
+from functools import partial
+from itertools import izip
+
+from mGui.bindings import BindableObject
+from mGui.events import MayaEvent, Event
+from mGui.observable import CollectionChange, Contents, _TRACKING, _record
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def _compared(op):
+    """
+    wrap the comparison <op> so that strings compared with a datetime64 column
+    are read as dates
+    """
+
+    def compare(left, right):
+        if isinstance(right, basestring) and getattr(left, 'dtype', None) is not None and left.dtype.kind == 'M':
+            right = numpy.datetime64(right)
+        elif isinstance(left, basestring) and getattr(right, 'dtype', None) is not None and right.dtype.kind == 'M':
+            left = numpy.datetime64(left)
+        return op(left, right)
+
+    return compare
+
+
+def _binary(op, symbol, reflected=False):
+    def method(self, other):
+        other = _operand(other)
+        left, right = (other, self) if reflected else (self, other)
+        return Expression(lambda columns: op(left.evaluate(columns), right.evaluate(columns)),
+                          '(%s %s %s)' % (left.text, symbol, right.text))
+
+    return method
+
+
+class Expression(object):
+    """
+    A vectorized calculation on the columns of a ColumnCollection. evaluate()
+    takes a dictionary of column arrays and returns an array with a value for
+    every row.
+
+    Expressions combine with the comparison and arithmetic operators, and with
+    & (and), | (or) and ~ (not).
+    """
+
+    def __init__(self, fn, text):
+        self._fn = fn
+        self.text = text
+
+    def evaluate(self, columns):
+        return self._fn(columns)
+
+    __lt__ = _binary(_compared(operator.lt), '<')
+    __le__ = _binary(_compared(operator.le), '<=')
+    __gt__ = _binary(_compared(operator.gt), '>')
+    __ge__ = _binary(_compared(operator.ge), '>=')
+    __eq__ = _binary(_compared(operator.eq), '==')
+    __ne__ = _binary(_compared(operator.ne), '!=')
+    __and__ = _binary(operator.and_, '&')
+    __or__ = _binary(operator.or_, '|')
+    __add__ = _binary(operator.add, '+')
+    __sub__ = _binary(operator.sub, '-')
+    __mul__ = _binary(operator.mul, '*')
+    __div__ = __truediv__ = _binary(operator.truediv, '/')
+    __rand__ = _binary(operator.and_, '&', True)
+    __ror__ = _binary(operator.or_, '|', True)
+    __radd__ = _binary(operator.add, '+', True)
+    __rsub__ = _binary(operator.sub, '-', True)
+    __rmul__ = _binary(operator.mul, '*', True)
+    __rdiv__ = __rtruediv__ = _binary(operator.truediv, '/', True)
+    __hash__ = object.__hash__
+
+    def __invert__(self):
+        return Expression(lambda columns: ~self.evaluate(columns), '~%s' % self.text)
+
+    def __neg__(self):
+        return Expression(lambda columns: -self.evaluate(columns), '-%s' % self.text)
+
+    def __nonzero__(self):
+        raise TypeError("use & | ~ rather than 'and', 'or' and 'not' to combine expressions")
+
+    def __repr__(self):
+        return '<Expression %s>' % self.text
+
+
+class Column(Expression):
+    """
+    The values of the field <name>
+    """
+
+    def __init__(self, name):
+        super(Column, self).__init__(operator.itemgetter(name), name)
+        self.name = name
+
+
+def _operand(value):
+    if isinstance(value, Expression):
+        return value
+    return Expression(lambda columns: value, repr(value))
+
+
+_CONSTANTS = {'True': True, 'False': False, 'None': None}
+_COMPARISONS = {'<': operator.lt, '<=': operator.le, '>': operator.gt, '>=': operator.ge,
+                '==': operator.eq, '!=': operator.ne}
+
+
+class _Parser(object):
+    """
+    Turns a filter string into an Expression:
+
+        either := both ('|' both)*
+        both   := test ('&' test)*
+        test   := '~' test | sum [comparison sum]
+        sum    := term (('+' | '-') term)*
+        term   := unary (('*' | '/') unary)*
+        unary  := '-' unary | name | number | string | '(' either ')'
+    """
+
+    def __init__(self, text):
+        self.text = text
+        readline = partial(next, iter([text]), '')
+        skip = (tokenize.NL, tokenize.NEWLINE, tokenize.COMMENT, tokenize.ENDMARKER)
+        try:
+            self.tokens = [(t[0], t[1]) for t in tokenize.generate_tokens(readline) if t[0] not in skip]
+        except tokenize.TokenError:
+            self.fail()
+        self.position = 0
+
+    def fail(self):
+        raise ValueError("can't parse filter expression '%s'" % self.text)
+
+    def peek(self):
+        if self.position < len(self.tokens):
+            return self.tokens[self.position][1]
+
+    def take(self):
+        if self.position >= len(self.tokens):
+            self.fail()
+        self.position += 1
+        return self.tokens[self.position - 1]
+
+    def parse(self):
+        result = self.either()
+        if self.position != len(self.tokens):
+            self.fail()
+        return result
+
+    def either(self):
+        result = self.both()
+        while self.peek() == '|':
+            self.take()
+            result = result | self.both()
+        return result
+
+    def both(self):
+        result = self.test()
+        while self.peek() == '&':
+            self.take()
+            result = result & self.test()
+        return result
+
+    def test(self):
+        if self.peek() == '~':
+            self.take()
+            return ~self.test()
+        result = self.sum()
+        op = _COMPARISONS.get(self.peek())
+        if op is not None:
+            self.take()
+            result = op(result, self.sum())
+        return result
+
+    def sum(self):
+        result = self.term()
+        while self.peek() in ('+', '-'):
+            if self.take()[1] == '+':
+                result = result + self.term()
+            else:
+                result = result - self.term()
+        return result
+
+    def term(self):
+        result = self.unary()
+        while self.peek() in ('*', '/'):
+            if self.take()[1] == '*':
+                result = result * self.unary()
+            else:
+                result = result / self.unary()
+        return result
+
+    def unary(self):
+        kind, text = self.take()
+        if text == '-':
+            return -self.unary()
+        if text == '(':
+            result = self.either()
+            if self.take()[1] != ')':
+                self.fail()
+            return result
+        if kind == tokenize.NAME:
+            if text in _CONSTANTS:
+                return _operand(_CONSTANTS[text])
+            return Column(text)
+        if kind in (tokenize.NUMBER, tokenize.STRING):
+            return _operand(ast.literal_eval(text))
+        self.fail()
+
+
+def parse(text):
+    """
+    Returns the Expression for the filter string <text> (see the module notes).
+    Raises a ValueError if it can't be parsed.
+    """
+    return _operand(_Parser(text).parse())
+
+
+class ColumnCollection(Sequence, BindableObject):
+    """
+    A collection of records with the fields named in the constructor. Each
+    field can be a name, or a (name, dtype) pair for a column which should
+    hold numbers rather than python objects:
+
+        assets = ColumnCollection('name', ('type', 'S16'), ('size', float), ('date', 'datetime64[s]'))
+
+    Fixed width string columns (like 'type' above) are much faster to filter
+    than columns of python objects, but truncate longer values. Strings
+    compared with a datetime64 column in a filter are read as dates.
+
+    Records are added as dictionaries or as sequences in field order, and come
+    out as namedtuples (the 'Record' attribute is the namedtuple class).
+
+    Like ViewCollection, the bindable 'view' holds the records which pass the
+    current filter (see update_filter) and 'viewCount' is their number. When
+    records are added, changed or removed only those records are tested, and
+    the view is a Contents tuple with change records for bound consumers.
+    Indexing, iterating and len() use the view; 'count' is the number of
+    records whether or not they pass the filter.
+
+    The class emits events when it is updated:
+
+       * onCollectionChanged(changes = [...], collection = self) for all changes
+       * onViewChanged(collection = self) when the filter changes
+    """
+    _BIND_SRC = 'view'
+    _version = 0
+    HISTORY = 32
+
+    def __init__(self, *fields, **kwargs):
+        if numpy is None:
+            raise ImportError("ColumnCollection requires numpy")
+        if not fields:
+            raise ValueError("a ColumnCollection needs at least one field")
+        synchronous = kwargs.pop('synchronous', False)
+        self._names = []
+        self._columns = {}
+        for field in fields:
+            name, dtype = (field, object) if isinstance(field, basestring) else field
+            self._names.append(name)
+            self._columns[name] = numpy.empty(0, dtype)
+        self.Record = namedtuple('Record', self._names)
+        self._mask = numpy.empty(0, bool)
+        self._size = 0
+        self._filter = None
+        self._view_count = 0
+        self._view_cache = None
+        self._history = deque(maxlen=self.HISTORY)
+        event = Event if synchronous else MayaEvent
+        self.onCollectionChanged = event(collection=self)
+        self.onViewChanged = event(collection=self)
+
+    def _row(self, record):
+        if hasattr(record, 'keys'):
+            return [record[name] for name in self._names]
+        row = list(record)
+        if len(row) != len(self._names):
+            raise ValueError("expected %i fields, got %r" % (len(self._names), record))
+        return row
+
+    def _reserve(self, count):
+        """
+        make room for <count> more rows, growing the arrays geometrically so
+        appending stays cheap
+        """
+        capacity = len(self._mask)
+        if self._size + count <= capacity:
+            return
+        capacity = max(64, capacity * 2, self._size + count)
+        for name, column in self._columns.items():
+            grown = numpy.empty(capacity, column.dtype)
+            grown[:self._size] = column[:self._size]
+            self._columns[name] = grown
+        grown = numpy.zeros(capacity, bool)
+        grown[:self._size] = self._mask[:self._size]
+        self._mask = grown
+
+    def _evaluate(self, start, end):
+        """
+        test rows <start> to <end> against the filter, returning a boolean array
+        """
+        if self._filter is None:
+            return numpy.ones(end - start, bool)
+        columns = dict((name, column[start:end]) for name, column in self._columns.items())
+        result = numpy.asarray(self._filter.evaluate(columns), dtype=bool)
+        return numpy.broadcast_to(result, (end - start,))
+
+    def _records(self, indices):
+        values = [self._columns[name][indices].tolist() for name in self._names]
+        return [self.Record._make(row) for row in izip(*values)]
+
+    def _view_index(self, index):
+        if index >= self._size:
+            return self._view_count
+        return int(numpy.count_nonzero(self._mask[:index]))
+
+    def _changed(self, changes, view_changes, **flags):
+        self._version += 1
+        self._history.append((self._version - 1, self._version, view_changes))
+        self._view_cache = None
+        self.update_bindings()
+        self.onCollectionChanged(changes=changes, **flags)
+
+    def insert(self, index, *records):
+        """
+        Add <records> at position <index>
+        """
+        rows = [self._row(r) for r in records]
+        if not rows:
+            return
+        count = len(rows)
+        if index < 0:
+            index += self._size
+        index = max(0, min(index, self._size))
+        at = self._view_index(index)
+
+        self._reserve(count)
+        end = self._size
+        for name, values in izip(self._names, izip(*rows)):
+            column = self._columns[name]
+            column[index + count:end + count] = column[index:end]
+            column[index:index + count] = values
+        self._mask[index + count:end + count] = self._mask[index:end]
+        self._size += count
+
+        passed = self._evaluate(index, index + count)
+        self._mask[index:index + count] = passed
+        added = self._records(index + numpy.flatnonzero(passed))
+        self._view_count += len(added)
+
+        changes = [CollectionChange(CollectionChange.INSERT, index, self._records(slice(index, index + count)))]
+        view_changes = [CollectionChange(CollectionChange.INSERT, at, added)] if added else []
+        self._changed(changes, view_changes, added=True)
+
+    def append(self, record):
+        self.insert(self._size, record)
+
+    def extend(self, records):
+        """
+        Add all of <records>, with one notification
+        """
+        self.insert(self._size, *records)
+
+    def update(self, index, **values):
+        """
+        Change some fields of the record at <index>:
+
+            assets.update(12, size=2e6)
+        """
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("record index out of range")
+        unknown = set(values) - set(self._names)
+        if unknown:
+            raise ValueError("unknown fields: %s" % ', '.join(sorted(unknown)))
+
+        old = self._records([index])[0]
+        for name, value in values.items():
+            self._columns[name][index] = value
+        record = self._records([index])[0]
+        was = self._mask[index]
+        now = self._mask[index] = self._evaluate(index, index + 1)[0]
+        self._view_count += int(now) - int(was)
+
+        at = self._view_index(index)
+        view_changes = []
+        if was and now:
+            view_changes.append(CollectionChange(CollectionChange.REPLACE, at, (record,), (old,)))
+        elif now:
+            view_changes.append(CollectionChange(CollectionChange.INSERT, at, (record,)))
+        elif was:
+            view_changes.append(CollectionChange(CollectionChange.REMOVE, at, (old,)))
+        self._changed([CollectionChange(CollectionChange.REPLACE, index, (record,), (old,))], view_changes,
+                      added=True)
+
+    def pop(self, index=-1):
+        """
+        Remove and return the record at <index>
+        """
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("record index out of range")
+        record = self._records([index])[0]
+        was = self._mask[index]
+        at = self._view_index(index)
+
+        end = self._size
+        for column in self._columns.values():
+            column[index:end - 1] = column[index + 1:end]
+            if column.dtype == object:
+                column[end - 1] = None
+        self._mask[index:end - 1] = self._mask[index + 1:end]
+        self._size -= 1
+        self._view_count -= int(was)
+
+        view_changes = [CollectionChange(CollectionChange.REMOVE, at, (record,))] if was else []
+        self._changed([CollectionChange(CollectionChange.REMOVE, index, (record,))], view_changes, removed=True)
+        return record
+
+    def clear(self):
+        """
+        Remove all of the records
+        """
+        removed = self._records(slice(0, self._size))
+        for name, column in self._columns.items():
+            self._columns[name] = numpy.empty(0, column.dtype)
+        self._mask = numpy.empty(0, bool)
+        self._size = 0
+        self._view_count = 0
+        self._changed([CollectionChange(CollectionChange.REMOVE, 0, removed)],
+                      [CollectionChange(CollectionChange.RESET, 0, ())], cleared=True)
+
+    def update_filter(self, expression):
+        """
+        Change the filter to <expression>, a filter string or an Expression (or
+        None to show everything). This will trigger a ViewChanged event
+        """
+        if isinstance(expression, basestring):
+            expression = parse(expression)
+        elif expression is not None and not isinstance(expression, Expression):
+            raise ValueError("filters must be strings or Expressions, not %r" % expression)
+
+        previous, self._filter = self._filter, expression
+        try:
+            self._mask[:self._size] = self._evaluate(0, self._size)
+        except KeyError as e:
+            self._filter = previous
+            raise ValueError("unknown field %s in filter" % e)
+        self._view_count = int(numpy.count_nonzero(self._mask[:self._size]))
+
+        self._version += 1
+        records = self._records(numpy.flatnonzero(self._mask[:self._size]))
+        self._history.append((self._version - 1, self._version, [CollectionChange(CollectionChange.RESET, 0, records)]))
+        self._view_cache = Contents(records, id(self), self._version, tuple(self._history))
+        self.update_bindings()
+        self.onViewChanged()
+
+    def column(self, name):
+        """
+        Returns a read-only array of all the values of the field <name>
+        """
+        result = self._columns[name][:self._size].view()
+        result.flags.writeable = False
+        return result
+
+    def record(self, index):
+        """
+        Returns the record at <index>, whether or not it passes the filter
+        """
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("record index out of range")
+        return self._records([index])[0]
+
+    @property
+    def fields(self):
+        return tuple(self._names)
+
+    @property
+    def view(self):
+        """
+        Returns a tuple of all the records which pass the current filter.
+        Bindable.
+        """
+        if _TRACKING:
+            _record(self, None)
+        if self._view_cache is None:
+            indices = numpy.flatnonzero(self._mask[:self._size])
+            self._view_cache = Contents(self._records(indices), id(self), self._version, tuple(self._history))
+        return self._view_cache
+
+    @property
+    def contents(self):
+        """
+        The records which pass the filter (the same as 'view'). Bindable.
+        """
+        return self.view
+
+    @property
+    def viewCount(self):
+        """
+        The number of records currently passing the filter. Bindable
+        """
+        if _TRACKING:
+            _record(self, None)
+        return self._view_count
+
+    @property
+    def count(self):
+        """
+        The number of records in the collection, filtered or not. Bindable.
+        """
+        if _TRACKING:
+            _record(self, None)
+        return self._size
+
+    def change_token(self, name):
+        return self._version
+
+    def __getitem__(self, item):
+        return self.view.__getitem__(item)
+
+    def __iter__(self):
+        return iter(self.view)
+
+    def __len__(self):
+        # like __getitem__ and __iter__, this is the filtered view
+        if _TRACKING:
+            _record(self, None)
+        return self._view_count
@@ -113,8 +113,11 @@ class Control(Styled, BindableObject):
                 'preventOverride', 'useTemplate', 'visible', 'visibleChangeCommand', 'width']
     _CALLBACKS = ['dragCallback', 'dropCallback', 'visibleChangeCommand']
     _READ_ONLY = ['isObscured', 'popupMenuArray', 'numberOfPopupMenus']
+    # properties which only change when they are set through this wrapper
+    _TOKEN_FIELDS = ()
     ADD_TO_LAYOUT = True
     __metaclass__ = ControlMeta
+    _edits = 0
 
     onDeleted = ScriptJobCallbackProperty('onDeleted', 'uiDeleted')
 
@@ -153,6 +156,20 @@ class Control(Styled, BindableObject):
         kwargs = {'e': True, callback_name: event}
         self.CMD(self.widget, **kwargs)
 
+    def change_token(self, field_name):
+        """
+        Returns a count of the edits made through this wrapper if
+        <field_name> is in _TOKEN_FIELDS, so two way bindings can tell whether
+        it has changed without querying the widget (see
+        bindings.Accessor.change_token). Returns None for other properties.
+        """
+        if field_name in self._TOKEN_FIELDS:
+            return self._edits
+        return None
+
+    def _edited(self):
+        self._edits += 1
+
     def __nonzero__(self):
         return self.exists
 
@@ -777,6 +777,7 @@ class TextScrollList(Control):
                 'removeIndexedItem', 'append', 'removeItem', 'numberOfSelectedItems', 'allItems', 'deselectIndexedItem',
                 'numberOfItems']
     _CALLBACKS = ['deleteKeyCommand', 'doubleClickCommand', 'selectCommand']
+    _TOKEN_FIELDS = ('allItems', 'numberOfItems', 'items')
     _BIND_TRIGGER = 'selectCommand'
     _BIND_SRC = 'selectItem'
     _BIND_TGT = 'selectItem'
@@ -6,10 +6,25 @@ multicast delegates and arbitrary message passing. They use weak references so
 they don't keep their handlers alive if they are otherwise out of scope.
 
 """
+import heapq
+import itertools
+import threading
+import time
 import weakref
+from collections import deque
+import maya.cmds as cmds
 import maya.utils
 from functools import partial, wraps
 import inspect
+from timeit import default_timer
+
+from mGui.debugging import Logger
+
+try:
+    from concurrent import futures
+except ImportError:
+    # python 2 needs the 'futures' backport for WorkerEvents
+    futures = None
 
 
 class Event(object):
@@ -88,8 +103,12 @@ class Event(object):
     """
 
     def __init__(self, **data):
-        self._handlers = set()
-        '''Set list of handlers callables. Use a set to avoid multiple calls on one handler'''
+        self._handlers = ()
+        '''
+        Immutable snapshot of the handler callables. It is only rebuilt when
+        handlers are added, removed or expire, so firing never copies it.
+        '''
+        self._expire = _expiry_callback(self)
         self.data = data
         self.data['event'] = self
 
@@ -107,7 +126,9 @@ class Event(object):
         if stash is not None:
             setattr(stash, '_sh_{}'.format(id(handler)), handler)
 
-        self._handlers.add(get_weak_reference(handler))
+        wr = get_weak_reference(handler, self._expire)
+        if wr not in self._handlers:
+            self._handlers = self._handlers + (wr,)
         return self
 
     def _remove_handler(self, handler):
@@ -124,37 +145,56 @@ class Event(object):
             pass
 
         wr = get_weak_reference(handler)
-        delenda = [h for h in self._handlers if h == wr]
-        self._handlers = self._handlers.difference(set(delenda))
+        self._handlers = tuple(h for h in self._handlers if h != wr)
         return self
 
     def metadata(self, kwargs):
         """
-        returns the me
+        returns the metadata for a single firing: the event's data, updated with
+        <kwargs>. If there are no <kwargs> the data dictionary itself is returned,
+        so callers must not modify the result.
         """
+        if not kwargs:
+            return self.data
         md = {}
         md.update(self.data)
         md.update(kwargs)
         return md
 
-    def _fire(self, *args, **kwargs):
+    def _purge(self):
         """
-        Call all handlers.  Any decayed references will be purged.
+        Remove handlers whose referents have been garbage collected. This is
+        called by the handlers' weakref callbacks, so dead handlers are dropped
+        as soon as they die rather than when the event next fires.
+        """
+        self._handlers = tuple(h for h in self._handlers if h.alive)
+
+    def _fire(self, *args, **kwargs):
         """
+        Call all handlers.
 
-        delenda = []
+        The metadata is merged once per firing; each handler still gets its own
+        copy of the keywords since they are unpacked into the call.
+
+        A handler can die during a firing (eg, if an earlier handler deletes
+        its window); it is skipped, and has already been purged by its
+        weakref callback.
+        """
+        md = self.metadata(kwargs)
+        if _ACTIVE_PROFILER is not None:
+            _ACTIVE_PROFILER.dispatch(self, self._handlers, args, md)
+            return
         for handler in self._handlers:
             try:
-                handler(*args, **self.metadata(kwargs))
+                handler(*args, **md)
             except DeadReferenceError:
-                delenda.append(handler)
-        self._handlers = self._handlers.difference(set(delenda))
+                pass
 
     def _handler_count(self):
         """
         Returns the count of the _handlers field
         """
-        return len([i for i in self._handlers])
+        return len(self._handlers)
 
     # hook up the instance methods to the base methods
     # doing it this way allows you to override more neatly
@@ -171,29 +211,585 @@ class Event(object):
 class MayaEvent(Event):
     """
     Subclass of event that uses Maya.utils.executeDeferred.
+
+    Each firing queues a single deferred call which delivers to all of the
+    handlers, rather than one deferred call per handler.
     """
 
     def _fire(self, *args, **kwargs):
         """
-        Call all handlers.  Any decayed references will be purged.
+        Queue a deferred call to all handlers.
         """
+        if self._handlers:
+            maya.utils.executeDeferred(partial(self._deliver, *args, **kwargs))
 
-        delenda = []
-        for handler in self._handlers:
+    def _deliver(self, *args, **kwargs):
+        """
+        Call all handlers immediately.
+        """
+        Event._fire(self, *args, **kwargs)
+
+    __call__ = _fire
+
+
+class CoalescingMayaEvent(MayaEvent):
+    """
+    A MayaEvent which merges repeated firings into a single delivery.
+
+    If the event is fired again before the deferred delivery has run (ie,
+    within the same idle tick) the pending delivery is reused and the handlers
+    only see the arguments from the newest firing. This is useful for events
+    like collection changes, where the intermediate states are not interesting:
+
+        changed = CoalescingMayaEvent(collection = my_collection)
+        changed += redraw
+        for item in items:
+            changed(item)  # redraw is called once, with the last item
+
+    The number of firings which were merged away is available in the
+    'collapsed' field.
+    """
+
+    def __init__(self, **data):
+        super(CoalescingMayaEvent, self).__init__(**data)
+        self._lock = threading.Lock()
+        self._pending = None
+        self.collapsed = 0
+
+    def _fire(self, *args, **kwargs):
+        """
+        Queue a deferred delivery, or update the arguments of the delivery
+        which is already queued.
+        """
+        if not self._handlers:
+            return
+        with self._lock:
+            queued = self._pending is not None
+            self._pending = (args, kwargs)
+            if queued:
+                self.collapsed += 1
+                return
+        maya.utils.executeDeferred(self._deliver_pending)
+
+    def _deliver_pending(self):
+        with self._lock:
+            pending, self._pending = self._pending, None
+        if pending is not None:
+            args, kwargs = pending
+            self._deliver(*args, **kwargs)
+
+    __call__ = _fire
+
+
+class Scheduler(object):
+    """
+    Runs callables after a delay. All of the pending calls share a single idle
+    scriptJob, which only exists while there is something waiting to run.
+
+    Ordinarily you'll use the module level SCHEDULER rather than creating
+    your own:
+
+        SCHEDULER.schedule(0.5, do_something)   # run do_something in 1/2 second
+
+    The scheduler only runs when Maya is idle, so delays are a lower bound.
+    """
+
+    def __init__(self, clock=time.time):
+        self.clock = clock
+        self._queue = []
+        self._counter = itertools.count()
+        self._job = None
+
+    def schedule(self, delay, fn):
+        """
+        Call <fn> with no arguments after <delay> seconds
+        """
+        heapq.heappush(self._queue, (self.clock() + delay, next(self._counter), fn))
+        self._start()
+
+    def tick(self, *_, **__):
+        """
+        Run everything which is due.  This is the scriptJob callback
+        """
+        now = self.clock()
+        while self._queue and self._queue[0][0] <= now:
+            fn = heapq.heappop(self._queue)[-1]
+            fn()
+        if not self._queue:
+            maya.utils.executeDeferred(self._stop)
+
+    def __len__(self):
+        return len(self._queue)
+
+    def _start(self):
+        if self._job is None:
+            self._job = cmds.scriptJob(idleEvent=self.tick)
+
+    def _stop(self):
+        # deferred, so the job is never killed from inside its own callback
+        if self._job is not None and not self._queue:
+            if cmds.scriptJob(exists=self._job):
+                cmds.scriptJob(kill=self._job, force=True)
+            self._job = None
+
+
+SCHEDULER = Scheduler()
+'''The shared scheduler used by ThrottledEvents and DebouncedEvents'''
+
+
+class ThrottledEvent(Event):
+    """
+    An Event which calls its handlers at most <hz> times per second.
+
+    The first firing is delivered immediately. Firings that arrive too soon
+    are held back, and the newest of them is delivered as soon as the interval
+    allows, so the last firing always reaches the handlers:
+
+        slider.dragCommand = ThrottledEvent(hz=30)
+        slider.dragCommand += update_preview
+    """
+
+    def __init__(self, hz=30, scheduler=None, **data):
+        super(ThrottledEvent, self).__init__(**data)
+        self.interval = 1.0 / hz
+        self.scheduler = SCHEDULER if scheduler is None else scheduler
+        self._last = None
+        self._pending = None
+
+    def _fire(self, *args, **kwargs):
+        now = self.scheduler.clock()
+        if self._pending is None and (self._last is None or now - self._last >= self.interval):
+            self._last = now
+            Event._fire(self, *args, **kwargs)
+            return
+        queued = self._pending is not None
+        self._pending = (args, kwargs)
+        if not queued:
+            delay = max(self._last + self.interval - now, 0)
+            self.scheduler.schedule(delay, _weak_callback(self, '_deliver_pending'))
+
+    def _deliver_pending(self):
+        pending, self._pending = self._pending, None
+        if pending is not None:
+            self._last = self.scheduler.clock()
+            args, kwargs = pending
+            Event._fire(self, *args, **kwargs)
+
+    __call__ = _fire
+
+
+class DebouncedEvent(Event):
+    """
+    An Event which only calls its handlers once firings have stopped for <ms>
+    milliseconds. The handlers get the arguments from the last firing:
+
+        field.changeCommand = DebouncedEvent(ms=250)
+        field.changeCommand += run_search   # runs once the user stops typing
+    """
+
+    def __init__(self, ms=250, scheduler=None, **data):
+        super(DebouncedEvent, self).__init__(**data)
+        self.delay = ms / 1000.0
+        self.scheduler = SCHEDULER if scheduler is None else scheduler
+        self._due = None
+        self._pending = None
+
+    def _fire(self, *args, **kwargs):
+        self._pending = (args, kwargs)
+        queued = self._due is not None
+        self._due = self.scheduler.clock() + self.delay
+        # rather than rescheduling on every firing, the queued call checks
+        # the due time and reschedules itself if there were later firings
+        if not queued:
+            self.scheduler.schedule(self.delay, _weak_callback(self, '_deliver_pending'))
+
+    def _deliver_pending(self):
+        remaining = self._due - self.scheduler.clock()
+        if remaining > 0:
+            self.scheduler.schedule(remaining, _weak_callback(self, '_deliver_pending'))
+            return
+        pending, self._pending, self._due = self._pending, None, None
+        args, kwargs = pending
+        Event._fire(self, *args, **kwargs)
+
+    __call__ = _fire
+
+
+WORKER_THREADS = 4
+'''Size of the thread pool shared by all WorkerEvents'''
+
+_WORKER_POOL = None
+
+
+def worker_pool():
+    """
+    Returns the thread pool shared by all WorkerEvents, creating it if needed
+    """
+    global _WORKER_POOL
+    if _WORKER_POOL is None:
+        if futures is None:
+            raise RuntimeError("WorkerEvents require concurrent.futures (the 'futures' package in Python 2)")
+        _WORKER_POOL = futures.ThreadPoolExecutor(max_workers=WORKER_THREADS)
+    return _WORKER_POOL
+
+
+def worker_thread(fn):
+    """
+    decorator which marks an event handler as safe to run on a worker thread.
+    Only marked handlers are run off the main thread by a WorkerEvent, so
+    never use this on a handler which uses maya.cmds, pymel or the gui.
+    """
+    fn._mgui_worker_thread = True
+    return fn
+
+
+def _runs_on_worker(weak_method):
+    if isinstance(weak_method, WeakMethodBound):
+        fn = weak_method.function
+    else:
+        fn = weak_method.function()
+    return getattr(fn, '_mgui_worker_thread', False)
+
+
+class WorkerEvent(Event):
+    """
+    An Event which runs handlers marked with @worker_thread on a thread pool,
+    so slow work that doesn't touch Maya won't freeze the UI.  Unmarked
+    handlers run on the calling thread as usual.
+
+    The return values of worker handlers are delivered back on the main
+    thread (via maya.utils.executeDeferred) through the onCompleted event;
+    exceptions are delivered through onFailed:
+
+        @worker_thread
+        def hash_files(*args, **kwargs):
+            return [hash_file(f) for f in manifest()]
+
+        def show_hashes(result, *args, **kwargs):
+            result_list.collection = result
+
+        button.command = WorkerEvent(max_concurrent=1)
+        button.command += hash_files
+        button.command.onCompleted += show_hashes
+
+    At most <max_concurrent> worker handlers from this event run at once; the
+    rest wait their turn. cancel() drops everything which has not started and
+    discards the results of anything which has.
+
+    Worker handlers get the same arguments as other handlers. Be careful with
+    the metadata - a 'sender' is usually a gui control, which must not be
+    used off the main thread.
+    """
+
+    def __init__(self, max_concurrent=1, **data):
+        super(WorkerEvent, self).__init__(**data)
+        self.max_concurrent = max_concurrent
+        self.onCompleted = Event(source=self)
+        self.onFailed = Event(source=self)
+        self._main = ()
+        self._workers = ()
+        # reentrant, since done callbacks can run inside submit()
+        self._lock = threading.RLock()
+        self._waiting = deque()
+        self._futures = set()
+        self._generation = 0
+
+    def _partition(self):
+        self._main = tuple(h for h in self._handlers if not _runs_on_worker(h))
+        self._workers = tuple(h for h in self._handlers if _runs_on_worker(h))
+
+    def _add_handler(self, handler):
+        super(WorkerEvent, self)._add_handler(handler)
+        self._partition()
+        return self
+
+    def _remove_handler(self, handler):
+        super(WorkerEvent, self)._remove_handler(handler)
+        self._partition()
+        return self
+
+    def _purge(self):
+        super(WorkerEvent, self)._purge()
+        self._partition()
+
+    def _fire(self, *args, **kwargs):
+        md = self.metadata(kwargs)
+        if _ACTIVE_PROFILER is not None:
+            _ACTIVE_PROFILER.dispatch(self, self._main, args, md)
+        else:
+            for handler in self._main:
+                try:
+                    handler(*args, **md)
+                except DeadReferenceError:
+                    pass
+        for handler in self._workers:
+            if handler.alive:
+                self._submit(handler, partial(handler, *args, **md))
+
+    @property
+    def pending(self):
+        """
+        The number of worker handlers which are running or waiting to run
+        """
+        with self._lock:
+            return len(self._futures) + len(self._waiting)
+
+    def cancel(self):
+        """
+        Cancel all worker handlers which have not started, and make sure the
+        results of any which are running are not delivered. Returns the number
+        of handlers which were stopped before they started
+        """
+        with self._lock:
+            self._generation += 1
+            cancelled = len(self._waiting)
+            self._waiting.clear()
+            running = list(self._futures)
+        return cancelled + len([f for f in running if f.cancel()])
+
+    def _submit(self, handler, task):
+        with self._lock:
+            if len(self._futures) >= self.max_concurrent:
+                self._waiting.append((handler, task))
+                return
+            self._start(handler, task)
+
+    def _start(self, handler, task):
+        # must be called with the lock held
+        future = worker_pool().submit(task)
+        self._futures.add(future)
+        future.add_done_callback(partial(self._finished, handler, self._generation))
+
+    def _finished(self, handler, generation, future):
+        # this runs on the worker thread
+        if not future.cancelled():
+            maya.utils.executeDeferred(partial(self._deliver_result, handler, generation, future))
+        with self._lock:
+            self._futures.discard(future)
+            if self._waiting:
+                self._start(*self._waiting.popleft())
+
+    def _deliver_result(self, handler, generation, future):
+        if generation != self._generation:
+            return
+        error = future.exception()
+        if error is not None:
+            self.onFailed(error, handler=handler)
+        else:
+            self.onCompleted(future.result(), handler=handler)
+
+    __call__ = _fire
+    __iadd__ = _add_handler
+    __isub__ = _remove_handler
+
+
+def _weak_callback(obj, method_name):
+    """
+    Returns a no-argument callable which calls <method_name> on <obj> if <obj>
+    still exists, so pending scheduled calls don't keep events alive
+    """
+    ref = weakref.ref(obj)
+
+    def callback():
+        target = ref()
+        if target is not None:
+            getattr(target, method_name)()
+
+    return callback
+
+
+# ======================================================================================================================
+# Profiling
+#
+# When profiling is off the only cost is a check of _ACTIVE_PROFILER in Event._fire
+# ======================================================================================================================
+
+_ACTIVE_PROFILER = None
+
+
+class HandlerStats(object):
+    """
+    Timing for one handler of one Event. The histogram counts calls by duration:
+    histogram[n] is the number of calls faster than BUCKETS[n]; the last entry
+    counts everything slower.
+    """
+    __slots__ = ('name', 'calls', 'total', 'max', 'histogram')
+
+    BUCKETS = (0.0001, 0.001, 0.01, 0.1, 1.0)
+    LABELS = ('<0.1ms', '<1ms', '<10ms', '<100ms', '<1s', '>1s')
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.histogram = [0] * (len(self.BUCKETS) + 1)
+
+    def record(self, elapsed):
+        self.calls += 1
+        self.total += elapsed
+        if elapsed > self.max:
+            self.max = elapsed
+        for idx, limit in enumerate(self.BUCKETS):
+            if elapsed < limit:
+                self.histogram[idx] += 1
+                return
+        self.histogram[-1] += 1
+
+    def __str__(self):
+        buckets = " ".join("%s:%i" % item for item in zip(self.LABELS, self.histogram) if item[1])
+        return "%s  calls: %i  total: %.4fs  max: %.4fs  [%s]" % (self.name, self.calls, self.total, self.max, buckets)
+
+
+class EventStats(object):
+    """
+    Fire count and timing for one Event, and the HandlerStats for its handlers
+    """
+    __slots__ = ('name', 'fires', 'total', 'max', 'handlers')
+
+    def __init__(self, name):
+        self.name = name
+        self.fires = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.handlers = {}
+
+    def __str__(self):
+        return "%s  fires: %i  total: %.4fs  max: %.4fs" % (self.name, self.fires, self.total, self.max)
+
+
+class EventProfiler(object):
+    """
+    Collects EventStats for every Event that fires while profiling is on. Use
+    profile_events() to turn it on and off:
+
+        profiler = profile_events(True)
+        # ... use the tool ...
+        profile_events(False)
+        profiler.dump()
+
+    Stats are kept for as long as the Events are alive.
+    """
+
+    def __init__(self):
+        self.stats = weakref.WeakKeyDictionary()
+
+    def dispatch(self, event, handlers, args, md):
+        """
+        Call <handlers> for <event>, recording how long they take
+        """
+        stats = self.stats.get(event)
+        if stats is None:
+            stats = self.stats[event] = EventStats(describe_event(event))
+        fire_start = default_timer()
+        for handler in handlers:
+            if not handler.alive:
+                continue
+            start = default_timer()
             try:
-                maya.utils.executeDeferred(partial(handler, *args, **self.metadata(kwargs)))
+                handler(*args, **md)
             except DeadReferenceError:
-                delenda.append(handler)
-        self._handlers = self._handlers.difference(set(delenda))
+                # it died since the check above
+                continue
+            finally:
+                elapsed = default_timer() - start
+                handler_stats = stats.handlers.get(handler.ID)
+                if handler_stats is None:
+                    handler_stats = stats.handlers[handler.ID] = HandlerStats(describe_handler(handler))
+                handler_stats.record(elapsed)
+        elapsed = default_timer() - fire_start
+        stats.fires += 1
+        stats.total += elapsed
+        if elapsed > stats.max:
+            stats.max = elapsed
+
+    def report(self, sort='total', limit=None):
+        """
+        Returns a list of EventStats sorted (descending) by <sort>, which can
+        be 'total', 'max' or 'fires'.  If <limit> is supplied, only that many
+        are returned.
+        """
+        result = sorted(self.stats.values(), key=lambda s: getattr(s, sort), reverse=True)
+        return result[:limit] if limit else result
 
-    __call__ = _fire
+    def slowest_handlers(self, limit=None):
+        """
+        Returns a list of (EventStats, HandlerStats) pairs, slowest total time first
+        """
+        pairs = [(e, h) for e in self.stats.values() for h in e.handlers.values()]
+        pairs.sort(key=lambda p: p[1].total, reverse=True)
+        return pairs[:limit] if limit else pairs
+
+    def dump(self, sort='total', limit=20):
+        """
+        Writes the report to mGui.debugging.Logger and returns it as a string.
+        It is logged as a warning so it shows with the default log filter.
+        """
+        lines = ["event profile (by %s)" % sort]
+        for event_stats in self.report(sort, limit):
+            lines.append(str(event_stats))
+            for handler_stats in sorted(event_stats.handlers.values(), key=lambda h: h.total, reverse=True):
+                lines.append("    " + str(handler_stats))
+        text = "\n".join(lines)
+        Logger.warning(text)
+        return text
+
+    def clear(self):
+        self.stats.clear()
+
+
+PROFILER = EventProfiler()
+
+
+def profile_events(state=True):
+    """
+    Turn event profiling on or off. Returns the profiler, which keeps its
+    stats after profiling is turned off
+    """
+    global _ACTIVE_PROFILER
+    _ACTIVE_PROFILER = PROFILER if state else None
+    return PROFILER
+
+
+def describe_event(event):
+    """
+    Returns a readable description of <event> and the thing which owns it: the
+    control and callback for CallbackProperty events, the scriptJob type for
+    ScriptJobEvents and so on.
+    """
+    desc = event.__class__.__name__
+    sender = event.data.get('sender')
+    if sender is not None:
+        try:
+            callbacks = getattr(sender, 'callbacks', {})
+            keys = [k for k, v in callbacks.items() if v is event]
+            desc = "%s %s.%s" % (desc, sender, keys[0] if keys else '?')
+        except ReferenceError:
+            desc += " <deleted sender>"
+    elif hasattr(event, 'event_type'):
+        desc = "%s %s" % (desc, event.event_type)
+    elif 'pattern' in event.data:
+        desc = "%s %s" % (desc, event.data['pattern'])
+    return desc
+
+
+def describe_handler(handler):
+    """
+    Returns a readable name for a WeakMethodBound or WeakMethodFree
+    """
+    if isinstance(handler, WeakMethodBound):
+        owner = handler.referent()
+        return "%s.%s" % (type(owner).__name__, handler._ref_name)
+    fn = handler.function()
+    return "%s.%s" % (getattr(fn, '__module__', '?'), handler._ref_name)
 
 
 class DeadReferenceError(TypeError):
     """
     Raised when a WeakMethodBound or WeakMethodFree tries to fire a method that
-    has been garbage collected. Used by Events to know when to drop dead
-    references
+    has been garbage collected. Events drop dead handlers from the weakref
+    callbacks supplied by get_weak_reference, and skip handlers which die
+    while the event is firing.
     """
     pass
 
@@ -206,69 +802,108 @@ class WeakMethodBound(object):
     """
     Encapsulates a weak reference to a bound method on an object.  Has a
     hashable ID so that Events can identify multiple references to the same
-    method and not duplicate them
+    method and not duplicate them.
+
+    If <callback> is supplied it is used as the weakref callback for the
+    method's owner, so it is called when the owner is garbage collected.
     """
     __slots__ = ('function', 'referent', 'ID', '_ref_name')
 
-    def __init__(self, f):
+    def __init__(self, f, callback=None):
 
         self.function = f.im_func
-        self.referent = weakref.ref(f.im_self)
+        self.referent = weakref.ref(f.im_self, callback)
         self._ref_name = f.im_func.__name__
-        self.ID = id(f.im_self) ^ id(f.im_func.__name__)
+        # the owner id is only reused after the owner dies, at which point
+        # this reference has already expired
+        self.ID = (id(f.im_self), id(f.im_func))
 
     def __call__(self, *args, **kwargs):
         ref = self.referent()
-        if not ref is False and not ref is None:
-            return apply(self.function, (self.referent(),) + args, kwargs)
+        if ref is not None:
+            return self.function(ref, *args, **kwargs)
         else:
             raise DeadReferenceError("Reference to the bound method {0} no longer exists".format(self._ref_name))
 
+    @property
+    def alive(self):
+        return self.referent() is not None
+
     def __eq__(self, other):
         if not hasattr(other, 'ID'):
             return False
         return self.ID == other.ID
 
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
     def __hash__(self):
-        return self.ID
+        return hash(self.ID)
 
 
 class WeakMethodFree(object):
     """
     Encapsulates a weak reference to an unbound method
+
+    If <callback> is supplied it is used as the weakref callback for the
+    function, so it is called when the function is garbage collected.
     """
     __slots__ = ('function', 'ID', '_ref_name')
 
-    def __init__(self, f):
-        self.function = weakref.ref(f)
+    def __init__(self, f, callback=None):
+        self.function = weakref.ref(f, callback)
         self.ID = id(f)
         self._ref_name = getattr(f, '__name__', "'unnamed'")
 
     def __call__(self, *args, **kwargs):
-        if self.function():
-            return apply(self.function(), args, kwargs)
+        fn = self.function()
+        if fn is not None:
+            return fn(*args, **kwargs)
         else:
             raise DeadReferenceError("Reference to unbound method {0} no longer exists".format(self._ref_name))
 
+    @property
+    def alive(self):
+        return self.function() is not None
+
     def __eq__(self, other):
         if not hasattr(other, 'ID'):
             return False
         return self.ID == other.ID
 
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
     def __hash__(self):
-        return self.ID
+        return hash(self.ID)
 
 
-def get_weak_reference(f):
+def get_weak_reference(f, callback=None):
     """
     Returns a WeakMethodFree or a WeakMethodBound for the supplied function, as
-    appropriate
+    appropriate. If <callback> is supplied it will be called (with the expired
+    weakref) when <f> is garbage collected
     """
     try:
         f.im_func
     except AttributeError:
-        return WeakMethodFree(f)
-    return WeakMethodBound(f)
+        return WeakMethodFree(f, callback)
+    return WeakMethodBound(f, callback)
+
+
+def _expiry_callback(event):
+    """
+    Returns a handler expiry callback which purges dead handlers from <event>
+    without keeping the event alive.
+    """
+    owner = weakref.ref(event)
+
+    def expire(_):
+        evt = owner()
+        if evt is not None:
+            evt._purge()
+
+    return expire
 
 
 def event_handler(fn):
@@ -1,15 +1,13 @@
 __author__ = 'stevet'
 import re
-import time
-import inspect
 
 from maya import cmds
 
 from mGui import gui, forms, lists
 from mGui.bindings import bind
+from mGui.events import DebouncedEvent
 from mGui.observable import ViewCollection
 from mGui.qt.QTextField import QTextField
-from mGui.scriptJobs import Idle
 
 """
 This example illustrates the optional QTextField object, which (unlike a regular Maya text field)
@@ -23,39 +21,8 @@ _items = forms.__all__ + lists.__all__ + _ctrls
 items = ViewCollection(*_items)
 
 
-class InputBuffer(object):
-
-    '''
-    accumulate inputs until a certain amount of time passes
-    '''
-
-    def __init__(self, parent, fn, interval=1):
-        self.last = time.time()
-        self.interval = interval
-        self.fn = fn
-        self.buffer = []
-        self.accumulate = inspect.getargspec(fn).varargs
-        self.idleEvent = Idle()
-        self.idleEvent += self.update
-        self.idleEvent.start(p=parent)
-
-    def handle(self, input, *_, **__):
-        self.buffer.append(input)
-
-    def update(self, *_, **__):
-        if time.time() - self.last < self.interval:
-            return
-        if self.buffer:
-            if self.accumulate:
-                self.fn(*self.buffer)
-            else:
-                self.fn(self.buffer[-1])
-            self.buffer = []
-        self.last = time.time()
-
-
 def main():
-    def create_filter(fn):
+    def create_filter(fn, *_, **__):
         regex = re.compile(fn, re.I)
         test = lambda p: regex.search(p)
         items.update_filter(test)
@@ -75,8 +42,10 @@ def main():
         items.bind.count > bind() > two.bind.label
         w.update_bindings()
 
-    w.buffer = InputBuffer(w, create_filter)
-    filter_field.textChanged += w.buffer.handle
+    # only refilter once typing pauses
+    w.filter_changed = DebouncedEvent(ms=250)
+    w.filter_changed += create_filter, w
+    filter_field.textChanged += w.filter_changed
     cmds.scriptJob(lj=True)
     return w
 
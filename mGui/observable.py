@@ -3,11 +3,198 @@ Observable.py
 @author: stevetheodore
 """
 import itertools
-from collections import MutableSequence, Sequence
+import weakref
+from bisect import bisect_left
+from collections import MutableSequence, Sequence, deque
 
-from mGui.bindings import BindableObject
+from mGui.bindings import BindableObject, bind, _same
 from mGui.events import MayaEvent, Event
 
+# one dictionary of reads for each @computed property being evaluated (innermost last)
+_TRACKING = []
+_NO_VERSIONS = {}
+
+
+def _record(source, key):
+    """
+    note that the innermost @computed being evaluated read <key> from
+    <source> (key is None for the contents of a collection)
+    """
+    _TRACKING[-1].setdefault((id(source), key), (source, key))
+
+
+def _token(source, key):
+    """
+    returns the current version of <key> on <source>. Versions change
+    whenever the value does
+    """
+    if key is None:
+        return source._version
+    if isinstance(getattr(source.__class__, key, None), computed):
+        # bring the cached value up to date so its version is current
+        getattr(source, key)
+    return source.__dict__.get('_versions', _NO_VERSIONS).get(key, 0)
+
+
+def _bump(instance, key):
+    versions = instance.__dict__.get('_versions')
+    if versions is None:
+        versions = instance.__dict__['_versions'] = {}
+    versions[key] = versions.get(key, 0) + 1
+
+
+class CollectionChange(object):
+    """
+    Describes one change to an ObservableCollection:
+
+        INSERT:  <items> were inserted at <start>
+        REMOVE:  <items> were removed from <start>
+        REPLACE: <old_items> at <start> were replaced by <items>
+        MOVE:    <items> at <start> were moved to <destination> (an index
+                 in the collection after they were removed)
+        RESET:   anything else (eg, a sort); <items> is the new contents
+
+    apply() makes the same change to a list, so a consumer holding a copy of
+    the collection can keep up in proportion to the size of the change
+    rather than the size of the collection.
+    """
+    __slots__ = ('action', 'start', 'items', 'old_items', 'destination')
+
+    INSERT = 'insert'
+    REMOVE = 'remove'
+    REPLACE = 'replace'
+    MOVE = 'move'
+    RESET = 'reset'
+
+    def __init__(self, action, start, items, old_items=(), destination=None):
+        self.action = action
+        self.start = start
+        self.items = tuple(items)
+        self.old_items = tuple(old_items)
+        self.destination = destination
+
+    @property
+    def count(self):
+        return len(self.items)
+
+    def apply(self, target):
+        """
+        Make this change to the list <target>
+        """
+        end = self.start + len(self.items)
+        if self.action == self.INSERT:
+            target[self.start:self.start] = self.items
+        elif self.action == self.REMOVE:
+            del target[self.start:end]
+        elif self.action == self.REPLACE:
+            target[self.start:self.start + len(self.old_items)] = self.items
+        elif self.action == self.MOVE:
+            del target[self.start:end]
+            target[self.destination:self.destination] = self.items
+        else:
+            target[:] = self.items
+
+    def __eq__(self, other):
+        if not isinstance(other, CollectionChange):
+            return False
+        return (self.action, self.start, self.items, self.old_items, self.destination) == \
+               (other.action, other.start, other.items, other.old_items, other.destination)
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __repr__(self):
+        if self.action == self.MOVE:
+            return "<%s %i:%i -> %i>" % (self.action, self.start, self.start + self.count, self.destination)
+        return "<%s %i:%i %r>" % (self.action, self.start, self.start + self.count, self.items)
+
+
+class Contents(tuple):
+    """
+    The contents of an ObservableCollection at a particular version. It is an
+    ordinary tuple which can also report the CollectionChanges that led to it,
+    so a bound consumer can update incrementally:
+
+        def set_collection(self, contents):
+            changes = contents.changes_since(self.last_version)
+            ...
+            self.last_version = contents.version
+    """
+
+    def __new__(cls, items, source, version, history):
+        result = super(Contents, cls).__new__(cls, items)
+        result.source = source
+        result.version = version
+        result._history = history
+        return result
+
+    def changes_since(self, version):
+        """
+        Returns a list of the CollectionChanges which turned the version
+        <version> of the same collection into this one, or None if they are no
+        longer known
+        """
+        if version == self.version:
+            return []
+        if version is None or version > self.version:
+            return None
+        result = []
+        expected = version
+        for start, end, changes in self._history:
+            if end <= expected:
+                continue
+            if start != expected or end > self.version:
+                break
+            result.extend(changes)
+            expected = end
+        if expected != self.version:
+            return None
+        return result
+
+
+class CollectionBatch(object):
+    """
+    Context manager returned by ObservableCollection.batch()
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    def __enter__(self):
+        self.collection._batch_depth += 1
+        return self.collection
+
+    def __exit__(self, typ, value, traceback):
+        collection = self.collection
+        collection._batch_depth -= 1
+        if collection._batch_depth == 0 and collection._batched:
+            # commit even if there was an exception, since the changes have been made
+            collection._commit()
+
+
+def _merge(changes, change):
+    """
+    add <change> to the list <changes>, extending the last change instead if
+    <change> continues it
+    """
+    if changes:
+        last = changes[-1]
+        if last.action == change.action == CollectionChange.INSERT:
+            if change.start == last.start + len(last.items):
+                last.items = list(last.items)
+                last.items.extend(change.items)
+                return
+        if last.action == change.action == CollectionChange.REMOVE:
+            if change.start == last.start:
+                last.items = list(last.items)
+                last.items.extend(change.items)
+                return
+            if change.start + len(change.items) == last.start:
+                last.start = change.start
+                last.items = list(change.items) + list(last.items)
+                return
+    changes.append(change)
+
 
 class ObservableCollection(MutableSequence, BindableObject):
     """
@@ -18,7 +205,21 @@ class ObservableCollection(MutableSequence, BindableObject):
 
        * onItemAdded(item, collection = self) for each item added
        * onItemRemoved(item, collection = self) for each item removed
-       * onCollectionChanged(collection = self) for all other changes
+       * onCollectionChanged(changes = [...], collection = self) for all changes
+
+    'changes' is a list of CollectionChange records saying what was inserted,
+    removed, replaced or moved and where. The 'contents' pushed to bindings is
+    a Contents tuple, whose changes_since() method returns the change records
+    since an earlier version (the last HISTORY versions are kept).
+
+    Changes made inside a batch() do not fire onItemAdded or onItemRemoved.
+    When the outermost batch ends, bindings are updated once and
+    onCollectionChanged fires once with all of the changes (runs of adjacent
+    inserts or removals are merged into one record):
+
+        with collection.batch():
+            for item in new_items:
+                collection.append(item)
 
     This collections outgoing data bindings will be updated automatically on
     these events as well, so it's not necessary to explicitly handle them
@@ -33,9 +234,16 @@ class ObservableCollection(MutableSequence, BindableObject):
 
     _BIND_SRC = 'contents'
     _BIND_TGT = None
+    _version = 0
+    _batch_depth = 0
+    HISTORY = 32
 
     def __init__(self, *items):
         self._internal_collection = [i for i in items]
+        self._history = deque(maxlen=self.HISTORY)
+        self._batched = []
+        self._batch_flags = {}
+        self._batch_start = 0
         self.onCollectionChanged = MayaEvent(collection=self)
         self.onItemAdded = MayaEvent(collection=self)
         self.onItemRemoved = MayaEvent(collection=self)
@@ -43,9 +251,62 @@ class ObservableCollection(MutableSequence, BindableObject):
     @property
     def contents(self):
         """
-        The contents of the collection.  Bindable.
+        The contents of the collection, as a Contents tuple.  Bindable.
         """
-        return tuple(self)
+        if _TRACKING:
+            _record(self, None)
+        return Contents(self._internal_collection, id(self), self._version, tuple(self._history))
+
+    def batch(self):
+        """
+        Returns a context manager which collects the notifications for the
+        changes made inside it (see the class notes). Batches can be nested.
+        """
+        return CollectionBatch(self)
+
+    def _changed(self, changes, **flags):
+        """
+        Record <changes> (a list of CollectionChanges) as a new version, update
+        bindings and fire onCollectionChanged. Inside a batch the changes are
+        saved for _commit instead.
+        """
+        if not self._batch_depth:
+            self._version += 1
+            self._history.append((self._version - 1, self._version, changes))
+            self.update_bindings()
+            self.onCollectionChanged(changes=changes, **flags)
+            return
+
+        if not self._batched:
+            self._batch_start = self._version
+        self._version += 1
+        for change in changes:
+            _merge(self._batched, change)
+        self._batch_flags.update(flags)
+
+    def _commit(self):
+        changes, flags = self._batched, self._batch_flags
+        self._batched, self._batch_flags = [], {}
+        for change in changes:
+            change.items = tuple(change.items)
+        self._history.append((self._batch_start, self._version, changes))
+        self.update_bindings()
+        self.onCollectionChanged(changes=changes, **flags)
+
+    def _item_added(self, item, index):
+        if not self._batch_depth:
+            self.onItemAdded(item, index)
+
+    def _item_removed(self, item, index):
+        if not self._batch_depth:
+            self.onItemRemoved(item, index)
+
+    def _index(self, index):
+        # where list.insert would put something
+        size = len(self._internal_collection)
+        if index < 0:
+            index = max(0, size + index)
+        return min(index, size)
 
     @property
     def count(self):
@@ -64,26 +325,37 @@ class ObservableCollection(MutableSequence, BindableObject):
         """
         Add everything in <args>, but only fire the onCollectionChanged event once
         """
+        start = len(self._internal_collection)
         self._internal_collection.extend(args)
-        self.update_bindings()
-        self.onCollectionChanged(added=True)
+        self._changed([CollectionChange(CollectionChange.INSERT, start, args)], added=True)
 
     def insert(self, index, item):
         """
         Add <item> at position <index>
         """
-        self._internal_collection.insert(index, item)
-        self.onItemAdded(item, index)
-        self.update_bindings()
-        self.onCollectionChanged(added=True)
+        start = self._index(index)
+        self._internal_collection.insert(start, item)
+        self._item_added(item, index)
+        self._changed([CollectionChange(CollectionChange.INSERT, start, (item,))], added=True)
+
+    def move(self, index, destination):
+        """
+        Move the item at <index> so that it ends up at position <destination>
+        """
+        start = index if index >= 0 else len(self._internal_collection) + index
+        item = self._internal_collection.pop(start)
+        destination = self._index(destination)
+        self._internal_collection.insert(destination, item)
+        self._changed([CollectionChange(CollectionChange.MOVE, start, (item,), destination=destination)],
+                      sorted=True)
 
     def clear(self):
         """
         Clear the collection
         """
+        removed = tuple(self._internal_collection)
         del self._internal_collection[:]
-        self.update_bindings()
-        self.onCollectionChanged(cleared=True)
+        self._changed([CollectionChange(CollectionChange.REMOVE, 0, removed)], cleared=True)
 
     def sort(self, comp=None, key=None, reverse=False):
         """
@@ -91,31 +363,229 @@ class ObservableCollection(MutableSequence, BindableObject):
         arguments (see list.sort)
         """
         self._internal_collection.sort(comp, key, reverse)
-        self.update_bindings()
-        self.onCollectionChanged(sorted=True)
+        self._changed([CollectionChange(CollectionChange.RESET, 0, self._internal_collection)], sorted=True)
 
     def __getitem__(self, item):
+        if _TRACKING:
+            _record(self, None)
         return self._internal_collection.__getitem__(item)
 
     def __setitem__(self, index, item):
+        if isinstance(index, slice):
+            self._internal_collection.__setitem__(index, item)
+            self._item_added(item, index)
+            self._changed([CollectionChange(CollectionChange.RESET, 0, self._internal_collection)], added=True)
+            return
+        start = index if index >= 0 else len(self._internal_collection) + index
+        old = self._internal_collection[start]
         self._internal_collection.__setitem__(index, item)
-        self.onItemAdded(item, index)
-        self.update_bindings()
-        self.onCollectionChanged(added=True)
+        self._item_added(item, index)
+        self._changed([CollectionChange(CollectionChange.REPLACE, start, (item,), (old,))], added=True)
 
     def __delitem__(self, index):
-        self.onItemRemoved(self[index], index)
-        self._internal_collection.__delitem__(index)
-        self.update_bindings()
-        self.onCollectionChanged(removed=True)
+        removed = self._internal_collection[index]
+        self._item_removed(removed, index)
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self._internal_collection))
+            self._internal_collection.__delitem__(index)
+            if step == 1:
+                change = CollectionChange(CollectionChange.REMOVE, start, removed)
+            else:
+                change = CollectionChange(CollectionChange.RESET, 0, self._internal_collection)
+        else:
+            start = index if index >= 0 else len(self._internal_collection) + index
+            self._internal_collection.__delitem__(index)
+            change = CollectionChange(CollectionChange.REMOVE, start, (removed,))
+        self._changed([change], removed=True)
 
     def __len__(self):
+        if _TRACKING:
+            _record(self, None)
         return len(self._internal_collection)
 
+    def change_token(self, name):
+        """
+        Returns a version number which changes whenever the collection does
+        (see bindings.Accessor.change_token)
+        """
+        return self._version
+
     def reverse(self):
         self._internal_collection.reverse()
-        self.update_bindings()
-        self.onCollectionChanged(sorted=True)
+        self._changed([CollectionChange(CollectionChange.RESET, 0, self._internal_collection)], sorted=True)
+
+
+_MISSING = object()
+_LAST = float('inf')  # sorts after any serial number
+
+
+class PropertyEvents(object):
+    """
+    A set of Events, one per property name, created as they are needed. This
+    is the _BIND_TRIGGER of an ObservableObject: bindings attach to the event
+    for the property they read.
+    """
+
+    def __init__(self, owner):
+        self.owner = weakref.proxy(owner)
+        self.events = {}
+
+    def for_property(self, name):
+        """
+        Returns the Event which fires when property <name> changes
+        """
+        evt = self.events.get(name)
+        if evt is None:
+            evt = self.events[name] = Event(sender=self.owner, property=name)
+        return evt
+
+    def __call__(self, name, value):
+        """
+        Fire the event for property <name>, if anything is listening
+        """
+        evt = self.events.get(name)
+        if evt is not None:
+            evt(value)
+
+
+class ObservableObject(BindableObject):
+    """
+    A BindableObject which announces changes to its public attributes and
+    properties. Bindings which read a property of an ObservableObject update
+    as soon as that property changes, without updating any other bindings,
+    so it is not necessary to call update_bindings():
+
+        class Model(ObservableObject):
+            def __init__(self):
+                self.name = 'fred'
+                self.age = 30
+
+        model = Model()
+        model.bind.name > bind() > name_field.bind.text
+        model.bind.age > bind() > age_slider.bind.value
+        model.name = 'barney'   # updates name_field, but not age_slider
+
+    Assigning the value an attribute already has does not fire. Names
+    starting with an underscore are ignored.  You can listen to a property
+    directly with:
+
+        name_changed = model.property_changed.for_property('name')
+        name_changed += handler
+    """
+
+    _BIND_TRIGGER = 'property_changed'
+
+    @property
+    def property_changed(self):
+        """
+        The PropertyEvents for this object
+        """
+        events = self.__dict__.get('_property_changed')
+        if events is None:
+            events = self.__dict__['_property_changed'] = PropertyEvents(self)
+        return events
+
+    def __setattr__(self, name, value):
+        if name.startswith('_'):
+            super(ObservableObject, self).__setattr__(name, value)
+            return
+
+        state = self.__dict__
+        old = state.get(name, _MISSING)
+        unchanged = _same(old, value)
+        super(ObservableObject, self).__setattr__(name, value)
+        if unchanged:
+            return
+        _bump(self, name)
+        if '_property_changed' in state:
+            state['_property_changed'](name, value)
+
+    def change_token(self, name):
+        """
+        Returns a version number for attribute or computed property <name>
+        which changes whenever its value does, or None for other properties
+        (see bindings.Accessor.change_token)
+        """
+        if name in self.__dict__ or isinstance(getattr(self.__class__, name, None), computed):
+            return _token(self, name)
+        return None
+
+    def __getattribute__(self, name):
+        value = object.__getattribute__(self, name)
+        if _TRACKING and name[0] != '_':
+            _record(self, name)
+        return value
+
+
+class computed(object):
+    """
+    Decorator for a read-only property whose value is derived from other
+    properties.  While the function runs, reads from ObservableObject
+    properties, ObservableCollections and other computed properties are
+    recorded; the result is cached until one of those inputs changes:
+
+        class Summary(BindableObject):
+            def __init__(self, assets):
+                self.assets = assets   # an ObservableCollection
+
+            @computed
+            def label(self):
+                return "%i assets" % len(self.assets)
+
+    Reading 'label' again returns the cached string until the 'assets'
+    collection changes. Inputs which are not observable (plain attributes,
+    maya data, etc) are not tracked, so computed functions should only read
+    observable values.
+
+    Bindings to a computed property (summary.bind.label > bind() > ...) only
+    push when the value actually changes.
+    """
+
+    CACHE_BINDINGS = True
+
+    def __init__(self, fn):
+        self.fn = fn
+        self.name = fn.__name__
+        self.__doc__ = fn.__doc__
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+
+        cache = instance.__dict__.get('_computed')
+        if cache is None:
+            cache = instance.__dict__['_computed'] = {}
+
+        entry = cache.get(self.name)
+        if entry is None or not all(_token(s, k) == t for s, k, t in entry[1]):
+            entry = cache[self.name] = self._evaluate(instance, entry)
+
+        if _TRACKING:
+            _record(instance, self.name)
+        return entry[0]
+
+    def __set__(self, instance, value):
+        raise AttributeError("computed property '%s' is read-only" % self.name)
+
+    def change_token(self, instance):
+        """
+        Returns a version number for this property on <instance>, which
+        changes whenever its value does
+        """
+        return _token(instance, self.name)
+
+    def _evaluate(self, instance, previous):
+        reads = {}
+        _TRACKING.append(reads)
+        try:
+            value = self.fn(instance)
+            dependencies = [(s, k, _token(s, k)) for s, k in list(reads.values())]
+        finally:
+            _TRACKING.pop()
+
+        if previous is None or not _same(previous[0], value):
+            _bump(instance, self.name)
+        return value, dependencies
 
 
 class ImmediateObservableCollection(ObservableCollection):
@@ -135,6 +605,12 @@ class ViewCollection(ObservableCollection):
     expression updates the 'view', which is the current filtered version of the
     underlying container.
 
+    The filtered items are kept up to date as the collection changes: adding,
+    removing or replacing an item only tests that item against the filter, and
+    only update_filter() tests everything. The view is a Contents tuple with
+    its own change records, so a BoundCollection bound to it gets the changes
+    to the view rather than a reset.
+
     The class exposes the same events as ObservableCollection, as well as a
     viewChanged event which triggers when the filter is changed
     """
@@ -149,8 +625,153 @@ class ViewCollection(ObservableCollection):
             self.onViewChanged = Event(collection=self)
 
         self._filter = lambda p: p
-        self._last_count = len(self._internal_collection)
-        self._truncated = False
+        self._view_history = deque(maxlen=self.HISTORY)
+        self._refilter()
+
+    def _refilter(self):
+        """
+        Test every item against the filter. Returns the view changes (a RESET)
+        """
+        # _positions[n] is the index in the collection of the nth filtered
+        # item, so bisecting it maps collection indices to view indices
+        self._positions = []
+        self._filtered = []
+        for index, item in enumerate(self._internal_collection):
+            if self._filter(item):
+                self._positions.append(index)
+                self._filtered.append(item)
+        self._source_list = self._internal_collection
+        self._source_size = len(self._internal_collection)
+        self._view_cache = None
+        return [CollectionChange(CollectionChange.RESET, 0, self._windowed())]
+
+    def _windowed(self):
+        if self._max_size > 0:
+            return self._filtered[:self._max_size]
+        return self._filtered
+
+    def _shift(self, at, offset):
+        if at < len(self._positions):
+            self._positions[at:] = [p + offset for p in self._positions[at:]]
+
+    def _filter_insert(self, start, items):
+        at = bisect_left(self._positions, start)
+        self._shift(at, len(items))
+        passed = [(start + n, item) for n, item in enumerate(items) if self._filter(item)]
+        self._positions[at:at] = [index for index, _ in passed]
+        self._filtered[at:at] = [item for _, item in passed]
+        self._source_size += len(items)
+        return at, [item for _, item in passed]
+
+    def _filter_remove(self, start, count):
+        at = bisect_left(self._positions, start)
+        end = bisect_left(self._positions, start + count)
+        removed = self._filtered[at:end]
+        del self._positions[at:end]
+        del self._filtered[at:end]
+        self._shift(at, -count)
+        self._source_size -= count
+        return at, removed
+
+    def _filter_change(self, change):
+        """
+        Update the filtered items for one change to the collection. Returns
+        the matching changes to the view.
+        """
+        if change.action == CollectionChange.INSERT:
+            at, added = self._filter_insert(change.start, change.items)
+            return [CollectionChange(CollectionChange.INSERT, at, added)] if added else []
+
+        if change.action == CollectionChange.REMOVE:
+            at, removed = self._filter_remove(change.start, len(change.items))
+            return [CollectionChange(CollectionChange.REMOVE, at, removed)] if removed else []
+
+        if change.action == CollectionChange.REPLACE and len(change.items) == len(change.old_items):
+            # nothing moves, so only the replaced items need updating
+            result = []
+            for n, item in enumerate(change.items):
+                index = change.start + n
+                at = bisect_left(self._positions, index)
+                was = at < len(self._positions) and self._positions[at] == index
+                if self._filter(item):
+                    if was:
+                        old, self._filtered[at] = self._filtered[at], item
+                        result.append(CollectionChange(CollectionChange.REPLACE, at, (item,), (old,)))
+                    else:
+                        self._positions.insert(at, index)
+                        self._filtered.insert(at, item)
+                        result.append(CollectionChange(CollectionChange.INSERT, at, (item,)))
+                elif was:
+                    del self._positions[at]
+                    result.append(CollectionChange(CollectionChange.REMOVE, at, (self._filtered.pop(at),)))
+            return result
+
+        if change.action in (CollectionChange.REPLACE, CollectionChange.MOVE):
+            if change.action == CollectionChange.REPLACE:
+                old_at, removed = self._filter_remove(change.start, len(change.old_items))
+                new_at, added = self._filter_insert(change.start, change.items)
+            else:
+                old_at, removed = self._filter_remove(change.start, len(change.items))
+                new_at, added = self._filter_insert(change.destination, change.items)
+            if not removed and not added:
+                return []
+            if change.action == CollectionChange.MOVE and removed == added:
+                if old_at == new_at:
+                    return []
+                return [CollectionChange(CollectionChange.MOVE, old_at, added, destination=new_at)]
+            if old_at == new_at and len(removed) == len(added) == 1:
+                return [CollectionChange(CollectionChange.REPLACE, new_at, added, removed)]
+            result = [CollectionChange(CollectionChange.REMOVE, old_at, removed)] if removed else []
+            if added:
+                result.append(CollectionChange(CollectionChange.INSERT, new_at, added))
+            return result
+
+        return self._refilter()
+
+    def _size_change(self, change):
+        if change.action == CollectionChange.INSERT:
+            return len(change.items)
+        if change.action == CollectionChange.REMOVE:
+            return -len(change.items)
+        if change.action == CollectionChange.REPLACE:
+            return len(change.items) - len(change.old_items)
+        return 0
+
+    def _clip(self, changes):
+        """
+        With a limit, the view only changes if something happened in front of
+        the limit; if it did, report a reset of the truncated view
+        """
+        if self._max_size <= 0 or not changes:
+            return changes
+        for change in changes:
+            if change.start < self._max_size or \
+                    (change.destination is not None and change.destination < self._max_size):
+                return [CollectionChange(CollectionChange.RESET, 0, self._windowed())]
+        return []
+
+    def _changed(self, changes, **flags):
+        expected = self._source_size + sum(self._size_change(c) for c in changes)
+        if self._internal_collection is not self._source_list or len(self._internal_collection) != expected:
+            # someone has edited the internal collection directly
+            view_changes = self._refilter()
+        else:
+            view_changes = []
+            for change in changes:
+                view_changes.extend(self._filter_change(change))
+            view_changes = self._clip(view_changes)
+        self._view_changed(self._version + 1, view_changes)
+        super(ViewCollection, self)._changed(changes, **flags)
+
+    def _view_changed(self, version, changes):
+        self._view_history.append((version - 1, version, changes))
+        self._view_cache = None
+
+    def _validate(self):
+        if self._internal_collection is not self._source_list or \
+                len(self._internal_collection) != self._source_size:
+            self._version += 1
+            self._view_changed(self._version, self._refilter())
 
     @property
     def view(self):
@@ -158,22 +779,31 @@ class ViewCollection(ObservableCollection):
         Returns a tuple of all the items in this collection which pass the
         current filter. Bindable.
         """
-        filtered = itertools.ifilter(self._filter, self._internal_collection)
-        result = None
-        if self._max_size > 0:
-            result = tuple(itertools.islice(filtered, self._max_size))
-        else:
-            result = tuple(filtered)
-        self._last_count = len(result)
-        self._truncated = len(result) == self._max_size
-        return result
+        if _TRACKING:
+            _record(self, None)
+        self._validate()
+        if self._view_cache is None:
+            self._view_cache = Contents(self._windowed(), id(self), self._version, tuple(self._view_history))
+        return self._view_cache
+
+    @property
+    def contents(self):
+        """
+        The items which pass the filter (the same as 'view'). Bindable.
+        """
+        return self.view
 
     @property
     def viewCount(self):
         """
         The number of items currently passing the filter. Bindable
         """
-        return self._last_count
+        if _TRACKING:
+            _record(self, None)
+        self._validate()
+        if self._max_size > 0:
+            return min(len(self._filtered), self._max_size)
+        return len(self._filtered)
 
     @property
     def limit(self):
@@ -181,7 +811,7 @@ class ViewCollection(ObservableCollection):
 
     @property
     def is_truncated(self):
-        return self._truncated
+        return self._max_size > 0 and len(self._filtered) >= self._max_size
 
     def update_filter(self, filter_fn):
         """
@@ -192,13 +822,189 @@ class ViewCollection(ObservableCollection):
         else:
             self._filter = filter_fn
 
-        self._last_count = len(self.view)
+        self._version += 1
+        self._view_changed(self._version, self._refilter())
         self.update_bindings()
         self.onViewChanged()
 
     def __getitem__(self, item):
         return self.view.__getitem__(item)
 
+    def __iter__(self):
+        return iter(self.view)
+
+
+class WindowedView(ViewCollection):
+    """
+    A ViewCollection which only shows a window of <page_size> of the filtered
+    items, starting at <offset>. This is what a virtualized list should bind to
+    when the whole view is too big to display, or to copy into a new tuple
+    every time the collection changes:
+
+        assets = WindowedView(*scene_assets, page_size=50)
+        assets.update_filter(lambda a: a.type == 'rig')
+        gui_list.bind.collection < bind() < assets
+        label.bind.label < bind() < assets.bind.totalCount
+        ...
+        assets.page = 10
+
+    'view' holds only the items in the window, while totalCount is the number
+    of items which pass the filter. Changes outside the window produce no
+    change records. A single change inside the window is reported as inserts,
+    removals or replacements within it; changes in front of the window, batches
+    and scrolling are reported as a reset of the window.
+    """
+
+    def __init__(self, *items, **kwargs):
+        self._offset = max(0, kwargs.pop('offset', 0))
+        self._page_size = kwargs.pop('page_size', 100)
+        self._window = ()
+        super(WindowedView, self).__init__(*items, **kwargs)
+
+    def _windowed(self):
+        return self._filtered[self._offset:self._offset + self._page_size]
+
+    def _refilter(self):
+        result = super(WindowedView, self)._refilter()
+        self._window = result[0].items
+        return result
+
+    def _clip(self, changes):
+        old, self._window = self._window, tuple(self._windowed())
+        if not old and not self._window:
+            return []
+        if any(c.action == CollectionChange.RESET for c in changes):
+            return [CollectionChange(CollectionChange.RESET, 0, self._window)]
+        if len(changes) == 1:
+            return self._window_change(changes[0], old)
+        return self._window_reset(old)
+
+    def _window_reset(self, old):
+        """
+        A reset of the window, if its contents are not the same as <old>
+        """
+        if len(old) == len(self._window) and all(a is b for a, b in itertools.izip(old, self._window)):
+            return []
+        return [CollectionChange(CollectionChange.RESET, 0, self._window)]
+
+    def _window_change(self, change, old):
+        """
+        Returns the changes to the window <old> made by the single view change
+        <change>
+        """
+        start, end = self._offset, self._offset + self._page_size
+        reset = [CollectionChange(CollectionChange.RESET, 0, self._window)]
+        if change.action == CollectionChange.MOVE:
+            first, last = sorted((change.start, change.destination))
+            if last + len(change.items) <= start or first >= end:
+                return []
+            return reset
+
+        if change.start >= end:
+            return []
+        if change.action == CollectionChange.REPLACE:
+            if change.start + len(change.items) <= start:
+                return []
+            if change.start < start:
+                return reset
+            at = change.start - start
+            n = min(len(change.items), self._page_size - at)
+            return [CollectionChange(CollectionChange.REPLACE, at, change.items[:n], change.old_items[:n])]
+
+        if change.start < start:
+            return reset
+        at = change.start - start
+        if change.action == CollectionChange.INSERT:
+            entering = self._window[at:at + len(change.items)]
+            result = [CollectionChange(CollectionChange.INSERT, at, entering)]
+            overflow = len(old) + len(entering) - self._page_size
+            if overflow > 0:
+                result.append(CollectionChange(CollectionChange.REMOVE, self._page_size, old[-overflow:]))
+            return result
+
+        leaving = old[at:at + len(change.items)]
+        result = [CollectionChange(CollectionChange.REMOVE, at, leaving)]
+        kept = len(old) - len(leaving)
+        if len(self._window) > kept:
+            result.append(CollectionChange(CollectionChange.INSERT, kept, self._window[kept:]))
+        return result
+
+    def scroll_to(self, offset, page_size=None):
+        """
+        Move the window to start at <offset>, and optionally change its size
+        """
+        self._offset = max(0, offset)
+        if page_size is not None:
+            self._page_size = page_size
+        self._validate()
+        old, self._window = self._window, tuple(self._windowed())
+        self._version += 1
+        self._view_changed(self._version, self._window_reset(old))
+        self.update_bindings()
+        self.onViewChanged()
+
+    @property
+    def offset(self):
+        """
+        The index of the first filtered item in the window
+        """
+        return self._offset
+
+    @offset.setter
+    def offset(self, value):
+        self.scroll_to(value)
+
+    @property
+    def page_size(self):
+        return self._page_size
+
+    @page_size.setter
+    def page_size(self, value):
+        self.scroll_to(self._offset, value)
+
+    @property
+    def page(self):
+        """
+        The page (in units of page_size) the window starts on
+        """
+        return self._offset // self._page_size
+
+    @page.setter
+    def page(self, value):
+        self.scroll_to(value * self._page_size)
+
+    @property
+    def pageCount(self):
+        """
+        The number of pages needed for all of the filtered items. Bindable
+        """
+        return -(-self.totalCount // self._page_size)
+
+    @property
+    def totalCount(self):
+        """
+        The number of items which pass the filter, including those outside
+        the window. Bindable
+        """
+        if _TRACKING:
+            _record(self, None)
+        self._validate()
+        return len(self._filtered)
+
+    @property
+    def viewCount(self):
+        """
+        The number of items in the window. Bindable
+        """
+        if _TRACKING:
+            _record(self, None)
+        self._validate()
+        return len(self._window)
+
+    @property
+    def is_truncated(self):
+        return self.totalCount > self.viewCount
+
 
 class BoundCollection(Sequence, BindableObject):
     """
@@ -206,17 +1012,29 @@ class BoundCollection(Sequence, BindableObject):
     collection updates, the BoundCollection will fire appropriate update
     callbacks.
 
+    onCollectionChanged gets a 'changes' keyword: a list of CollectionChanges
+    since the last update if the new contents came from the same
+    ObservableCollection (see Contents), otherwise a single RESET.
     """
     _BIND_TGT = 'set_collection'
 
     def __init__(self):
         self._internal_collection = ()
+        self._source = None
         self.onCollectionChanged = MayaEvent()  # these are MayaEvents so they are thread safe... we hope
         self.widgetCreated = MayaEvent()
 
     def set_collection(self, new_contents):
+        changes = None
+        source = getattr(new_contents, 'source', None)
+        if source is not None and self._source is not None and source == self._source[0]:
+            changes = new_contents.changes_since(self._source[1])
+        self._source = (source, new_contents.version) if source is not None else None
+
         self._internal_collection = tuple([i for i in new_contents])
-        self.onCollectionChanged()
+        if changes is None:
+            changes = [CollectionChange(CollectionChange.RESET, 0, self._internal_collection)]
+        self.onCollectionChanged(changes=changes)
 
     def __iter__(self):
         for item in self._internal_collection:
@@ -244,5 +1062,243 @@ class ImmediateBoundCollection(BoundCollection):
 
     def __init__(self):
         self._internal_collection = ()
+        self._source = None
         self.onCollectionChanged = Event()  # these are MayaEvents so they are thread safe... we hope
         self.onWidgetCreated = Event()
+
+
+class SortedView(Sequence, BindableObject):
+    """
+    A read-only view of a collection which stays sorted. Bind it to an
+    ObservableCollection (or pass the collection in) and name one or more key
+    functions:
+
+        assets = ObservableCollection(*scene_assets)
+        ordered = SortedView(assets, sort_by='name', name=lambda a: a.name, size=lambda a: a.size)
+        ordered.sort_by('size', reverse=True)
+        gui_list.bind.collection < bind() < ordered
+
+    Every key is computed once, when an item arrives, and the view keeps an
+    order for each key. Items added to or replaced in the collection are put
+    in place with a binary search rather than by resorting, and find() and
+    position() look items up by key value in O(log n). Items with equal keys
+    stay in the order they arrived.
+
+    If an item changes in a way which affects its keys without being replaced
+    in the collection, call refresh(item).
+
+    Like ViewCollection, 'view' is a Contents tuple with change records.
+    """
+    _BIND_SRC = 'view'
+    _BIND_TGT = 'set_collection'
+    _version = 0
+    HISTORY = 32
+
+    def __init__(self, source=None, sort_by=None, reverse=False, synchronous=False, **keys):
+        self._keys = keys or {'value': lambda item: item}
+        if sort_by is None and len(self._keys) == 1:
+            sort_by = list(self._keys)[0]
+        if sort_by not in self._keys:
+            raise ValueError("sort_by must be one of %s" % sorted(self._keys))
+        self._sort_key = sort_by
+        self._reverse = reverse
+        self._counter = itertools.count()
+        self._source = None
+        self._history = deque(maxlen=self.HISTORY)
+        self._view_cache = None
+        self._rebuild(())
+        self.onCollectionChanged = Event(collection=self) if synchronous else MayaEvent(collection=self)
+        if source is not None:
+            binding = self < bind() < source
+            binding()
+
+    def _rebuild(self, items):
+        # _entries are serial numbers in collection order; each key has a
+        # sorted list of (key, serial) and a dictionary of serial -> key
+        self._entries = [next(self._counter) for _ in items]
+        self._items = dict(itertools.izip(self._entries, items))
+        self._cache = {}
+        self._orders = {}
+        for name, fn in self._keys.items():
+            cache = self._cache[name] = dict((serial, fn(self._items[serial])) for serial in self._entries)
+            self._orders[name] = sorted((k, serial) for serial, k in cache.iteritems())
+        self._view_cache = None
+
+    def _view_index(self, position, size):
+        return size - 1 - position if self._reverse else position
+
+    def _add(self, index, item):
+        """
+        add <item> at <index> in collection order; returns its index in the view
+        """
+        serial = next(self._counter)
+        self._entries.insert(index, serial)
+        self._items[serial] = item
+        result = 0
+        for name, fn in self._keys.items():
+            entry = (fn(item), serial)
+            self._cache[name][serial] = entry[0]
+            order = self._orders[name]
+            position = bisect_left(order, entry)
+            order.insert(position, entry)
+            if name == self._sort_key:
+                result = self._view_index(position, len(order))
+        return result
+
+    def _remove(self, index):
+        """
+        remove the item at <index> in collection order; returns its index in
+        the view and the item
+        """
+        serial = self._entries.pop(index)
+        result = 0
+        for name in self._keys:
+            order = self._orders[name]
+            position = bisect_left(order, (self._cache[name].pop(serial), serial))
+            if name == self._sort_key:
+                result = self._view_index(position, len(order))
+            del order[position]
+        return result, self._items.pop(serial)
+
+    def _apply(self, change, view_changes):
+        if change.action == CollectionChange.INSERT:
+            for n, item in enumerate(change.items):
+                at = self._add(change.start + n, item)
+                _merge(view_changes, CollectionChange(CollectionChange.INSERT, at, (item,)))
+
+        elif change.action == CollectionChange.REMOVE:
+            for _ in change.items:
+                at, item = self._remove(change.start)
+                _merge(view_changes, CollectionChange(CollectionChange.REMOVE, at, (item,)))
+
+        elif change.action == CollectionChange.REPLACE and len(change.items) != len(change.old_items):
+            self._apply(CollectionChange(CollectionChange.REMOVE, change.start, change.old_items), view_changes)
+            self._apply(CollectionChange(CollectionChange.INSERT, change.start, change.items), view_changes)
+
+        elif change.action == CollectionChange.REPLACE:
+            for n, item in enumerate(change.items):
+                old_at, old = self._remove(change.start + n)
+                at = self._add(change.start + n, item)
+                if at == old_at:
+                    view_changes.append(CollectionChange(CollectionChange.REPLACE, at, (item,), (old,)))
+                else:
+                    view_changes.append(CollectionChange(CollectionChange.REMOVE, old_at, (old,)))
+                    view_changes.append(CollectionChange(CollectionChange.INSERT, at, (item,)))
+
+        elif change.action == CollectionChange.MOVE:
+            # the sorted orders don't depend on collection order
+            moved = self._entries[change.start:change.start + len(change.items)]
+            del self._entries[change.start:change.start + len(change.items)]
+            self._entries[change.destination:change.destination] = moved
+
+        else:
+            self._rebuild(change.items)
+            del view_changes[:]
+            view_changes.append(CollectionChange(CollectionChange.RESET, 0, self._ordered()))
+
+    def set_collection(self, new_contents):
+        changes = None
+        source = getattr(new_contents, 'source', None)
+        if source is not None and self._source is not None and source == self._source[0]:
+            changes = new_contents.changes_since(self._source[1])
+        self._source = (source, new_contents.version) if source is not None else None
+
+        view_changes = []
+        for change in changes or ():
+            self._apply(change, view_changes)
+        if changes is None or len(self._entries) != len(new_contents):
+            self._apply(CollectionChange(CollectionChange.RESET, 0, new_contents), view_changes)
+        self._changed(view_changes)
+
+    def _changed(self, view_changes):
+        if not view_changes:
+            return
+        for change in view_changes:
+            change.items = tuple(change.items)
+        self._version += 1
+        self._history.append((self._version - 1, self._version, view_changes))
+        self._view_cache = None
+        self.update_bindings()
+        self.onCollectionChanged(changes=view_changes)
+
+    def sort_by(self, name, reverse=False):
+        """
+        Order the view by the key <name>, descending if <reverse> is true
+        """
+        if name not in self._keys:
+            raise ValueError("unknown sort key '%s'" % name)
+        self._sort_key = name
+        self._reverse = reverse
+        self._view_cache = None
+        self._changed([CollectionChange(CollectionChange.RESET, 0, self._ordered())])
+
+    @property
+    def sort_key(self):
+        return self._sort_key
+
+    def refresh(self, item):
+        """
+        Recompute the keys for <item> (which must be in the collection) and
+        move it if its place in the view has changed
+        """
+        view_changes = []
+        for index, serial in enumerate(self._entries):
+            if self._items[serial] is item:
+                self._apply(CollectionChange(CollectionChange.REPLACE, index, (item,), (item,)), view_changes)
+        self._changed([c for c in view_changes if c.action != CollectionChange.REPLACE])
+
+    def find(self, value, key=None):
+        """
+        Returns a list of the items whose key <key> (by default, the current
+        sort key) equals <value>, in key order
+        """
+        order = self._orders[key or self._sort_key]
+        result = []
+        position = bisect_left(order, (value,))
+        while position < len(order) and order[position][0] == value:
+            result.append(self._items[order[position][1]])
+            position += 1
+        return result
+
+    def position(self, value):
+        """
+        Returns the index in the view of the first item whose sort key is
+        <value>, or of where one would be
+        """
+        order = self._orders[self._sort_key]
+        if self._reverse:
+            return len(order) - bisect_left(order, (value, _LAST))
+        return bisect_left(order, (value,))
+
+    def _ordered(self):
+        ordered = [self._items[serial] for _, serial in self._orders[self._sort_key]]
+        if self._reverse:
+            ordered.reverse()
+        return ordered
+
+    @property
+    def view(self):
+        """
+        The items in sorted order, as a Contents tuple. Bindable
+        """
+        if _TRACKING:
+            _record(self, None)
+        if self._view_cache is None:
+            self._view_cache = Contents(self._ordered(), id(self), self._version, tuple(self._history))
+        return self._view_cache
+
+    @property
+    def count(self):
+        return len(self)
+
+    def change_token(self, name):
+        return self._version
+
+    def __getitem__(self, item):
+        return self.view[item]
+
+    def __iter__(self):
+        return iter(self.view)
+
+    def __len__(self):
+        return len(self._entries)
@@ -13,6 +13,15 @@ class MGuiAttributeError(AttributeError):
     pass
 
 
+def _edited(obj):
+    """
+    tell a control an edit was made through one of its properties (see Control.change_token)
+    """
+    edited = getattr(obj, '_edited', None)
+    if edited is not None:
+        edited()
+
+
 class CtlProperty(object):
     """
     Property descriptor.  When applied to a Control-derived class, invokes the
@@ -41,6 +50,7 @@ class CtlProperty(object):
             self.command(obj.widget, **{'e': True, self.flag: value})
         except RuntimeError as e:
             raise MGuiAttributeError("Unable to set {0} on {1}".format(self.flag, obj), e)
+        _edited(obj)
 
 
 class WrappedCtlProperty(object):
@@ -68,6 +78,7 @@ class WrappedCtlProperty(object):
             self.command(obj.widget, **{'e': True, self.flag: value})
         except RuntimeError as e:
             raise MGuiAttributeError("Unable to set {0} on {1}".format(self.flag, obj), e)
+        _edited(obj)
 
 
 class CallbackProperty(object):
@@ -85,6 +96,12 @@ class CallbackProperty(object):
 
     button.command = events.MayaEvent(target = 'pCube1', distance = 2.0)
 
+    or use one of the rate-limited event types:
+
+    slider.dragCommand = events.ThrottledEvent(hz = 30)
+
+    Manually assigned events get the same 'sender' metadata as the default
+    ones, unless they already have a sender.
     """
 
     def __init__(self, key):
@@ -105,6 +122,8 @@ class CallbackProperty(object):
     def __set__(self, obj, value):
         # if not isinstance(value, Event):
         # raise ValueError('Callback properties must be instances of mGui.events.Event')
+        if isinstance(value, Event):
+            value.data.setdefault('sender', weakref.proxy(obj))
         obj.callbacks[self.key] = value
         obj.register_callback(self.key, obj.callbacks[self.key])
 
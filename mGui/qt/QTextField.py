@@ -1,10 +1,7 @@
 __author__ = 'Steve'
 
-import time
-
 from mGui.core.controls import TextField
-from mGui.events import Event
-from mGui.scriptJobs import Idle
+from mGui.events import Event, DebouncedEvent
 from mGui.qt._compat import as_qt_object, QtCore
 from mGui.qt._properties import QtSignalProperty
 
@@ -12,33 +9,25 @@ from mGui.qt._properties import QtSignalProperty
 class InputBuffer(object):
 
     '''
-    accumulate inputs until a certain amount of time passes
+    accumulate inputs until <interval> seconds pass without new input, then
+    call <fn> with the latest input if it has changed. <parent> is not used;
+    it's kept for compatibility
     '''
 
     def __init__(self, parent, fn, interval=1):
-        self.last = time.time()
         self.interval = interval
         self.fn = fn
-        self.buffer = []
-        self.idleEvent = Idle()
-        self.idleEvent += self.update
-        self.idleEvent.start(p=parent)
         self.previous_value = None
+        self.debounced = DebouncedEvent(ms=interval * 1000)
+        self.debounced += self.update
 
     def handle(self, *args, **_):
-        self.buffer.append(args[0])
-
-    def update(self, *_, **__):
-        if time.time() - self.last < self.interval:
-            return
+        self.debounced(args[0])
 
-        if self.buffer:
-            previous = self.previous_value
-            self.previous_value = self.buffer[-1]
-            if self.previous_value != previous:
-                self.fn(self.previous_value)
-                self.buffer = []
-        self.last = time.time()
+    def update(self, value, *_, **__):
+        if value != self.previous_value:
+            self.previous_value = value
+            self.fn(value)
 
 
 class QTextField(TextField):
@@ -86,7 +75,7 @@ class QTextField(TextField):
 
         if interval:
             self.textBufferChanged = Event(**{'sender': self})
-            self.buffer = InputBuffer(self, self.textBufferChanged)
+            self.buffer = InputBuffer(self, self.textBufferChanged, interval)
             self.textChanged += self.buffer.handle
 
 
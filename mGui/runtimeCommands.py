@@ -166,6 +166,125 @@ def fire_callback(name, *args, **kwargs):
         cmds.warning("no RuntimeEvent named %s. Create one using RuntimeEvent.create" % name)
 
 
+class MessageBus(object):
+    """
+    A publish / subscribe message bus with hierarchical, dot-separated topics.
+
+    Subscriptions can use wildcards:  '*' matches exactly one topic segment and
+    '#' matches zero or more segments:
+
+        import mGui.runtimeCommands as rc
+
+        def on_publish(*args, **kwargs):
+            print 'published', kwargs['topic']
+
+        rc.BUS.subscribe('asset.*.published', on_publish)
+        rc.BUS.subscribe('scene.selection.#', on_selection)
+
+        rc.BUS.publish('asset.rig.published', path = 'c:/rigs/bob.ma')
+
+    Every subscription pattern is an mGui.events.Event stored in the
+    RuntimeEvent registry under the pattern name, so handlers follow the usual
+    event rules (weak references, *args, **kwargs signature).  The handlers
+    get the published topic in the 'topic' keyword.
+
+    Patterns are stored in a trie, so publishing only visits the branches
+    which can match the topic instead of testing every subscription.
+    """
+
+    class _Node(object):
+        __slots__ = ('children', 'event')
+
+        def __init__(self):
+            self.children = {}
+            self.event = None
+
+    def __init__(self, registry=None):
+        self.registry = RuntimeEvent.REGISTRY if registry is None else registry
+        self.deliveries = {}
+        '''number of handler calls made for each published topic'''
+        self._root = self._Node()
+
+    def subscribe(self, pattern, handler):
+        """
+        Add <handler> to the Event for <pattern>, creating it if needed. Returns the Event.
+        """
+        node = self._root
+        for part in pattern.split('.'):
+            node = node.children.setdefault(part, self._Node())
+        if node.event is None:
+            node.event = self.registry.setdefault(pattern, events.Event(pattern=pattern))
+        node.event += handler
+        return node.event
+
+    def unsubscribe(self, pattern, handler):
+        """
+        Remove <handler> from the Event for <pattern>. Ignores patterns with no subscriptions
+        """
+        node = self._find(pattern)
+        if node is not None and node.event is not None:
+            node.event -= handler
+
+    def subscribers(self, topic):
+        """
+        Returns a list of the Events whose patterns match <topic>
+        """
+        found = []
+        self._match(self._root, topic.split('.'), 0, found, set())
+        return found
+
+    def publish(self, *args, **kwargs):
+        """
+        publish(topic, *args, **kwargs)
+
+        Fire every Event whose pattern matches <topic>, passing <args> and
+        <kwargs> along with the topic. Returns the number of handlers called.
+
+        'topic' is reserved for the published topic, so it can't be used as a
+        keyword in the message.
+        """
+        if not args:
+            raise TypeError("publish() needs a topic")
+        if 'topic' in kwargs:
+            raise ValueError("'topic' is reserved for the published topic and can't be a message keyword")
+        topic, args = args[0], args[1:]
+        delivered = 0
+        for event in self.subscribers(topic):
+            delivered += len(event)
+            event(*args, topic=topic, **kwargs)
+        self.deliveries[topic] = self.deliveries.get(topic, 0) + delivered
+        return delivered
+
+    def _find(self, pattern):
+        node = self._root
+        for part in pattern.split('.'):
+            node = node.children.get(part)
+            if node is None:
+                return None
+        return node
+
+    def _match(self, node, parts, index, found, seen):
+        if index == len(parts):
+            if node.event is not None and id(node.event) not in seen:
+                seen.add(id(node.event))
+                found.append(node.event)
+        else:
+            for key in (parts[index], '*'):
+                child = node.children.get(key)
+                if child is not None:
+                    self._match(child, parts, index + 1, found, seen)
+
+        multi = node.children.get('#')
+        if multi is not None:
+            # '#' can swallow any number of the remaining segments, including none
+            for next_index in range(index, len(parts) + 1):
+                self._match(multi, parts, next_index, found, seen)
+
+
+BUS = MessageBus()
+'''The default MessageBus, shared by all tools'''
+
+
 class Hotkeyable(object):
     '''
     Decorator which calls create_runtime_command on the decorated function, allowing it to be used as a Maya 
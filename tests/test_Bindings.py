@@ -6,8 +6,16 @@ Created on Mar 1, 2014
 import maya.standalone
 
 maya.standalone.initialize()
+import gc
+import logging
+import sys
+import threading
+import time
+import types
+import maya.utils
 import mGui.bindings as bindings
-from unittest import TestCase
+import mGui.events as events
+from unittest import TestCase, skipIf
 
 import maya.cmds as cmds
 import pymel.core as pm
@@ -287,6 +295,48 @@ class TestAccessorFactory(TestCase):
         assert isinstance(accessor, bindings.DictAccessor)
         assert accessor.pull() == 999
 
+    class CountingAccessor(bindings.Accessor):
+        TESTS = []
+
+        @classmethod
+        def can_access(cls, datum, field_name):
+            cls.TESTS.append(field_name)
+            return False
+
+    def test_factory_caches_by_type(self):
+        class Dummy(object):
+            def __init__(self):
+                self.Property = 999
+
+        self.CountingAccessor.TESTS[:] = []
+        factory = bindings.AccessorFactory(self.CountingAccessor)
+        assert factory.accessor_class(Dummy(), 'Property') is bindings.Accessor
+        assert factory.accessor_class(Dummy(), 'Property') is bindings.Accessor
+        assert len(self.CountingAccessor.TESTS) == 1
+
+    def test_factory_cache_checks_instance(self):
+        class Dummy(object):
+            pass
+
+        has_it = Dummy()
+        has_it.Property = 1
+        factory = bindings.AccessorFactory()
+        assert factory.accessor_class(has_it, 'Property') is bindings.Accessor
+        assert factory.accessor_class(Dummy(), 'Property') is None
+
+    def test_factory_cache_cleared_when_tests_change(self):
+        class Dummy(object):
+            def __init__(self):
+                self.Property = 999
+
+        class Custom(bindings.Accessor):
+            pass
+
+        factory = bindings.AccessorFactory()
+        assert factory.accessor_class(Dummy(), 'Property') is bindings.Accessor
+        factory.tests.insert(0, Custom)
+        assert factory.accessor_class(Dummy(), 'Property') is Custom
+
     def test_cmds_accessor(self):
         cmds.file(new=True, f=True)
 
@@ -391,6 +441,154 @@ class TestBindings(TestCase):
         tester.invalidate()
         assert not tester()
 
+    def test_cached_binding_skips_unchanged(self):
+        ex = self.Example('fred', 'flintstone')
+        ex2 = self.Example('barney', 'rubble')
+        tester = bindings.Binding(bindings.get_accessor(ex, 'name'), bindings.get_accessor(ex2, 'val'), cache=True)
+        tester()
+        ex2.val = 'changed elsewhere'
+        tester()
+        assert ex2.val == 'changed elsewhere'
+        assert tester.pushed == 1 and tester.skipped == 1
+        ex.name = 'wilma'
+        tester()
+        assert ex2.val == 'wilma'
+        assert tester.pushed == 2
+
+    def test_cached_binding_reset(self):
+        ex = self.Example('fred', 'flintstone')
+        ex2 = self.Example('barney', 'rubble')
+        tester = bindings.Binding(bindings.get_accessor(ex, 'name'), bindings.get_accessor(ex2, 'val'), cache=True)
+        tester()
+        ex2.val = 'changed elsewhere'
+        tester.reset_cache()
+        tester()
+        assert ex2.val == 'fred'
+
+    def test_cached_binding_hash_key(self):
+        ex = self.Example([1, 2, 3], None)
+        ex2 = self.Example(None, None)
+        tester = bindings.BindProxy(ex, 'name') > bindings.bind(cache=bindings.hash_key) > (ex2, 'val')
+        tester()
+        tester()
+        assert tester.skipped == 1
+        ex.name.append(4)
+        tester()
+        assert ex2.val == [1, 2, 3, 4]
+        assert tester.pushed == 2
+
+    def test_hash_key_pushes_values_with_colliding_hashes(self):
+        assert hash(-1) == hash(-2)
+        ex = self.Example([-1], None)
+        ex2 = self.Example(None, None)
+        tester = bindings.BindProxy(ex, 'name') > bindings.bind(cache=bindings.hash_key) > (ex2, 'val')
+        tester()
+        ex.name = [-2]
+        tester()
+        assert ex2.val == [-2]
+        ex.name[0] = -1
+        tester()
+        assert ex2.val == [-1]
+        assert tester.pushed == 3 and tester.skipped == 0
+
+    def test_hash_key_pushes_unhashable_values(self):
+        ex = self.Example([[1], [2]], None)
+        ex2 = self.Example(None, None)
+        with bindings.BindingContext(auto_update=False) as ctx:
+            tester = bindings.BindProxy(ex, 'name') > bindings.bind(cache=bindings.hash_key) > (ex2, 'val')
+        ctx.update()
+        ctx.update()
+        assert ex2.val == [[1], [2]]
+        assert tester.pushed == 2 and tester.skipped == 0
+        assert len(ctx.bindings) == 1
+
+    def test_failed_push_is_not_counted(self):
+        class ReadOnly(object):
+            val = property(lambda self: 0)
+
+        bindings.BREAK_ON_ACCESS_FAILURE = False
+        ex = self.Example('fred', 'flintstone')
+        for cache in (None, True):
+            tester = bindings.Binding(bindings.get_accessor(ex, 'name'), bindings.get_accessor(ReadOnly(), 'val'),
+                                      cache=cache)
+            tester()
+            assert tester.pushed == 0
+
+    def test_uncached_binding_always_pushes(self):
+        ex = self.Example('fred', 'flintstone')
+        ex2 = self.Example('barney', 'rubble')
+        tester = bindings.Binding(bindings.get_accessor(ex, 'name'), bindings.get_accessor(ex2, 'val'))
+        tester()
+        tester()
+        assert tester.pushed == 2 and tester.skipped == 0
+
+
+class TestPushBindings(TestCase):
+    class Example(object):
+        def __init__(self, name, val):
+            self.name = name
+            self.val = val
+
+    class NotifyingAccessor(bindings.Accessor):
+        def subscribe(self, handler):
+            self.handler = handler
+            return True
+
+        def unsubscribe(self, handler):
+            self.handler = None
+
+    def test_binding_subscribes_to_source(self):
+        ex = self.Example('fred', 'flintstone')
+        ex2 = self.Example('barney', 'rubble')
+        src = self.NotifyingAccessor(ex, 'name')
+        tester = bindings.Binding(src, bindings.get_accessor(ex2, 'val'), live=True)
+        ex.name = 'wilma'
+        src.handler()
+        assert ex2.val == 'wilma'
+
+    def test_subscription_is_opt_in(self):
+        ex = self.Example('fred', 'flintstone')
+        ex2 = self.Example('barney', 'rubble')
+        src = self.NotifyingAccessor(ex, 'name')
+        src.handler = None
+        bindings.Binding(src, bindings.get_accessor(ex2, 'val'))
+        assert src.handler is None
+
+    def test_invalidate_unsubscribes(self):
+        ex = self.Example('fred', 'flintstone')
+        ex2 = self.Example('barney', 'rubble')
+        src = self.NotifyingAccessor(ex, 'name')
+        tester = bindings.Binding(src, bindings.get_accessor(ex2, 'val'), live=True)
+        tester.invalidate()
+        assert src.handler is None
+
+    def test_cmds_attribute_pushes(self):
+        # attribute changes are delivered through executeDeferred, so run the
+        # deferred queue by hand before checking the target
+        deferred = []
+        execute_deferred = maya.utils.executeDeferred
+        maya.utils.executeDeferred = lambda fn, *args, **kwargs: deferred.append((fn, args, kwargs))
+
+        def flush():
+            while deferred:
+                fn, args, kwargs = deferred.pop(0)
+                fn(*args, **kwargs)
+
+        try:
+            ex = self.Example('cube', 0)
+            cmds.file(new=True, f=True)
+            cmds.polyCube()
+            tester = 'pCube1.tx' > bindings.bind(live=True) > bindings.BindProxy(ex, 'val')
+            cmds.setAttr('pCube1.tx', 5)
+            flush()
+            assert ex.val == 5
+            tester.invalidate()
+            cmds.setAttr('pCube1.tx', 7)
+            flush()
+            assert ex.val == 5
+        finally:
+            maya.utils.executeDeferred = execute_deferred
+
 
 class TestBindable(TestCase):
     class Example(bindings.Bindable):
@@ -640,6 +838,664 @@ class TestBindingCollection(TestCase):
         assert not guys == {'fred': 'fred', 'barney': 'barney'}
 
 
+class TestBindingGraph(TestCase):
+    def setUp(self):
+        bindings.BREAK_ON_BIND_FAILURE = False
+        bindings.BREAK_ON_ACCESS_FAILURE = True
+
+    def tearDown(self):
+        bindings.BREAK_ON_BIND_FAILURE = False
+        bindings.BREAK_ON_ACCESS_FAILURE = True
+
+    class Example(bindings.BindableObject):
+        _BIND_SRC = 'val'
+        _BIND_TGT = 'val'
+
+        def __init__(self, val):
+            self.val = val
+
+    def test_chain_updates_in_one_pass(self):
+        a, b, c = self.Example('a'), self.Example('b'), self.Example('c')
+        with bindings.BindingContext(auto_update=False) as ctx:
+            b > bindings.bind() > c  # added before the binding which feeds it
+            a > bindings.bind() > b
+        ctx.update()
+        assert c.val == 'a'
+
+    def test_propagate_only_downstream(self):
+        a, b, c = self.Example('a'), self.Example('b'), self.Example('c')
+        x, y = self.Example('x'), self.Example('y')
+        with bindings.BindingContext(auto_update=False) as ctx:
+            a > bindings.bind() > b
+            b > bindings.bind() > c
+            x > bindings.bind() > y
+        assert ctx.propagate(a & 'val') == 2
+        assert c.val == 'a'
+        assert y.val == 'y'
+
+    def test_propagate_unrelated(self):
+        a, b = self.Example('a'), self.Example('b')
+        with bindings.BindingContext(auto_update=False) as ctx:
+            a > bindings.bind() > b
+        assert ctx.propagate(b & 'val') == 0
+        assert b.val == 'b'
+
+    def test_two_way_cycle_is_reported(self):
+        a, b, c = self.Example('a'), self.Example('b'), self.Example('c')
+        with bindings.BindingContext(auto_update=False) as ctx:
+            first = a | bindings.bind() | b
+            second = b | bindings.bind() | c
+        ctx.update()
+        assert len(ctx.graph.cycles) == 1
+        assert set(ctx.graph.cycles[0]) == set([first, second])
+
+    def test_failed_bindings_leave_graph(self):
+        a, b = self.Example('a'), self.Example('b')
+        with bindings.BindingContext(auto_update=False) as ctx:
+            a > bindings.bind() > b
+            del a
+        ctx.update()
+        assert len(ctx.graph) == 0
+
+
+class StandInScene(object):
+    """
+    A stand-in for the parts of maya.cmds used by CmdsAccessors, with transform
+    nodes that have translate, rotate and scale compounds. Each maya call costs
+    <call_cost> seconds, and setting a plug in 'connections' sets the plugs it
+    drives.
+    """
+    COMPOUNDS = {'translate': ('translateX', 'translateY', 'translateZ'),
+                 'rotate': ('rotateX', 'rotateY', 'rotateZ'),
+                 'scale': ('scaleX', 'scaleY', 'scaleZ')}
+    SHORT = {'tx': 'translateX', 'ty': 'translateY', 'tz': 'translateZ',
+             'rx': 'rotateX', 'ry': 'rotateY', 'rz': 'rotateZ',
+             'sx': 'scaleX', 'sy': 'scaleY', 'sz': 'scaleZ'}
+    PATCHED = ('getAttr', 'setAttr', 'attributeQuery', 'ls', 'nodeType', 'listAttr')
+
+    def __init__(self, node_count, call_cost=0.0):
+        self.get_calls = 0
+        self.maya_calls = 0
+        self.call_cost = call_cost
+        self.connections = {}
+        self.values = {}
+        self.nodes = set('node%i' % n for n in range(node_count))
+        for n in range(node_count):
+            for idx, attr in enumerate(sorted(self.SHORT.values())):
+                self.values[('node%i' % n, attr)] = float(n + idx)
+
+    def install(self):
+        self._originals = dict((k, getattr(cmds, k, None)) for k in self.PATCHED)
+        for k in self.PATCHED:
+            setattr(cmds, k, getattr(self, k))
+
+    def uninstall(self):
+        for k, v in self._originals.items():
+            setattr(cmds, k, v)
+
+    def _call(self):
+        self.maya_calls += 1
+        if self.call_cost:
+            end = time.time() + self.call_cost
+            while time.time() < end:
+                pass
+
+    def getAttr(self, plug):
+        self._call()
+        self.get_calls += 1
+        node, attr = plug.split('.')
+        attr = self.SHORT.get(attr, attr)
+        if attr in self.COMPOUNDS:
+            return [tuple(self.values[(node, c)] for c in self.COMPOUNDS[attr])]
+        return self.values[(node, attr)]
+
+    def setAttr(self, plug, value):
+        node, attr = plug.split('.')
+        self.values[(node, self.SHORT.get(attr, attr))] = value
+        for driven in self.connections.get(plug, ()):
+            self.setAttr(driven, value)
+
+    def ls(self, node):
+        return [node] if node in self.nodes else []
+
+    def nodeType(self, node):
+        self._call()
+        if node not in self.nodes:
+            raise RuntimeError('No object matches name: %s' % node)
+        return 'transform'
+
+    def listAttr(self, node, userDefined=False):
+        return None
+
+    def attributeQuery(self, attr, node=None, type=None, listParent=False, listChildren=False, longName=False,
+                       w=False):
+        self._call()
+        attr = self.SHORT.get(attr, attr)
+        if w:
+            return (node, attr) in self.values or attr in self.COMPOUNDS
+        if listParent:
+            return [p for p, kids in self.COMPOUNDS.items() if attr in kids] or None
+        if listChildren:
+            return list(self.COMPOUNDS.get(attr, ())) or None
+        if longName:
+            return attr
+
+
+class TestReadBatch(TestCase):
+    NODES = 56  # 504 bindings
+
+    def setUp(self):
+        self.scene = StandInScene(self.NODES)
+        self.scene.install()
+        bindings.BREAK_ON_BIND_FAILURE = True
+
+    def tearDown(self):
+        self.scene.uninstall()
+        bindings.BindingContext.BATCH_READS = True
+        bindings.BREAK_ON_BIND_FAILURE = False
+
+    def make_context(self, attrs=None):
+        self.results = {}
+        with bindings.BindingContext(auto_update=False) as ctx:
+            for n in range(self.NODES):
+                for attr in attrs or sorted(self.scene.SHORT):
+                    bindings.Binding(bindings.CmdsAccessor('node%i' % n, attr),
+                                     bindings.DictAccessor(self.results, 'node%i.%s' % (n, attr)))
+        return ctx
+
+    def timed_update(self, ctx):
+        ctx.update()  # first pass caches the attribute structure
+        self.scene.get_calls = self.scene.maya_calls = 0
+        start = time.time()
+        ctx.update()
+        return time.time() - start, self.scene.get_calls, self.scene.maya_calls
+
+    def test_batched_values_match(self):
+        ctx = self.make_context()
+        ctx.update()
+        assert self.results['node3.ty'] == self.scene.values[('node3', 'translateY')]
+        assert self.results['node7.sz'] == self.scene.values[('node7', 'scaleZ')]
+
+    def test_writes_discard_batched_values(self):
+        results = {}
+        with bindings.BindingContext(auto_update=False) as ctx:
+            bindings.Binding(bindings.DictAccessor({'v': 99.0}, 'v'), bindings.CmdsAccessor('node0', 'tx'))
+            bindings.Binding(bindings.CmdsAccessor('node0', 'tx'), bindings.DictAccessor(results, 'tx'))
+            bindings.Binding(bindings.CmdsAccessor('node0', 'ty'), bindings.DictAccessor(results, 'ty'))
+        ctx.update()
+        assert results['tx'] == 99.0
+
+    def test_writes_to_connected_nodes_discard_batched_values(self):
+        # node0.tx drives node1.tx, so writing node0 must not leave a stale node1
+        self.scene.connections['node0.tx'] = ['node1.tx']
+        results = {}
+        with bindings.BindingContext(auto_update=False) as ctx:
+            bindings.Binding(bindings.DictAccessor({'v': 99.0}, 'v'), bindings.CmdsAccessor('node0', 'tx'))
+            bindings.Binding(bindings.CmdsAccessor('node1', 'tx'), bindings.DictAccessor(results, 'tx'))
+            bindings.Binding(bindings.CmdsAccessor('node1', 'ty'), bindings.DictAccessor(results, 'ty'))
+        ctx.update()
+        assert results['tx'] == 99.0
+
+    def test_structure_is_cached_by_node_type(self):
+        ctx = self.make_context()
+        ctx.update()
+        assert ('transform', 'tx') in bindings.ReadBatch._STRUCTURE
+        assert not [k for k in bindings.ReadBatch._STRUCTURE if k[0].startswith('node')]
+
+    def test_node_types_are_kept_by_the_context(self):
+        ctx = self.make_context()
+        ctx.update()
+        assert len(ctx._node_types) == self.NODES
+        calls = []
+        cmds.nodeType = lambda node: calls.append(node)
+        ctx.update()
+        assert calls == []
+
+    def test_single_attributes_are_not_batched(self):
+        ctx = self.make_context(['tx'])
+        ctx.update()
+        assert ctx._node_types == {}
+        assert self.scene.maya_calls == self.NODES
+
+    def test_benchmark_batched_reads(self):
+        # 50 microseconds a call is typical for cmds.getAttr in a real scene
+        self.scene.call_cost = 0.00005
+        ctx = self.make_context()
+        bindings.BindingContext.BATCH_READS = False
+        plain_time, plain_gets, plain_calls = self.timed_update(ctx)
+        bindings.BindingContext.BATCH_READS = True
+        batch_time, batch_gets, batch_calls = self.timed_update(ctx)
+        print "\n%i bindings: %i maya calls in %.4fs unbatched, %i calls in %.4fs batched (%.1fx faster)" % (
+            len(ctx.bindings), plain_calls, plain_time, batch_calls, batch_time, plain_time / batch_time)
+        assert plain_gets == len(ctx.bindings)
+        assert batch_gets * 3 == plain_gets
+        assert batch_calls < plain_calls / 2
+        assert batch_time < plain_time
+
+
+    def test_benchmark_sparse_reads(self):
+        # one attribute per node: nothing to merge, so batching must cost nothing
+        self.scene.call_cost = 0.00005
+        ctx = self.make_context(['tx'])
+        bindings.BindingContext.BATCH_READS = False
+        plain_time, plain_gets, plain_calls = self.timed_update(ctx)
+        bindings.BindingContext.BATCH_READS = True
+        batch_time, batch_gets, batch_calls = self.timed_update(ctx)
+        print "\n%i sparse bindings: %i maya calls in %.4fs unbatched, %i calls in %.4fs batched" % (
+            len(ctx.bindings), plain_calls, plain_time, batch_calls, batch_time)
+        assert batch_calls == plain_calls == len(ctx.bindings)
+
+class TestBindingFootprint(TestCase):
+    NODES = 11112  # 100008 bindings
+
+    # shared by every binding, so not part of any one binding's footprint
+    SHARED_TYPES = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.CodeType,
+                    basestring, int, long, float, bool, type(None))
+
+    class Plain(object):
+        pass
+
+    def footprint(self, root, shared=(), unslotted=False):
+        """
+        Returns the bytes used by <root> and everything it refers to - slot
+        values, precompiled get/set partials and their bound methods - except
+        classes, functions, strings, numbers and anything reached through
+        <shared>. If <unslotted> is True, slotted objects are counted as if
+        they kept their attributes in a __dict__.
+        """
+        seen = set(id(i) for i in shared)
+        total = 0
+        pending = [root]
+        while pending:
+            item = pending.pop()
+            if id(item) in seen or isinstance(item, self.SHARED_TYPES):
+                continue
+            seen.add(id(item))
+            total += sys.getsizeof(item)
+            names = [n for c in type(item).__mro__ for n in c.__dict__.get('__slots__', ())
+                     if n not in ('__dict__', '__weakref__')]
+            if unslotted and names:
+                attributes = dict((n, getattr(item, n)) for n in names if hasattr(item, n))
+                total += sys.getsizeof(self.Plain()) + sys.getsizeof(attributes) - sys.getsizeof(item)
+            pending.extend(gc.get_referents(item))
+        return total
+
+    def setUp(self):
+        self.scene = StandInScene(self.NODES)
+        self.scene.install()
+        bindings.BREAK_ON_BIND_FAILURE = True
+
+    def tearDown(self):
+        self.scene.uninstall()
+        bindings.BREAK_ON_BIND_FAILURE = False
+
+    def test_slotted(self):
+        b = bindings.Binding(bindings.CmdsAccessor('node0', 'tx'), bindings.DictAccessor({}, 'tx'))
+        for item in (b, b.getter, b.setter):
+            assert not hasattr(item, '__dict__'), item
+
+    def test_registry(self):
+        reg = bindings.BindingRegistry()
+        items = [object() for _ in range(100)]
+        for i in items:
+            reg.append(i)
+        reg.append(items[0])
+        assert len(reg) == 100
+        for i in items[:60]:
+            reg.remove(i)
+        assert list(reg) == items[60:]
+        assert items[0] not in reg
+        self.assertRaises(ValueError, reg.remove, items[0])
+
+    def test_registry_iteration_survives_removal(self):
+        reg = bindings.BindingRegistry(range(100))
+        seen = []
+        for i in reg:
+            seen.append(i)
+            if i < 50:
+                reg.remove(i + 50)
+        assert seen == range(50)
+
+    def test_benchmark_100k_bindings(self):
+        results = {}
+        start = time.time()
+        with bindings.BindingContext(auto_update=False) as ctx:
+            for n in range(self.NODES):
+                node = 'node%i' % n
+                for attr in self.scene.SHORT:
+                    bindings.Binding(bindings.CmdsAccessor(node, attr), bindings.DictAccessor(results, node + attr))
+        created = time.time() - start
+
+        start = time.time()
+        ctx.update()
+        updated = time.time() - start
+
+        sample = next(iter(ctx.bindings))
+        shared = (results, self.scene, bindings._NOT_CACHED)
+        per_binding = self.footprint(sample, shared)
+        unslotted = self.footprint(sample, shared, unslotted=True)
+
+        count = len(ctx.bindings)
+        start = time.time()
+        for b in list(ctx.bindings):
+            ctx.bindings.remove(b)
+            ctx.graph.remove(b)
+            b.invalidate()
+        removed = time.time() - start
+
+        print "\n%i bindings: created in %.2fs, updated in %.2fs, removed in %.2fs; " \
+              "%i bytes per binding (%i unslotted)" % (count, created, updated, removed, per_binding, unslotted)
+        assert per_binding < unslotted
+        assert count == self.NODES * 9
+        assert len(results) == count
+        assert len(ctx.bindings) == 0 and len(ctx.graph) == 0
+
+
+class TestBindingDiagnostics(TestCase):
+    class Example(bindings.BindableObject):
+        def __init__(self, val):
+            self.val = val
+
+    class Broken(bindings.BindableObject):
+        def __init__(self):
+            self.broken = False
+
+        @property
+        def val(self):
+            if self.broken:
+                raise RuntimeError("boom")
+            return 0
+
+    def setUp(self):
+        bindings.BREAK_ON_BIND_FAILURE = False
+        bindings.BREAK_ON_ACCESS_FAILURE = True
+        self.diagnostics = bindings.profile_bindings(True)
+        self.diagnostics.clear()
+
+    def tearDown(self):
+        bindings.profile_bindings(False)
+        self.diagnostics.clear()
+
+    def test_counts_calls_pulls_and_pushes(self):
+        src, tgt = self.Example(1), self.Example(2)
+        b = src.bind.val > bindings.bind() > tgt.bind.val
+        for _ in range(3):
+            b()
+        stats = self.diagnostics.stats_for(b)
+        assert (stats.calls, stats.pulls, stats.pushes, stats.failures) == (3, 3, 3, 0)
+        assert stats.total >= stats.pull_time + stats.push_time
+
+    def test_two_way(self):
+        src, tgt = self.Example(1), self.Example(2)
+        b = src.bind.val | bindings.bind() | tgt.bind.val
+        b()
+        stats = self.diagnostics.stats_for(b)
+        assert stats.calls == 1
+        assert stats.pulls == 2
+        assert 'TwoWayBinding' in stats.name
+
+    def test_busiest(self):
+        src, tgt = self.Example(1), self.Example(2)
+        quiet = src.bind.val > bindings.bind() > tgt.bind.val
+        busy = tgt.bind.val > bindings.bind() > src.bind.val
+        quiet()
+        for _ in range(5):
+            busy()
+        assert self.diagnostics.busiest(1)[0] is self.diagnostics.stats_for(busy)
+        assert len(self.diagnostics.report()) == 2
+
+    def test_failure_reason_on_removal(self):
+        with bindings.BindingContext(auto_update=False) as ctx:
+            broken, tgt = self.Broken(), self.Example(0)
+            broken.bind.val > bindings.bind() > tgt.bind.val
+        broken.broken = True
+        ctx.update()
+        assert len(ctx.bindings) == 0
+        removed = self.diagnostics.removed[-1]
+        assert removed.failures == 1
+        assert removed.reason == 'RuntimeError: boom'
+
+    def test_dead_target_reason(self):
+        src, tgt = self.Example(1), self.Example(2)
+        with bindings.BindingContext(auto_update=False) as ctx:
+            src.bind.val > bindings.bind() > tgt.bind.val
+        del tgt
+        gc.collect()
+        ctx.update()
+        assert self.diagnostics.removed[-1].reason.startswith('ReferenceError')
+
+    def test_removal_and_dump_are_visible_at_default_log_level(self):
+        captured = []
+        handler = logging.Handler()
+        handler.emit = lambda record: captured.append(record.getMessage())
+        bindings.Logger.addHandler(handler)
+        try:
+            with bindings.BindingContext(auto_update=False) as ctx:
+                broken, tgt = self.Broken(), self.Example(0)
+                broken.bind.val > bindings.bind() > tgt.bind.val
+            broken.broken = True
+            ctx.update()
+            text = self.diagnostics.dump()
+        finally:
+            bindings.Logger.removeHandler(handler)
+        assert text.startswith('binding profile (by total)')
+        assert text.endswith(': RuntimeError: boom')
+        assert captured[0].startswith('removed ')
+        assert captured[-1] == text
+
+    def test_off_by_default(self):
+        bindings.profile_bindings(False)
+        src, tgt = self.Example(1), self.Example(2)
+        b = src.bind.val > bindings.bind() > tgt.bind.val
+        b()
+        assert len(self.diagnostics.report()) == 0
+
+
+class TestFanOutBinding(TestCase):
+    def setUp(self):
+        self.scene = StandInScene(100)
+        self.scene.install()
+        self.calls = []
+        self._undo, self._refresh = getattr(cmds, 'undoInfo', None), getattr(cmds, 'refresh', None)
+        cmds.undoInfo = lambda **kwargs: self.calls.append(('undo', kwargs))
+        cmds.refresh = lambda **kwargs: self.calls.append(('refresh', kwargs))
+
+    def tearDown(self):
+        self.scene.uninstall()
+        cmds.undoInfo, cmds.refresh = self._undo, self._refresh
+
+    def test_fan_out_pushes_to_all_in_one_chunk(self):
+        source = {'value': 12.0}
+        targets = [bindings.CmdsAccessor('node%i' % n, 'tx') for n in range(100)]
+        tester = bindings.FanOutBinding(bindings.DictAccessor(source, 'value'), targets)
+        assert tester()
+        assert all(self.scene.values[('node%i' % n, 'translateX')] == 12.0 for n in range(100))
+        assert self.calls == [('undo', {'openChunk': True, 'chunkName': 'mGui fan out'}),
+                              ('refresh', {'suspend': True}),
+                              ('refresh', {'suspend': False}),
+                              ('undo', {'closeChunk': True})]
+
+    def test_fan_out_helper(self):
+        source = {'value': 3.0}
+        tester = bindings.fan_out((source, 'value'), 'node1.ty', 'node2.ty')
+        tester()
+        assert self.scene.values[('node1', 'translateY')] == 3.0
+        assert self.scene.values[('node2', 'translateY')] == 3.0
+
+    def test_fan_out_throttled(self):
+        source = {'value': 1.0}
+        tester = bindings.FanOutBinding(bindings.DictAccessor(source, 'value'),
+                                        [bindings.CmdsAccessor('node0', 'tx')], hz=1)
+        tester._throttle.scheduler = self.ManualScheduler()
+        tester()
+        source['value'] = 2.0
+        tester()
+        assert self.scene.values[('node0', 'translateX')] == 1.0
+        tester._throttle.scheduler.run_all()
+        assert self.scene.values[('node0', 'translateX')] == 2.0
+        assert tester.pushed == 2
+
+    def test_fan_out_cached(self):
+        source = {'value': 5.0}
+        targets = [bindings.CmdsAccessor('node%i' % n, 'tx') for n in range(3)]
+        tester = bindings.FanOutBinding(bindings.DictAccessor(source, 'value'), targets, cache=True)
+        tester()
+        self.scene.values[('node1', 'translateX')] = -1.0
+        tester()
+        assert self.scene.values[('node1', 'translateX')] == -1.0
+        assert (tester.pushed, tester.skipped) == (1, 1)
+        assert len(self.calls) == 4
+        source['value'] = 6.0
+        tester()
+        assert all(self.scene.values[('node%i' % n, 'translateX')] == 6.0 for n in range(3))
+        assert (tester.pushed, tester.skipped) == (2, 1)
+
+    class ManualScheduler(object):
+        def __init__(self):
+            self.pending = []
+
+        def clock(self):
+            return 0.0
+
+        def schedule(self, delay, fn):
+            self.pending.append(fn)
+
+        def run_all(self):
+            while self.pending:
+                self.pending.pop(0)()
+
+
+@skipIf(events.futures is None, "requires concurrent.futures")
+class TestAsyncBinding(TestCase):
+    class Slow(bindings.Bindable):
+        def __init__(self):
+            self.gate = threading.Event()
+            self.gate.set()
+            self.reads = []
+
+        @property
+        def value(self):
+            n = len(self.reads)
+            self.reads.append(n)
+            if n == 0:
+                self.gate.wait(5)
+            return n
+
+    class Target(bindings.Bindable):
+        def __init__(self):
+            self.value = 'initial'
+
+    def setUp(self):
+        bindings.BREAK_ON_BIND_FAILURE = False
+        self.queue = []
+        self._execute_deferred = maya.utils.executeDeferred
+        maya.utils.executeDeferred = self.queue.append
+        self.source = self.Slow()
+        self.target = self.Target()
+
+    def tearDown(self):
+        maya.utils.executeDeferred = self._execute_deferred
+        self.source.gate.set()
+
+    def make_binding(self, **kwargs):
+        binding = bindings.AsyncBinding(bindings.get_accessor(self.source, 'value'),
+                                        bindings.get_accessor(self.target, 'value'), **kwargs)
+        self.source.reads = []
+        self.source.gate.clear()
+        return binding
+
+    def wait(self, condition):
+        deadline = time.time() + 5
+        while not condition() and time.time() < deadline:
+            time.sleep(0.001)
+
+    def deliver(self, count=1):
+        self.wait(lambda: len(self.queue) >= count)
+        while self.queue:
+            self.queue.pop(0)()
+
+    def test_result_pushed_on_main_thread(self):
+        binding = self.make_binding()
+        self.source.gate.set()
+        assert binding()
+        self.wait(lambda: self.queue)
+        assert self.target.value == 'initial'
+        self.deliver()
+        assert self.target.value == 0
+        assert not binding.pending
+
+    def test_previous_value_kept_while_pending(self):
+        binding = self.make_binding()
+        binding()
+        assert binding.pending
+        assert self.target.value == 'initial'
+        self.source.gate.set()
+        self.deliver()
+        assert self.target.value == 0
+
+    def test_placeholder(self):
+        binding = self.make_binding(placeholder='loading...')
+        binding()
+        assert self.target.value == 'loading...'
+        self.source.gate.set()
+        self.deliver()
+        assert self.target.value == 0
+
+    def test_stale_results_dropped(self):
+        binding = self.make_binding()
+        binding()
+        self.wait(lambda: self.source.reads)
+        binding()
+        self.source.gate.set()
+        self.deliver(2)
+        assert self.target.value == 1
+        assert binding.dropped == 1
+
+    def test_invalidated_binding_does_not_push(self):
+        binding = self.make_binding()
+        binding()
+        binding.invalidate()
+        self.source.gate.set()
+        self.deliver()
+        assert self.target.value == 'initial'
+
+    def test_binding_expression(self):
+        binding = self.source.bind.value > bindings.bind(background=True) > self.target.bind.value
+        assert isinstance(binding, bindings.AsyncBinding)
+
+    class Unreadable(bindings.Bindable):
+        broken = False
+
+        @property
+        def value(self):
+            if self.broken:
+                raise IOError("no such directory")
+            return 0
+
+    def test_getter_errors_fail_the_binding(self):
+        bindings.BREAK_ON_ACCESS_FAILURE = True
+        try:
+            source = self.Unreadable()
+            binding = bindings.AsyncBinding(bindings.get_accessor(source, 'value'),
+                                            bindings.get_accessor(self.target, 'value'))
+            source.broken = True
+            binding()
+            self.wait(lambda: self.queue)
+            self.assertRaises(IOError, self.queue.pop())
+            assert not binding
+            assert self.target.value == 'initial'
+
+            bindings.BREAK_ON_ACCESS_FAILURE = False
+            binding = self.make_binding(translator=lambda v: open('/no/such/directory'))
+            self.source.gate.set()
+            binding()
+            self.deliver()
+            assert not binding
+            assert self.target.value == 'initial'
+        finally:
+            bindings.BREAK_ON_ACCESS_FAILURE = True
+
+
 class TestTwoWayBinding(TestCase):
     class Example(bindings.BindableObject):
         _BIND_SRC = 'name'
@@ -661,3 +1517,69 @@ class TestTwoWayBinding(TestCase):
         fred.name = 'new2'
         test()
         assert fred.name == barney.val and fred.name == 'new2'
+
+    class Versioned(bindings.BindableObject):
+        def __init__(self, value):
+            self._value = value
+            self.version = 0
+            self.pulls = 0
+
+        @property
+        def value(self):
+            self.pulls += 1
+            return self._value
+
+        @value.setter
+        def value(self, value):
+            self._value = value
+            self.version += 1
+
+        def change_token(self, field_name):
+            return self.version
+
+    def test_tokens_skip_pulls(self):
+        fred = self.Versioned('fred')
+        barney = self.Versioned('barney')
+        test = fred.bind.value | bindings.bind() | barney.bind.value
+        fred.pulls = barney.pulls = 0
+        test()
+        test()
+        assert fred.pulls == 0 and barney.pulls == 0
+        assert test.skipped == 2
+
+    def test_tokens_push_changed_end(self):
+        fred = self.Versioned('fred')
+        barney = self.Versioned('barney')
+        test = fred.bind.value | bindings.bind() | barney.bind.value
+        barney.value = 'new'
+        fred.pulls = 0
+        test()
+        assert fred.value == 'new'
+        assert fred.pulls == 1   # just the one in the assert
+        fred.value = 'newer'
+        test()
+        assert barney.value == 'newer'
+        test()
+        assert test.pushed == 2
+
+    def test_tokens_getter_wins(self):
+        fred = self.Versioned('fred')
+        barney = self.Versioned('barney')
+        test = fred.bind.value | bindings.bind() | barney.bind.value
+        fred.value = 'from fred'
+        barney.value = 'from barney'
+        test()
+        assert barney.value == 'from fred'
+
+    def test_tokens_on_one_end(self):
+        fred = self.Versioned('fred')
+        barney = self.Example('barney', 'rubble')
+        test = fred.bind.value | bindings.bind() | barney.bind.val
+        barney.val = 'new'
+        test()
+        assert fred.value == 'new'
+        fred.value = 'newer'
+        test()
+        assert barney.val == 'newer'
+        test()
+        assert test.skipped == 1
@@ -0,0 +1,161 @@
+from unittest import TestCase, skipIf, main
+
+from mGui.bindings import BindableObject, bind
+from mGui.observable import CollectionChange, ImmediateBoundCollection
+import mGui.columns as columns
+from mGui.columns import Column, ColumnCollection, parse
+
+
+class TestTarget(BindableObject):
+    _BIND_TGT = 'values'
+
+    def __init__(self):
+        self.values = []
+
+
+class TestParse(TestCase):
+    def test_precedence(self):
+        assert parse("size > 1e6 & type == 'rig'").text == "((size > 1000000.0) & (type == 'rig'))"
+        assert parse("a | b & c").text == "(a | (b & c))"
+        assert parse("~a == 1 | b").text == "(~(a == 1) | b)"
+        assert parse("(a | b) & c").text == "((a | b) & c)"
+
+    def test_arithmetic(self):
+        assert parse("size / 1024 + 1 > -2 * n").text == "(((size / 1024) + 1) > (-2 * n))"
+
+    def test_evaluate(self):
+        expr = parse("x > 1 & name != 'b'")
+        assert expr.evaluate({'x': 2, 'name': 'a'})
+        assert not expr.evaluate({'x': 2, 'name': 'b'})
+
+    def test_columns(self):
+        expr = (Column('size') > 1e6) & (Column('type') == 'rig')
+        assert expr.text == "((size > 1000000.0) & (type == 'rig'))"
+
+    def test_errors(self):
+        for bad in ("size >", "size > > 1", "(size > 1", "size > 1 )", "size = 1"):
+            self.assertRaises(ValueError, parse, bad)
+
+    def test_no_boolean_keywords(self):
+        self.assertRaises(TypeError, lambda: 1 < Column('size') < 2)
+
+
+@skipIf(columns.numpy is None, "requires numpy")
+class TestColumnCollection(TestCase):
+    def setUp(self):
+        self.c = ColumnCollection('name', ('type', 'S8'), ('size', float), ('date', 'datetime64[D]'),
+                                  synchronous=True)
+        self.c.extend([
+            ('a', 'rig', 2e6, '2020-01-01'),
+            {'name': 'b', 'type': 'model', 'size': 3e6, 'date': '2019-01-01'},
+            ('c', 'rig', 5e5, '2021-01-01'),
+            ('d', 'rig', 4e6, '2018-01-01'),
+        ])
+
+    def names(self):
+        return [r.name for r in self.c.view]
+
+    def test_records(self):
+        assert len(self.c) == self.c.count == 4
+        assert self.c.viewCount == 4
+        assert self.c.record(1) == self.c.Record('b', 'model', 3e6, self.c.record(1).date)
+        assert self.c.fields == ('name', 'type', 'size', 'date')
+        assert list(self.c.column('size')) == [2e6, 3e6, 5e5, 4e6]
+
+    def test_filter(self):
+        self.c.update_filter("size > 1e6 & type == 'rig'")
+        assert self.names() == ['a', 'd']
+        assert self.c.viewCount == 2
+        self.c.update_filter((Column('size') < 1e6) | (Column('name') == 'b'))
+        assert self.names() == ['b', 'c']
+        self.c.update_filter("date > '2019-06-01'")
+        assert self.names() == ['a', 'c']
+        self.c.update_filter(None)
+        assert self.names() == ['a', 'b', 'c', 'd']
+
+    def test_sequence_protocol_uses_view(self):
+        self.c.update_filter("type == 'rig'")
+        assert len(self.c) == len(list(self.c)) == 3
+        assert [r.name for r in reversed(self.c)] == ['d', 'c', 'a']
+        assert self.c[-1].name == 'd'
+        assert self.c.count == 4
+
+    def test_bad_filter(self):
+        self.assertRaises(ValueError, self.c.update_filter, "colour == 'red'")
+        self.assertRaises(ValueError, self.c.update_filter, lambda r: r.size > 1)
+        assert self.c.viewCount == 4
+
+    def test_add_tests_new_records(self):
+        self.c.update_filter("type == 'rig'")
+        before = self.c.view
+        self.c.insert(1, ('e', 'rig', 1, '2020-01-01'), ('f', 'model', 1, '2020-01-01'))
+        self.c.append(('g', 'rig', 1, '2020-01-01'))
+        assert self.names() == ['a', 'e', 'c', 'd', 'g']
+        mirror = list(before)
+        for change in self.c.view.changes_since(before.version):
+            change.apply(mirror)
+        assert mirror == list(self.c.view)
+
+    def test_update(self):
+        self.c.update_filter("size > 1e6")
+        before = self.c.view
+        self.c.update(2, size=2e6)
+        self.c.update(0, size=0)
+        self.c.update(1, name='bb')
+        assert self.names() == ['bb', 'c', 'd']
+        mirror = list(before)
+        for change in self.c.view.changes_since(before.version):
+            change.apply(mirror)
+        assert mirror == list(self.c.view)
+        self.assertRaises(ValueError, self.c.update, 0, colour='red')
+
+    def test_pop_and_clear(self):
+        self.c.update_filter("type == 'rig'")
+        assert self.c.pop(0).name == 'a'
+        assert self.c.pop().name == 'd'
+        assert self.names() == ['c']
+        assert len(self.c) == 1
+        assert self.c.count == 2
+        self.c.clear()
+        assert self.names() == []
+        assert self.c.count == 0
+        self.c.append(('x', 'rig', 1, '2020-01-01'))
+        assert self.names() == ['x']
+
+    def test_growth(self):
+        self.c.extend(('n%i' % i, 'rig', i, '2020-01-01') for i in range(1000))
+        self.c.update_filter("size < 10")
+        assert self.c.viewCount == 10
+        assert self.c.count == 1004
+
+    def test_events(self):
+        received = []
+
+        def changed(*args, **kwargs):
+            received.append(kwargs['changes'])
+
+        self.c.onCollectionChanged += changed
+        record = self.c.pop(1)
+        assert received == [[CollectionChange(CollectionChange.REMOVE, 1, (record,))]]
+
+    def test_binding(self):
+        t = TestTarget()
+        t < bind() < self.c
+        self.c.update_filter("name == 'b'")
+        assert [r.name for r in t.values] == ['b']
+        count = TestTarget()
+        count < bind() < self.c.bind.viewCount
+        self.c.update_filter(None)
+        assert count.values == 4
+
+    def test_bound_collection(self):
+        bound = ImmediateBoundCollection()
+        bound < bind() < self.c
+        bound.update_bindings()
+        self.c.update_filter("type == 'rig'")
+        self.c.append(('e', 'rig', 1, '2020-01-01'))
+        assert [r.name for r in bound] == ['a', 'c', 'd', 'e']
+
+
+if __name__ == '__main__':
+    main()
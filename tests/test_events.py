@@ -4,6 +4,10 @@ Created on Mar 13, 2014
 @author: stevetheodore
 '''
 import mGui.events as events
+import maya.utils
+import logging
+import threading
+import time
 import unittest
 
 
@@ -91,6 +95,43 @@ class TestWeakRefs(unittest.TestCase):
         except events.DeadReferenceError:
             self.fail('this should not raise')
 
+    def test_bound_method_ids_do_not_collide(self):
+        class Multi(object):
+            def a(self):
+                pass
+
+            def b(self):
+                pass
+
+        m = Multi()
+        ids = set(events.get_weak_reference(f).ID for f in (m.a, m.b))
+        assert len(ids) == 2
+
+    def test_free_method_expiry_callback(self):
+        expired = []
+
+        def example(*args, **kwargs):
+            pass
+
+        wr = events.get_weak_reference(example, expired.append)
+        assert wr.alive
+        del example
+        assert not wr.alive
+        assert len(expired) == 1
+
+    def test_bound_method_expiry_callback(self):
+        expired = []
+        b = self.bound_tester()
+        wr = events.get_weak_reference(b.example, expired.append)
+        del b
+        assert not wr.alive
+        assert len(expired) == 1
+
+    def test_empty_event_is_a_live_handler(self):
+        inner = events.Event()
+        wr = events.get_weak_reference(inner)
+        wr()
+
 
 class TestEvents(unittest.TestCase):
     class bound_tester(object):
@@ -138,6 +179,62 @@ class TestEvents(unittest.TestCase):
         test()
         assert not "OK" in self.bound_tester.DATA
 
+    def test_dead_handlers_expire_without_firing(self):
+        def handle(*args, **kwargs):
+            pass
+
+        b = self.bound_tester()
+        test = events.Event()
+        test += handle
+        test += b.example
+        assert len(test) == 2
+        del handle
+        assert len(test) == 1
+        del b
+        assert len(test) == 0
+
+    def test_handler_dying_during_fire(self):
+        class Window(object):
+            def handle(self, *args, **kwargs):
+                results.append('window')
+
+        results = []
+        owner = {'w': Window()}
+
+        def closer(*args, **kwargs):
+            results.append('closer')
+            del owner['w']
+
+        def last(*args, **kwargs):
+            results.append('last')
+
+        for profiled in (False, True):
+            del results[:]
+            owner['w'] = Window()
+            test = events.Event()
+            test += closer
+            test += owner['w'].handle
+            test += last
+            events.profile_events(profiled)
+            try:
+                test()
+            finally:
+                events.profile_events(False)
+            assert 'window' not in results
+            assert 'last' in results
+            assert len(test) == 2
+
+    def test_expiry_does_not_reference_event(self):
+        import sys
+
+        def handle(*args, **kwargs):
+            pass
+
+        test = events.Event()
+        refs = sys.getrefcount(test)
+        test += handle
+        assert sys.getrefcount(test) == refs
+
     def test_stash(self):
         sample_data = []
 
@@ -178,5 +275,375 @@ class TestEvents(unittest.TestCase):
         test()
         assert 'OK' not in sample_data
 
+
+class TestMayaEvents(unittest.TestCase):
+    class Tester(object):
+        def __init__(self):
+            self.calls = []
+
+        def handle(self, *args, **kwargs):
+            self.calls.append(args)
+
+    def setUp(self):
+        self.queue = []
+        self._execute_deferred = maya.utils.executeDeferred
+        maya.utils.executeDeferred = self.queue.append
+
+    def tearDown(self):
+        maya.utils.executeDeferred = self._execute_deferred
+
+    def flush(self):
+        while self.queue:
+            self.queue.pop(0)()
+
+    def test_one_deferred_call_per_fire(self):
+        test = events.MayaEvent()
+        testers = [self.Tester() for _ in range(5)]
+        for t in testers:
+            test += t.handle
+        test('a')
+        assert len(self.queue) == 1
+        self.flush()
+        assert all(t.calls == [('a',)] for t in testers)
+
+    def test_no_deferred_call_without_handlers(self):
+        test = events.MayaEvent()
+        test('a')
+        assert not self.queue
+
+    def test_coalescing_delivers_newest(self):
+        test = events.CoalescingMayaEvent()
+        t = self.Tester()
+        test += t.handle
+        test(1)
+        test(2)
+        test(3)
+        assert len(self.queue) == 1
+        self.flush()
+        assert t.calls == [(3,)]
+        assert test.collapsed == 2
+
+    def test_coalescing_requeues_after_delivery(self):
+        test = events.CoalescingMayaEvent()
+        t = self.Tester()
+        test += t.handle
+        test(1)
+        self.flush()
+        test(2)
+        self.flush()
+        assert t.calls == [(1,), (2,)]
+        assert test.collapsed == 0
+
+
+class TestRateLimitedEvents(unittest.TestCase):
+    class Clock(object):
+        def __init__(self):
+            self.now = 0.0
+
+        def __call__(self):
+            return self.now
+
+    class ManualScheduler(events.Scheduler):
+        def _start(self):
+            pass
+
+        def _stop(self):
+            pass
+
+    class Tester(object):
+        def __init__(self):
+            self.calls = []
+
+        def handle(self, *args, **kwargs):
+            self.calls.append(args)
+
+    def setUp(self):
+        self.clock = self.Clock()
+        self.scheduler = self.ManualScheduler(self.clock)
+        self.tester = self.Tester()
+
+    def advance(self, seconds):
+        self.clock.now += seconds
+        self.scheduler.tick()
+
+    def test_scheduler_runs_due_calls_in_order(self):
+        results = []
+        self.scheduler.schedule(0.2, lambda: results.append(2))
+        self.scheduler.schedule(0.1, lambda: results.append(1))
+        self.advance(0.15)
+        assert results == [1]
+        self.advance(0.1)
+        assert results == [1, 2]
+        assert len(self.scheduler) == 0
+
+    def test_throttle_delivers_first_fire_immediately(self):
+        test = events.ThrottledEvent(hz=10, scheduler=self.scheduler)
+        test += self.tester.handle
+        test(1)
+        assert self.tester.calls == [(1,)]
+
+    def test_throttle_limits_and_delivers_trailing(self):
+        test = events.ThrottledEvent(hz=10, scheduler=self.scheduler)
+        test += self.tester.handle
+        test(1)
+        test(2)
+        test(3)
+        assert self.tester.calls == [(1,)]
+        self.advance(0.05)
+        assert self.tester.calls == [(1,)]
+        self.advance(0.06)
+        assert self.tester.calls == [(1,), (3,)]
+
+    def test_debounce_waits_for_quiet(self):
+        test = events.DebouncedEvent(ms=100, scheduler=self.scheduler)
+        test += self.tester.handle
+        test(1)
+        self.advance(0.05)
+        test(2)
+        self.advance(0.06)
+        assert self.tester.calls == []
+        self.advance(0.05)
+        assert self.tester.calls == [(2,)]
+
+    def test_debounce_refires(self):
+        test = events.DebouncedEvent(ms=100, scheduler=self.scheduler)
+        test += self.tester.handle
+        test(1)
+        self.advance(0.2)
+        test(2)
+        self.advance(0.2)
+        assert self.tester.calls == [(1,), (2,)]
+
+
+@unittest.skipIf(events.futures is None, 'WorkerEvents need concurrent.futures')
+class TestWorkerEvents(unittest.TestCase):
+    class Tester(object):
+        def __init__(self):
+            self.results = []
+            self.errors = []
+            self.threads = []
+
+        def completed(self, result, *args, **kwargs):
+            self.results.append(result)
+
+        def failed(self, error, *args, **kwargs):
+            self.errors.append(error)
+
+        def main(self, *args, **kwargs):
+            self.threads.append(threading.current_thread())
+
+    def setUp(self):
+        self.queue = []
+        self._execute_deferred = maya.utils.executeDeferred
+        maya.utils.executeDeferred = self.queue.append
+        self.tester = self.Tester()
+
+    def tearDown(self):
+        maya.utils.executeDeferred = self._execute_deferred
+
+    def wait(self, event):
+        deadline = time.time() + 5
+        while event.pending and time.time() < deadline:
+            time.sleep(0.001)
+        while self.queue:
+            self.queue.pop(0)()
+
+    def make_event(self, **kwargs):
+        test = events.WorkerEvent(**kwargs)
+        test.onCompleted += self.tester.completed
+        test.onFailed += self.tester.failed
+        return test
+
+    def test_unmarked_handlers_run_on_calling_thread(self):
+        test = self.make_event()
+        test += self.tester.main
+        test()
+        assert self.tester.threads == [threading.current_thread()]
+
+    def test_worker_results_delivered_on_main_thread(self):
+        threads = []
+
+        @events.worker_thread
+        def work(value, *args, **kwargs):
+            threads.append(threading.current_thread())
+            return value * 2
+
+        test = self.make_event()
+        test += work
+        test(21)
+        self.wait(test)
+        assert self.tester.results == [42]
+        assert threads[0] is not threading.current_thread()
+
+    def test_worker_errors_delivered(self):
+        @events.worker_thread
+        def work(*args, **kwargs):
+            raise ValueError('oops')
+
+        test = self.make_event()
+        test += work
+        test()
+        self.wait(test)
+        assert isinstance(self.tester.errors[0], ValueError)
+
+    def test_concurrency_limit(self):
+        lock = threading.Lock()
+        active = [0, 0]
+
+        @events.worker_thread
+        def work(*args, **kwargs):
+            with lock:
+                active[0] += 1
+                active[1] = max(active)
+            time.sleep(0.01)
+            with lock:
+                active[0] -= 1
+
+        test = self.make_event(max_concurrent=1)
+        test += work
+        for _ in range(4):
+            test()
+        self.wait(test)
+        assert active[1] == 1
+        assert len(self.tester.results) == 4
+
+    def test_cancel(self):
+        gate = threading.Event()
+
+        @events.worker_thread
+        def work(*args, **kwargs):
+            gate.wait(5)
+            return True
+
+        test = self.make_event(max_concurrent=1)
+        test += work
+        test()
+        test()
+        test()
+        assert test.cancel() >= 2
+        gate.set()
+        self.wait(test)
+        assert self.tester.results == []
+
+
+class TestEventProfiling(unittest.TestCase):
+    class Tester(object):
+        def fast(self, *args, **kwargs):
+            pass
+
+        def slow(self, *args, **kwargs):
+            time.sleep(0.002)
+
+    def setUp(self):
+        self.profiler = events.profile_events(True)
+        self.profiler.clear()
+
+    def tearDown(self):
+        events.profile_events(False)
+        self.profiler.clear()
+
+    def test_profiling_records_fires_and_handlers(self):
+        t = self.Tester()
+        test = events.Event()
+        test += t.fast
+        test += t.slow
+        test()
+        test()
+        stats = self.profiler.report()[0]
+        assert stats.fires == 2
+        slowest = self.profiler.slowest_handlers()
+        assert slowest[0][1].name == 'Tester.slow'
+        assert slowest[0][1].calls == 2
+        assert sum(slowest[0][1].histogram) == 2
+        assert slowest[0][1].max >= 0.002
+
+    def test_profiling_off_records_nothing(self):
+        events.profile_events(False)
+        t = self.Tester()
+        test = events.Event()
+        test += t.fast
+        test()
+        assert self.profiler.report() == []
+
+    def test_dump_is_visible_at_default_log_level(self):
+        from mGui.debugging import Logger
+        t = self.Tester()
+        test = events.Event()
+        test += t.slow
+        test()
+        captured = []
+        handler = logging.Handler()
+        handler.emit = lambda record: captured.append(record.getMessage())
+        Logger.addHandler(handler)
+        try:
+            text = self.profiler.dump()
+        finally:
+            Logger.removeHandler(handler)
+        assert text.startswith('event profile (by total)')
+        assert 'Tester.slow' in text
+        assert captured == [text]
+
+    def test_describe_scriptjob_style_owner(self):
+        class Owned(events.Event):
+            event_type = 'idle'
+
+        assert events.describe_event(Owned()) == 'Owned idle'
+
+
+class TestEventPerformance(unittest.TestCase):
+    """
+    Micro-benchmark for the dispatch loop. Prints fires-per-second for
+    different handler counts; the assertions only guard against regressions
+    that would make dispatch scale worse than linearly.
+    """
+    FIRES = 20000
+
+    class Counter(object):
+        def __init__(self):
+            self.count = 0
+
+        def handle(self, *args, **kwargs):
+            self.count += 1
+
+    def fires_per_second(self, handler_count):
+        test = events.Event(name='benchmark')
+        counters = [self.Counter() for _ in range(handler_count)]
+        for c in counters:
+            test += c.handle
+        fires = max(self.FIRES // handler_count, 100)
+        start = time.time()
+        for _ in range(fires):
+            test('arg', frame=1)
+        elapsed = max(time.time() - start, 1e-6)
+        assert all(c.count == fires for c in counters)
+        return fires / elapsed
+
+    def test_fires_per_second(self):
+        results = {}
+        for count in (1, 10, 100):
+            results[count] = self.fires_per_second(count)
+            print "\nEvent with %3i handler(s): %10.0f fires/sec" % (count, results[count])
+        # 100x the handlers should not cost much more than 100x the time
+        assert results[100] * 200 > results[1]
+
+    def test_snapshot_is_stable_during_fire(self):
+        test = events.Event()
+        counter = self.Counter()
+        test += counter.handle
+        snapshot = test._handlers
+        test()
+        test()
+        assert test._handlers is snapshot
+
+    def test_duplicate_handlers_ignored(self):
+        test = events.Event()
+        counter = self.Counter()
+        test += counter.handle
+        test += counter.handle
+        assert len(test) == 1
+        test()
+        assert counter.count == 1
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -4,8 +4,15 @@ Created on Mar 14, 2014
 @author: Stephen Theodore
 '''
 from mGui.bindings import BindableObject, bind
-from mGui.observable import ObservableCollection, ViewCollection, ImmediateObservableCollection
-from unittest import TestCase, main
+from mGui.observable import ObservableCollection, ViewCollection, ImmediateObservableCollection, ObservableObject, \
+    SortedView, WindowedView, \
+    computed, CollectionChange, ImmediateBoundCollection
+from unittest import TestCase, skipIf, main
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 
 class TestTarget(BindableObject):
@@ -205,5 +212,617 @@ class TestViewCollection(TestCase):
         assert t.values == (2, 4, 6, 8, 10)
 
 
+class Test_IncrementalView(TestCase):
+    def setUp(self):
+        self.tested = []
+        self.c = ViewCollection(*range(10), synchronous=True)
+        self.c.update_filter(self.even)
+        self.bound = ImmediateBoundCollection()
+        self.bound < bind() < self.c
+        self.bound.update_bindings()
+        self.mirror = list(self.bound)
+        self.bound.onCollectionChanged += self.changed
+        del self.tested[:]
+
+    def even(self, item):
+        self.tested.append(item)
+        return item % 2 == 0
+
+    def changed(self, *args, **kwargs):
+        for change in kwargs['changes']:
+            change.apply(self.mirror)
+
+    def check(self):
+        expected = [i for i in self.c._internal_collection if i % 2 == 0]
+        assert list(self.c.view) == expected
+        assert self.mirror == expected
+        assert self.c.viewCount == len(expected)
+
+    def test_add_tests_one_item(self):
+        self.c.append(12)
+        assert self.tested == [12]
+        self.check()
+
+    def test_remove_tests_nothing(self):
+        del self.c[4]
+        del self.c[3]
+        assert self.tested == []
+        self.check()
+
+    def test_replace(self):
+        self.c[2] = 7
+        self.c[3] = 8
+        self.c[4] = 20
+        assert self.tested == [7, 8, 20]
+        self.check()
+
+    def test_insert_and_move(self):
+        self.c.insert(0, 100)
+        self.c.insert(3, 101)
+        self.c.move(0, 8)
+        self.c.move(1, 5)
+        self.check()
+
+    def test_sort_and_filter_change(self):
+        self.c.reverse()
+        self.check()
+        assert len(self.tested) == 10
+        self.c.update_filter(lambda x: x > 5)
+        assert list(self.c.view) == [9, 8, 7, 6]
+
+    def test_batch(self):
+        with self.c.batch():
+            for n in range(20, 30):
+                self.c.append(n)
+            del self.c[0]
+        self.check()
+
+    def test_view_changes_are_incremental(self):
+        before = self.c.view
+        self.c.append(12)
+        self.c.append(13)
+        changes = self.c.view.changes_since(before.version)
+        assert changes == [CollectionChange(CollectionChange.INSERT, 5, (12,))]
+
+    def test_indexing_is_cached(self):
+        assert [self.c[i] for i in range(5)] == [0, 2, 4, 6, 8]
+        assert list(self.c) == [0, 2, 4, 6, 8]
+        assert self.c.view is self.c.view
+        assert self.tested == []
+
+    def test_limit(self):
+        c = ViewCollection(*range(1, 11), limit=3)
+        t = TestTarget()
+        t < bind() < c
+        before = c.view
+        c.append(11)
+        assert c.view.changes_since(before.version) == []
+        c.insert(0, -1)
+        assert t.values == (-1, 1, 2)
+        assert c.is_truncated
+        assert c.viewCount == 3
+
+
+class Test_WindowedView(TestCase):
+    def setUp(self):
+        self.c = WindowedView(*range(1, 101), offset=10, page_size=5, synchronous=True)
+        self.before = self.c.view
+
+    def changes(self):
+        return self.c.view.changes_since(self.before.version)
+
+    def test_window(self):
+        assert self.c.view == (11, 12, 13, 14, 15)
+        assert self.c.totalCount == 100
+        assert self.c.viewCount == 5
+        assert self.c.pageCount == 20
+        assert self.c.page == 2
+        assert self.c.is_truncated
+        assert list(self.c) == [11, 12, 13, 14, 15]
+
+    def test_filtered(self):
+        self.c.update_filter(lambda x: x % 10 == 0)
+        assert self.c.view == ()
+        assert self.c.totalCount == 10
+        self.c.page = 1
+        assert self.c.view == (60, 70, 80, 90, 100)
+
+    def test_changes_outside_window(self):
+        self.c.append(101)
+        self.c.insert(50, 0)
+        assert self.changes() == []
+        assert self.c.totalCount == 101
+
+    def test_insert_in_window(self):
+        self.c.insert(11, 'x')
+        assert self.c.view == (11, 'x', 12, 13, 14)
+        assert self.changes() == [CollectionChange(CollectionChange.INSERT, 1, ('x',)),
+                                  CollectionChange(CollectionChange.REMOVE, 5, (15,))]
+
+    def test_remove_in_window(self):
+        del self.c[11]
+        assert self.c.view == (11, 13, 14, 15, 16)
+        assert self.changes() == [CollectionChange(CollectionChange.REMOVE, 1, (12,)),
+                                  CollectionChange(CollectionChange.INSERT, 4, (16,))]
+
+    def test_change_before_window(self):
+        self.c.insert(0, 'x')
+        assert self.c.view == (10, 11, 12, 13, 14)
+        assert self.changes() == [CollectionChange(CollectionChange.RESET, 0, (10, 11, 12, 13, 14))]
+
+    def test_scroll(self):
+        self.c.offset = 98
+        assert self.c.view == (99, 100)
+        assert self.c.viewCount == 2
+        self.c.page_size = 1
+        assert self.c.view == (99,)
+
+    def test_binding(self):
+        t = TestTarget()
+        t < bind() < self.c
+        self.c.insert(12, 'x')
+        assert t.values == (11, 12, 'x', 13, 14)
+
+
+class Asset(object):
+    def __init__(self, name, size):
+        self.name = name
+        self.size = size
+
+    def __repr__(self):
+        return self.name
+
+
+class Test_SortedView(TestCase):
+    def setUp(self):
+        self.keyed = []
+        self.a, self.b, self.c = Asset('a', 30), Asset('b', 10), Asset('c', 20)
+        self.assets = ImmediateObservableCollection(self.b, self.c, self.a)
+        self.sorted = SortedView(self.assets, sort_by='name', synchronous=True,
+                                 name=self.name_key, size=lambda a: a.size)
+        self.changes = []
+        self.sorted.onCollectionChanged += self.changed
+
+    def name_key(self, asset):
+        self.keyed.append(asset)
+        return asset.name
+
+    def changed(self, *args, **kwargs):
+        self.changes.extend(kwargs['changes'])
+
+    def test_sorted(self):
+        assert list(self.sorted) == [self.a, self.b, self.c]
+        assert len(self.sorted) == 3
+
+    def test_insert_in_place(self):
+        d = Asset('bb', 5)
+        self.assets.append(d)
+        assert list(self.sorted) == [self.a, self.b, d, self.c]
+        assert self.changes == [CollectionChange(CollectionChange.INSERT, 2, (d,))]
+        assert self.keyed.count(d) == 1 and self.keyed.count(self.a) == 1
+
+    def test_remove_and_replace(self):
+        self.assets.remove(self.a)
+        assert list(self.sorted) == [self.b, self.c]
+        d = Asset('d', 1)
+        self.assets[0] = d
+        assert list(self.sorted) == [self.c, d]
+        assert self.changes == [CollectionChange(CollectionChange.REMOVE, 0, (self.a,)),
+                                CollectionChange(CollectionChange.REMOVE, 0, (self.b,)),
+                                CollectionChange(CollectionChange.INSERT, 1, (d,))]
+
+    def test_sort_by(self):
+        self.sorted.sort_by('size')
+        assert list(self.sorted) == [self.b, self.c, self.a]
+        self.sorted.sort_by('size', reverse=True)
+        assert list(self.sorted) == [self.a, self.c, self.b]
+        self.assets.append(Asset('e', 25))
+        assert [i.size for i in self.sorted] == [30, 25, 20, 10]
+        self.assertRaises(ValueError, self.sorted.sort_by, 'date')
+
+    def test_find(self):
+        assert self.sorted.find('b') == [self.b]
+        assert self.sorted.find(20, key='size') == [self.c]
+        assert self.sorted.find('x') == []
+        assert self.sorted.position('b') == 1
+        assert self.sorted.position('bb') == 2
+        self.sorted.sort_by('name', reverse=True)
+        assert self.sorted.position('b') == 1
+
+    def test_refresh(self):
+        self.sorted.sort_by('size')
+        self.a.size = 0
+        self.sorted.refresh(self.a)
+        assert list(self.sorted) == [self.a, self.b, self.c]
+        assert self.sorted.find(0, key='size') == [self.a]
+
+    def test_move_does_not_change_view(self):
+        self.assets.move(0, 2)
+        assert self.changes == []
+        assert list(self.sorted) == [self.a, self.b, self.c]
+
+    def test_bound_downstream(self):
+        bound = ImmediateBoundCollection()
+        bound < bind() < self.sorted
+        bound.update_bindings()
+        before = self.sorted.view
+        self.assets.append(Asset('ab', 1))
+        mirror = list(before)
+        for change in self.sorted.view.changes_since(before.version):
+            change.apply(mirror)
+        assert mirror == list(bound) == list(self.sorted)
+
+
+class Test_ChangeRecords(TestCase):
+    def setUp(self):
+        self.c = ImmediateObservableCollection('a', 'b', 'c', 'd')
+        self.changes = []
+        self.c.onCollectionChanged += self.changed
+        self.mirror = list(self.c)
+
+    def changed(self, *args, **kwargs):
+        self.changes.extend(kwargs['changes'])
+
+    def check_mirror(self):
+        for change in self.changes:
+            change.apply(self.mirror)
+        assert self.mirror == list(self.c)
+
+    def test_insert(self):
+        self.c.insert(1, 'x')
+        assert self.changes == [CollectionChange(CollectionChange.INSERT, 1, ('x',))]
+        self.check_mirror()
+
+    def test_append_negative_and_out_of_range(self):
+        self.c.append('e')
+        self.c.insert(-1, 'f')
+        self.c.insert(100, 'g')
+        assert [(i.start, i.items) for i in self.changes] == [(4, ('e',)), (4, ('f',)), (6, ('g',))]
+        self.check_mirror()
+
+    def test_remove(self):
+        self.c.remove('c')
+        assert self.changes == [CollectionChange(CollectionChange.REMOVE, 2, ('c',))]
+        self.check_mirror()
+
+    def test_remove_slice(self):
+        del self.c[1:3]
+        assert self.changes == [CollectionChange(CollectionChange.REMOVE, 1, ('b', 'c'))]
+        self.check_mirror()
+
+    def test_replace(self):
+        self.c[-1] = 'z'
+        assert self.changes == [CollectionChange(CollectionChange.REPLACE, 3, ('z',), ('d',))]
+        self.check_mirror()
+
+    def test_move(self):
+        self.c.move(0, 2)
+        assert list(self.c) == ['b', 'c', 'a', 'd']
+        assert self.changes == [CollectionChange(CollectionChange.MOVE, 0, ('a',), destination=2)]
+        self.check_mirror()
+
+    def test_add_group_clear_and_sort(self):
+        self.c.add_group('q', 'r')
+        self.c.sort(reverse=True)
+        self.check_mirror()
+        self.c.clear()
+        assert self.changes[-1] == CollectionChange(CollectionChange.REMOVE, 0, ('r', 'q', 'd', 'c', 'b', 'a'))
+        self.check_mirror()
+
+    def test_contents_changes_since(self):
+        before = self.c.contents
+        self.c.append('e')
+        self.c.remove('a')
+        after = self.c.contents
+        assert after == ('b', 'c', 'd', 'e')
+        mirror = list(before)
+        for change in after.changes_since(before.version):
+            change.apply(mirror)
+        assert mirror == list(after)
+        assert after.changes_since(after.version) == []
+
+    def test_contents_history_limit(self):
+        before = self.c.contents
+        for n in range(ObservableCollection.HISTORY + 1):
+            self.c.append(n)
+        assert self.c.contents.changes_since(before.version) is None
+
+    def test_bound_collection_gets_changes(self):
+        target = ImmediateBoundCollection()
+        received = []
+
+        def collection_changed(*args, **kwargs):
+            received.append(kwargs['changes'])
+
+        target.onCollectionChanged += collection_changed
+        target < bind() < self.c
+        target.update_bindings()
+        assert received[-1][0].action == CollectionChange.RESET
+        self.c.insert(0, 'new')
+        assert received[-1] == [CollectionChange(CollectionChange.INSERT, 0, ('new',))]
+        assert tuple(target) == tuple(self.c)
+
+
+class Test_Batch(TestCase):
+    def setUp(self):
+        self.c = ImmediateObservableCollection(1, 2, 3)
+        self.events = []
+        self.c.onCollectionChanged += self.changed
+        self.c.onItemAdded += self.item_event
+        self.c.onItemRemoved += self.item_event
+        self.target = TestTarget()
+        self.binding = self.target < bind() < self.c
+
+    def changed(self, *args, **kwargs):
+        self.events.append(kwargs['changes'])
+
+    def item_event(self, *args, **kwargs):
+        self.events.append('item')
+
+    def test_one_notification(self):
+        with self.c.batch():
+            for n in range(1000):
+                self.c.append(n)
+            assert self.target.values == []
+        assert self.events == [[CollectionChange(CollectionChange.INSERT, 3, range(1000))]]
+        assert self.target.values == (1, 2, 3) + tuple(range(1000))
+        assert self.binding.pushed == 1
+
+    def test_nested(self):
+        with self.c.batch():
+            self.c.append(4)
+            with self.c.batch():
+                self.c.remove(1)
+            assert self.events == []
+            self.c[0] = 'two'
+        assert len(self.events) == 1
+        mirror = [1, 2, 3]
+        for change in self.events[0]:
+            change.apply(mirror)
+        assert mirror == list(self.c) == ['two', 3, 4]
+
+    def test_merged_removes(self):
+        with self.c.batch():
+            del self.c[2]
+            del self.c[1]
+            del self.c[0]
+        assert self.events == [[CollectionChange(CollectionChange.REMOVE, 0, (1, 2, 3))]]
+
+    def test_empty_batch(self):
+        with self.c.batch():
+            pass
+        assert self.events == []
+
+    def test_commit_on_exception(self):
+        try:
+            with self.c.batch():
+                self.c.append(4)
+                raise ValueError()
+        except ValueError:
+            pass
+        assert self.events == [[CollectionChange(CollectionChange.INSERT, 3, (4,))]]
+        assert self.target.values == (1, 2, 3, 4)
+
+    def test_contents_changes_since_batch(self):
+        before = self.c.contents
+        with self.c.batch():
+            self.c.append(4)
+            self.c.append(5)
+        after = self.c.contents
+        assert after.version == before.version + 2
+        assert after.changes_since(before.version) == [CollectionChange(CollectionChange.INSERT, 3, (4, 5))]
+
+
+class Model(ObservableObject):
+    def __init__(self):
+        self.name = 'fred'
+        self.age = 30
+
+
+class Receiver(BindableObject):
+    def __init__(self):
+        self.name = None
+        self.age = None
+
+
+class Test_ObservableObject(TestCase):
+    def test_property_change_updates_binding(self):
+        m = Model()
+        r = Receiver()
+        m.bind.name > bind() > r.bind.name
+        m.name = 'barney'
+        assert r.name == 'barney'
+
+    def test_property_change_updates_only_its_bindings(self):
+        m = Model()
+        r = Receiver()
+        name_binding = m.bind.name > bind() > r.bind.name
+        age_binding = m.bind.age > bind() > r.bind.age
+        m.age = 31
+        assert r.age == 31
+        assert r.name is None
+        assert age_binding.pushed == 1
+        assert name_binding.pushed == 0
+
+    def test_same_value_does_not_fire(self):
+        m = Model()
+        results = []
+
+        def handler(*args, **kwargs):
+            results.append(args)
+
+        evt = m.property_changed.for_property('name')
+        evt += handler
+        m.name = 'fred'
+        assert results == []
+        m.name = 'wilma'
+        assert results == [('wilma',)]
+
+    def test_uncomparable_values_count_as_changed(self):
+        class Elementwise(object):
+            def __eq__(self, other):
+                return [True]
+
+        class Raises(object):
+            def __eq__(self, other):
+                raise ValueError("ambiguous")
+
+        m = Model()
+        results = []
+
+        def handler(*args, **kwargs):
+            results.append(args)
+
+        evt = m.property_changed.for_property('name')
+        evt += handler
+        first, second = Elementwise(), Raises()
+        m.name = first
+        m.name = second
+        m.name = second
+        assert results == [(first,), (second,)]
+
+    @skipIf(numpy is None, "requires numpy")
+    def test_numpy_values(self):
+        m = Model()
+        m.name = numpy.arange(3)
+        m.name = numpy.arange(3)
+        assert m.change_token('name') == 3
+
+    def test_private_names_do_not_fire(self):
+        m = Model()
+        results = []
+
+        def handler(*args, **kwargs):
+            results.append(args)
+
+        evt = m.property_changed.for_property('_private')
+        evt += handler
+        m._private = 1
+        assert results == []
+
+    def test_event_metadata(self):
+        m = Model()
+        results = []
+
+        def handler(*args, **kwargs):
+            results.append(kwargs['property'])
+
+        evt = m.property_changed.for_property('age')
+        evt += handler
+        m.age = 99
+        assert results == ['age']
+
+    def test_two_way_binding_uses_versions(self):
+        m = Model()
+        other = Model()
+        b = m.bind.name | bind() | other.bind.name
+        b()
+        assert b.skipped == 1
+        other.name = 'wilma'
+        b()
+        assert m.name == 'wilma'
+
+    def test_change_token_only_for_tracked_values(self):
+        m = Model()
+        before = m.change_token('name')
+        m.name = 'barney'
+        assert m.change_token('name') != before
+        assert m.change_token('not_an_attribute') is None
+
+
+class Summary(BindableObject):
+    def __init__(self, model, assets):
+        self.model = model
+        self.assets = assets
+        self.evaluations = 0
+
+    @computed
+    def label(self):
+        self.evaluations += 1
+        return "%s: %i assets" % (self.model.name, len(self.assets))
+
+    @computed
+    def shouting(self):
+        return self.label.upper()
+
+
+class Test_Computed(TestCase):
+    def setUp(self):
+        self.model = Model()
+        self.assets = ObservableCollection(1, 2, 3)
+        self.summary = Summary(self.model, self.assets)
+
+    def test_value(self):
+        assert self.summary.label == 'fred: 3 assets'
+
+    def test_cached(self):
+        self.summary.label
+        self.summary.label
+        assert self.summary.evaluations == 1
+
+    def test_property_change_invalidates(self):
+        self.summary.label
+        self.model.name = 'barney'
+        assert self.summary.label == 'barney: 3 assets'
+        assert self.summary.evaluations == 2
+
+    def test_untracked_property_change_does_not_invalidate(self):
+        self.summary.label
+        self.model.age = 99
+        self.summary.label
+        assert self.summary.evaluations == 1
+
+    def test_collection_change_invalidates(self):
+        self.summary.label
+        self.assets.add(4)
+        assert self.summary.label == 'fred: 4 assets'
+
+    def test_nested(self):
+        assert self.summary.shouting == 'FRED: 3 ASSETS'
+        self.model.name = 'wilma'
+        assert self.summary.shouting == 'WILMA: 3 ASSETS'
+        assert self.summary.evaluations == 2
+
+    def test_read_only(self):
+        def set_label():
+            self.summary.label = 'x'
+
+        self.assertRaises(AttributeError, set_label)
+
+    def test_binding_pushes_only_on_change(self):
+        r = Receiver()
+        b = self.summary.bind.label > bind() > r.bind.name
+        b()
+        b()
+        assert r.name == 'fred: 3 assets'
+        assert b.pushed == 1
+        self.model.age = 12
+        b()
+        assert b.pushed == 1
+        self.model.name = 'betty'
+        b()
+        assert b.pushed == 2
+        assert r.name == 'betty: 3 assets'
+
+
+    @skipIf(numpy is None, "requires numpy")
+    def test_array_values(self):
+        class Scaled(BindableObject):
+            def __init__(self, model):
+                self.model = model
+
+            @computed
+            def ages(self):
+                return numpy.arange(3) * self.model.age
+
+        scaled = Scaled(self.model)
+        r = Receiver()
+        b = scaled.bind.ages > bind() > r.bind.age
+        b()
+        self.model.age = 31
+        b()
+        assert list(r.age) == [0, 31, 62]
+        assert b.pushed == 2
+
 if __name__ == '__main__':
     main()
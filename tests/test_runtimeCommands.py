@@ -0,0 +1,88 @@
+import maya.standalone
+
+try:
+    maya.standalone.initialize()
+except:
+    pass
+
+import mGui.runtimeCommands as rc
+from unittest import TestCase, main
+
+
+class TestMessageBus(TestCase):
+    class Tester(object):
+        def __init__(self):
+            self.topics = []
+
+        def handle(self, *args, **kwargs):
+            self.topics.append(kwargs['topic'])
+
+    def setUp(self):
+        self.registry = {}
+        self.bus = rc.MessageBus(self.registry)
+        self.tester = self.Tester()
+
+    def test_exact_topic(self):
+        self.bus.subscribe('asset.rig.published', self.tester.handle)
+        self.bus.publish('asset.rig.published')
+        self.bus.publish('asset.rig.deleted')
+        assert self.tester.topics == ['asset.rig.published']
+
+    def test_star_matches_one_segment(self):
+        self.bus.subscribe('asset.*.published', self.tester.handle)
+        self.bus.publish('asset.rig.published')
+        self.bus.publish('asset.published')
+        self.bus.publish('asset.rig.model.published')
+        assert self.tester.topics == ['asset.rig.published']
+
+    def test_hash_matches_any_number_of_segments(self):
+        self.bus.subscribe('scene.selection.#', self.tester.handle)
+        self.bus.publish('scene.selection')
+        self.bus.publish('scene.selection.changed')
+        self.bus.publish('scene.selection.component.changed')
+        self.bus.publish('scene.time.changed')
+        assert self.tester.topics == ['scene.selection', 'scene.selection.changed',
+                                      'scene.selection.component.changed']
+
+    def test_hash_in_middle(self):
+        self.bus.subscribe('scene.#.changed', self.tester.handle)
+        self.bus.publish('scene.changed')
+        self.bus.publish('scene.a.b.changed')
+        self.bus.publish('scene.a.b')
+        assert self.tester.topics == ['scene.changed', 'scene.a.b.changed']
+
+    def test_overlapping_wildcards_deliver_once(self):
+        self.bus.subscribe('a.#.#', self.tester.handle)
+        self.bus.publish('a.b.c')
+        assert self.tester.topics == ['a.b.c']
+
+    def test_subscriptions_live_in_registry(self):
+        evt = self.bus.subscribe('asset.*', self.tester.handle)
+        assert self.registry['asset.*'] is evt
+
+    def test_unsubscribe(self):
+        self.bus.subscribe('asset.*', self.tester.handle)
+        self.bus.unsubscribe('asset.*', self.tester.handle)
+        self.bus.publish('asset.rig')
+        assert self.tester.topics == []
+
+    def test_delivery_counts(self):
+        other = self.Tester()
+        self.bus.subscribe('asset.*', self.tester.handle)
+        self.bus.subscribe('asset.#', other.handle)
+        assert self.bus.publish('asset.rig') == 2
+        self.bus.publish('asset.rig')
+        self.bus.publish('scene')
+        assert self.bus.deliveries == {'asset.rig': 4, 'scene': 0}
+
+    def test_topic_keyword_is_reserved(self):
+        self.bus.subscribe('asset.*', self.tester.handle)
+        self.assertRaises(ValueError, self.bus.publish, 'asset.rig', topic='asset.model')
+        self.assertRaises(TypeError, self.bus.publish)
+        assert self.tester.topics == []
+        assert self.bus.publish('asset.rig', 'extra', path='bob.ma') == 1
+        assert self.tester.topics == ['asset.rig']
+
+
+if __name__ == '__main__':
+    main()